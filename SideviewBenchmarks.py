@@ -0,0 +1,523 @@
+#####################################
+# Imports
+#####################################
+# Python native imports
+import numpy as np
+import cv2
+import os
+import shutil
+import json
+import ctypes
+import multiprocessing as mp
+from time import time
+from timeit import timeit
+
+# Custom imports
+import SideviewVideoProcessor
+from SideviewVideoProcessor import SideviewWorker, SideviewVideoProcessor as SideviewVideoProcessorApp, LedDetector, \
+    CAMERA_PROFILES
+
+#####################################
+# Global Variables
+#####################################
+BENCHMARK_CAMERA_NUMBER = 2
+BENCHMARK_FRAME_SHAPE = (720, 1280, 3)
+
+LED_DETECTOR_ITERATIONS = 20000
+
+# Synthetic videos. The assay timing is shortened so a full video only takes a few minutes to generate and process.
+BENCHMARK_FORMATS = ("avi", "mp4")
+BENCHMARK_VIDEO_SHAPE = (360, 640, 3)
+BENCHMARK_FPS = 30
+
+BENCHMARK_START_TO_FIRST_TAP_LENGTH = 60
+BENCHMARK_SECONDS_BETWEEN_TAPS = 20
+BENCHMARK_NUMBER_OF_TAPS_TO_END = 10
+
+BENCHMARK_LED_FLASH_SECONDS = 0.5
+BENCHMARK_FISH_COUNT = 6
+
+# Operator timing errors for each synthetic video. Tap errors are seconds added to the gap before that tap.
+BENCHMARK_SCENARIOS = {
+    "on_time": {"lead_in": 5, "first_tap_delay": 12, "tap_errors": {}, "missing_taps": 0, "end_after_last_tap": 12},
+    "late_first_tap": {"lead_in": 5, "first_tap_delay": 45, "tap_errors": {}, "missing_taps": 0,
+                       "end_after_last_tap": 12},
+    "late_taps": {"lead_in": 5, "first_tap_delay": 12, "tap_errors": {2: 8, 5: 15}, "missing_taps": 0,
+                  "end_after_last_tap": 12},
+    "early_taps": {"lead_in": 5, "first_tap_delay": 12, "tap_errors": {3: -6, 7: -4}, "missing_taps": 0,
+                   "end_after_last_tap": 12},
+    "missing_tap": {"lead_in": 5, "first_tap_delay": 12, "tap_errors": {}, "missing_taps": 1,
+                    "end_after_last_tap": 12},
+    "short_end": {"lead_in": 5, "first_tap_delay": 12, "tap_errors": {}, "missing_taps": 0, "end_after_last_tap": 6},
+}
+
+# Where generated videos and benchmark outputs go, and the saved results later runs are compared against
+BENCHMARK_FOLDER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_videos")
+BENCHMARK_BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+
+# Output encoders compared on the same video, as settings changed in SideviewVideoProcessor for each run. Cases that use
+# ffmpeg are skipped if it can't be found, and stream copying only applies to avi.
+BENCHMARK_ENCODER_SCENARIO = "on_time"
+BENCHMARK_ENCODERS = {
+    "opencv": {"OUTPUT_ENCODER": "opencv"},
+    "ffmpeg": {"OUTPUT_ENCODER": "ffmpeg"},
+    "ffmpeg_smaller": {"OUTPUT_ENCODER": "ffmpeg", "FFMPEG_OUTPUT_SETTINGS": {
+        ".mp4": {"codec": "libx264", "crf": 28, "quality": None, "preset": "medium", "pixel_format": "yuv420p"},
+        ".avi": {"codec": "mjpeg", "crf": None, "quality": 8, "preset": None, "pixel_format": "yuvj420p"}
+    }},
+    "stream_copy": {"STREAM_COPY_FRAMES": True}
+}
+
+SAVE_BASELINE = False  # Saves this run as the new baseline. The first run always does.
+REGRESSION_TOLERANCE = 0.15  # How much worse than the baseline a result can be before it's flagged
+
+#######################################################
+#######################################################
+# ##### DO NOT EDIT ANYTHING BELOW THIS POINT!!!! #####
+#######################################################
+#######################################################
+BENCHMARK_GROWOUT_NAME = "BenchmarkGrowout"
+
+# Result fields, and whether a bigger value is better
+RESULT_FIELDS = {
+    "frames_per_second": True,
+    "wall_seconds": False,
+    "cpu_seconds": False,
+    "peak_rss_bytes": False,
+    "output_bytes": False,
+    "duration_error_seconds": False,
+    "microseconds_per_frame": False
+}
+
+
+#####################################
+# Assay Timing Definitions
+#####################################
+def apply_benchmark_assay_timing():
+    # Done at import, so worker processes started by the scheduler pick it up too, even when they're spawned
+    SideviewVideoProcessor.CORRECT_START_TO_FIRST_TAP_LENGTH = BENCHMARK_START_TO_FIRST_TAP_LENGTH
+    SideviewVideoProcessor.SECONDS_BETWEEN_TAPS = BENCHMARK_SECONDS_BETWEEN_TAPS
+    SideviewVideoProcessor.SECONDS_BETWEEN_TAPS_HALVED = BENCHMARK_SECONDS_BETWEEN_TAPS / 2
+    SideviewVideoProcessor.NUMBER_OF_TAPS_TO_END = BENCHMARK_NUMBER_OF_TAPS_TO_END
+    SideviewVideoProcessor.PREFLIGHT_MINIMUM_VIDEO_SECONDS = BENCHMARK_START_TO_FIRST_TAP_LENGTH + \
+        ((BENCHMARK_NUMBER_OF_TAPS_TO_END - 1) * 2 * SideviewVideoProcessor.MINIMUM_LED_FLASH_SECONDS)
+
+
+apply_benchmark_assay_timing()
+
+
+def get_expected_output_seconds(scenario):
+    # Videos with missing taps should fail and not leave an output
+    if scenario["missing_taps"]:
+        return None
+
+    return BENCHMARK_START_TO_FIRST_TAP_LENGTH + BENCHMARK_SECONDS_BETWEEN_TAPS + \
+        ((BENCHMARK_NUMBER_OF_TAPS_TO_END - 1) * BENCHMARK_SECONDS_BETWEEN_TAPS)
+
+
+#####################################
+# Synthetic Video Definitions
+#####################################
+def get_scenario_event_times(scenario):
+    start_light_time = scenario["lead_in"]
+
+    tap_times = []
+    tap_time = start_light_time + BENCHMARK_START_TO_FIRST_TAP_LENGTH + scenario["first_tap_delay"]
+
+    for tap_index in range(BENCHMARK_NUMBER_OF_TAPS_TO_END - scenario["missing_taps"]):
+        if tap_index:
+            tap_time += BENCHMARK_SECONDS_BETWEEN_TAPS + scenario["tap_errors"].get(tap_index, 0)
+
+        tap_times.append(tap_time)
+
+    return start_light_time, tap_times, tap_times[-1] + scenario["end_after_last_tap"]
+
+
+def generate_synthetic_video(video_path, scenario):
+    # Dim tank background with dark fish swimming across it, and the start and tap leds lit red at the camera profile's
+    # locations for BENCHMARK_LED_FLASH_SECONDS at each event
+    frame_height, frame_width = BENCHMARK_VIDEO_SHAPE[:2]
+
+    fourcc = cv2.VideoWriter_fourcc(*('MJPG' if video_path.endswith(".avi") else 'mp4v'))
+    video_writer = cv2.VideoWriter(video_path, fourcc, BENCHMARK_FPS, (frame_width, frame_height))
+
+    led_detector = LedDetector(CAMERA_PROFILES[BENCHMARK_CAMERA_NUMBER], BENCHMARK_VIDEO_SHAPE)
+
+    background = np.zeros(BENCHMARK_VIDEO_SHAPE, dtype=np.uint8)
+    background[:, :, 0] = np.linspace(60, 110, frame_width, dtype=np.uint8)
+    background[:, :, 1] = np.linspace(50, 90, frame_height, dtype=np.uint8)[:, np.newaxis]
+    background[:, :, 2] = 8
+
+    random_state = np.random.RandomState(0)
+    fish_positions = random_state.uniform((0, 0), (frame_width, frame_height), (BENCHMARK_FISH_COUNT, 2))
+    fish_speeds = random_state.uniform(-3, 3, (BENCHMARK_FISH_COUNT, 2))
+
+    start_light_time, tap_times, video_length = get_scenario_event_times(scenario)
+
+    frame = np.empty_like(background)
+
+    for frame_number in range(int(video_length * BENCHMARK_FPS)):
+        frame_time = frame_number / BENCHMARK_FPS
+
+        frame[:] = background
+
+        fish_positions = (fish_positions + fish_speeds) % (frame_width, frame_height)
+
+        for fish_x, fish_y in fish_positions:
+            cv2.ellipse(frame, (int(fish_x), int(fish_y)), (18, 6), 0, 0, 360, (20, 25, 4), -1)
+
+        if start_light_time <= frame_time < start_light_time + BENCHMARK_LED_FLASH_SECONDS:
+            frame[led_detector.led_regions["start"]] = (0, 0, 255)
+
+        for tap_time in tap_times:
+            if tap_time <= frame_time < tap_time + BENCHMARK_LED_FLASH_SECONDS:
+                frame[led_detector.led_regions["tap"]] = (0, 0, 255)
+
+        video_writer.write(frame)
+
+    video_writer.release()
+
+
+def get_benchmark_video_paths():
+    # Named like the real inputs, so the camera number is found in the same spot
+    raw_folder_path = os.path.join(BENCHMARK_FOLDER_PATH, BENCHMARK_GROWOUT_NAME, SideviewVideoProcessor.RAW_FOLDER_NAME,
+                                   SideviewVideoProcessor.SIDEVIEW_FOLDER_NAME)
+
+    video_paths = {}
+
+    for video_format in BENCHMARK_FORMATS:
+        for scenario_name in BENCHMARK_SCENARIOS:
+            video_paths[(scenario_name, video_format)] = os.path.join(raw_folder_path, "%s 1 %d %s.%s" % (
+                BENCHMARK_GROWOUT_NAME, BENCHMARK_CAMERA_NUMBER, scenario_name, video_format))
+
+    return video_paths
+
+
+def generate_benchmark_videos():
+    # Only generated once, delete the benchmark folder after changing the synthetic video settings
+    for (scenario_name, _), video_path in get_benchmark_video_paths().items():
+        if os.path.exists(video_path):
+            continue
+
+        if not os.path.exists(os.path.dirname(video_path)):
+            os.makedirs(os.path.dirname(video_path))
+
+        print("Generating \"%s\"..." % video_path)
+        generate_synthetic_video(video_path, BENCHMARK_SCENARIOS[scenario_name])
+
+
+#####################################
+# Measurement Definitions
+#####################################
+def get_peak_rss_bytes(include_children=False):
+    # Returns None if it can't be found. Children are only counted once they've exited, and only on unix.
+    if os.name == "nt":
+        if include_children:
+            return None
+
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [
+                ("cb", ctypes.c_ulong),
+                ("PageFaultCount", ctypes.c_ulong),
+                ("PeakWorkingSetSize", ctypes.c_size_t),
+                ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t),
+                ("PeakPagefileUsage", ctypes.c_size_t)
+            ]
+
+        memory_counters = ProcessMemoryCounters()
+        memory_counters.cb = ctypes.sizeof(ProcessMemoryCounters)
+
+        get_current_process = ctypes.windll.kernel32.GetCurrentProcess
+        get_current_process.restype = ctypes.c_void_p
+
+        if ctypes.windll.psapi.GetProcessMemoryInfo(ctypes.c_void_p(get_current_process()),
+                                                    ctypes.byref(memory_counters), memory_counters.cb):
+            return memory_counters.PeakWorkingSetSize
+
+        return None
+
+    import resource
+
+    peak_rss = resource.getrusage(resource.RUSAGE_CHILDREN if include_children else resource.RUSAGE_SELF).ru_maxrss
+
+    # Kilobytes on linux, bytes on mac
+    return peak_rss if os.uname().sysname == "Darwin" else peak_rss * 1024
+
+
+def get_cpu_seconds(include_children=False):
+    # Children are only counted once they've been waited on, and only on unix
+    if os.name == "nt" and include_children:
+        return None
+
+    process_times = os.times()
+    cpu_seconds = process_times.user + process_times.system
+
+    if include_children:
+        cpu_seconds += process_times.children_user + process_times.children_system
+
+    return cpu_seconds
+
+
+def get_output_duration_error(output_path, scenario):
+    expected_seconds = get_expected_output_seconds(scenario)
+
+    if expected_seconds is None:
+        return 0 if not os.path.exists(output_path) else None
+
+    if not os.path.exists(output_path):
+        return None
+
+    video_reader = cv2.VideoCapture(output_path)
+    output_seconds = video_reader.get(cv2.CAP_PROP_FRAME_COUNT) / video_reader.get(cv2.CAP_PROP_FPS)
+    video_reader.release()
+
+    return abs(output_seconds - expected_seconds)
+
+
+def reset_benchmark_outputs():
+    growout_folder_path = os.path.join(BENCHMARK_FOLDER_PATH, BENCHMARK_GROWOUT_NAME)
+    processed_folder_path = os.path.join(growout_folder_path, SideviewVideoProcessor.PROCESSED_FOLDER_NAME)
+
+    if os.path.exists(processed_folder_path):
+        shutil.rmtree(processed_folder_path)
+
+    output_folder_path = os.path.join(processed_folder_path, SideviewVideoProcessor.SIDEVIEW_FOLDER_NAME)
+    log_folder_path = os.path.join(output_folder_path, SideviewVideoProcessor.LOGS_FOLDER_NAME)
+
+    os.makedirs(log_folder_path)
+
+    return growout_folder_path, output_folder_path, log_folder_path
+
+
+#####################################
+# Benchmark Definitions
+#####################################
+def benchmark_led_detector():
+    camera_profile = CAMERA_PROFILES[BENCHMARK_CAMERA_NUMBER]
+    frame = np.random.randint(0, 256, BENCHMARK_FRAME_SHAPE, dtype=np.uint8)
+
+    led_detector = LedDetector(camera_profile, frame.shape)
+
+    # Both have to agree before the timings mean anything
+    for start_or_tap in ("start", "tap"):
+        assert led_detector.is_led_on(frame, start_or_tap) == \
+               SideviewWorker.is_led_over_trigger_level(frame, camera_profile, start_or_tap)
+
+    original_time = timeit(lambda: (SideviewWorker.is_led_over_trigger_level(frame, camera_profile, "start"),
+                                    SideviewWorker.is_led_over_trigger_level(frame, camera_profile, "tap")),
+                           number=LED_DETECTOR_ITERATIONS)
+    detector_time = timeit(lambda: led_detector.get_led_states(frame), number=LED_DETECTOR_ITERATIONS)
+
+    print("LED detection, both leds, %d frames of %s:" % (LED_DETECTOR_ITERATIONS, str(BENCHMARK_FRAME_SHAPE)))
+    print("    is_led_over_trigger_level: %.2f us per frame" % (original_time / LED_DETECTOR_ITERATIONS * 1e6))
+    print("    LedDetector:               %.2f us per frame" % (detector_time / LED_DETECTOR_ITERATIONS * 1e6))
+    print("    Speedup:                   %.1fx" % (original_time / detector_time))
+
+    return {"led_detector": {"microseconds_per_frame": detector_time / LED_DETECTOR_ITERATIONS * 1e6}}
+
+
+def run_worker_case(video_path, scenario, result_queue):
+    # Runs in its own process so the peak memory is only this video's
+    _, output_folder_path, log_folder_path = reset_benchmark_outputs()
+
+    start_time = time()
+    sideview_worker = SideviewWorker(BENCHMARK_GROWOUT_NAME, video_path, output_folder_path, log_folder_path,
+                                     None, "benchmark")
+    wall_seconds = time() - start_time
+
+    result_queue.put({
+        "frames_per_second": sideview_worker.metrics["input_frames"] / wall_seconds,
+        "wall_seconds": wall_seconds,
+        "peak_rss_bytes": get_peak_rss_bytes(),
+        "duration_error_seconds": get_output_duration_error(sideview_worker.full_output_path, scenario)
+    })
+
+
+def run_encoder_case(encoder_settings, video_path, scenario, result_queue):
+    # Ffmpeg runs as a child process, so its cpu time is counted along with the worker's
+    for setting_name, setting_value in encoder_settings.items():
+        setattr(SideviewVideoProcessor, setting_name, setting_value)
+
+    _, output_folder_path, log_folder_path = reset_benchmark_outputs()
+
+    start_time = time()
+    start_cpu_seconds = get_cpu_seconds(include_children=True)
+    sideview_worker = SideviewWorker(BENCHMARK_GROWOUT_NAME, video_path, output_folder_path, log_folder_path,
+                                     None, "benchmark")
+    wall_seconds = time() - start_time
+    end_cpu_seconds = get_cpu_seconds(include_children=True)
+
+    output_exists = os.path.exists(sideview_worker.full_output_path)
+
+    result_queue.put({
+        "frames_per_second": sideview_worker.metrics["input_frames"] / wall_seconds if sideview_worker.metrics else 0,
+        "wall_seconds": wall_seconds,
+        "cpu_seconds": None if start_cpu_seconds is None else end_cpu_seconds - start_cpu_seconds,
+        "output_bytes": os.path.getsize(sideview_worker.full_output_path) if output_exists else None,
+        "duration_error_seconds": get_output_duration_error(sideview_worker.full_output_path, scenario)
+    })
+
+
+def run_full_processor_case(result_queue):
+    growout_folder_path, output_folder_path, log_folder_path = reset_benchmark_outputs()
+
+    sideview_video_processor = SideviewVideoProcessorApp()
+
+    start_time = time()
+    sideview_video_processor.get_input_folder_path(top_folder_path=growout_folder_path)
+    sideview_video_processor.find_video_paths()
+    sideview_video_processor.process_video_files()
+    wall_seconds = time() - start_time
+
+    # Frame counts come from the metrics file the scheduler wrote for this run
+    input_frames = 0
+
+    for filename in os.listdir(log_folder_path):
+        if filename.endswith(SideviewVideoProcessor.METRICS_FILENAME_APPEND):
+            with open(os.path.join(log_folder_path, filename)) as metrics_file:
+                for line in metrics_file:
+                    input_frames += json.loads(line).get("input_frames", 0)
+
+    duration_errors = []
+
+    for (scenario_name, _), video_path in get_benchmark_video_paths().items():
+        output_path = os.path.join(output_folder_path,
+                                   SideviewVideoProcessor.get_output_filename(os.path.split(video_path)[1]))
+        duration_errors.append(get_output_duration_error(output_path, BENCHMARK_SCENARIOS[scenario_name]))
+
+    result_queue.put({
+        "frames_per_second": input_frames / wall_seconds,
+        "wall_seconds": wall_seconds,
+        "peak_rss_bytes": get_peak_rss_bytes(include_children=True),
+        "duration_error_seconds": None if None in duration_errors else max(duration_errors)
+    })
+
+
+def run_case_in_process(target, arguments):
+    result_queue = mp.Queue()
+
+    case_process = mp.Process(target=target, args=arguments + (result_queue,))
+    case_process.start()
+    result = result_queue.get()
+    case_process.join()
+
+    return result
+
+
+def benchmark_workers():
+    results = {}
+
+    for (scenario_name, video_format), video_path in get_benchmark_video_paths().items():
+        case_name = "worker_%s_%s" % (video_format, scenario_name)
+
+        results[case_name] = run_case_in_process(run_worker_case, (video_path, BENCHMARK_SCENARIOS[scenario_name]))
+        print_result(case_name, results[case_name])
+
+    return results
+
+
+def benchmark_encoders():
+    results = {}
+    scenario = BENCHMARK_SCENARIOS[BENCHMARK_ENCODER_SCENARIO]
+
+    for encoder_name, encoder_settings in BENCHMARK_ENCODERS.items():
+        ffmpeg_path = encoder_settings.get("FFMPEG_PATH", SideviewVideoProcessor.FFMPEG_PATH)
+
+        if encoder_settings.get("OUTPUT_ENCODER") == "ffmpeg" and shutil.which(ffmpeg_path) is None:
+            print("Skipping encoder %s, ffmpeg wasn't found at \"%s\"." % (encoder_name, ffmpeg_path))
+            continue
+
+        for video_format in BENCHMARK_FORMATS:
+            if encoder_settings.get("STREAM_COPY_FRAMES") and video_format != "avi":
+                continue
+
+            case_name = "encoder_%s_%s" % (video_format, encoder_name)
+            video_path = get_benchmark_video_paths()[(BENCHMARK_ENCODER_SCENARIO, video_format)]
+
+            results[case_name] = run_case_in_process(run_encoder_case, (encoder_settings, video_path, scenario))
+            print_result(case_name, results[case_name])
+
+    return results
+
+
+def benchmark_full_processor():
+    case_name = "full_processor"
+
+    results = {case_name: run_case_in_process(run_full_processor_case, ())}
+    print_result(case_name, results[case_name])
+
+    return results
+
+
+#####################################
+# Baseline Definitions
+#####################################
+def print_result(case_name, result, baseline_result=None):
+    result_strings = []
+
+    for field, bigger_is_better in RESULT_FIELDS.items():
+        if field not in result:
+            continue
+
+        value = result[field]
+
+        if value is None:
+            result_strings.append("%s n/a" % field)
+            continue
+
+        result_string = "%s %.2f" % (field, value / 1024 ** 2 if field.endswith("_bytes") else value)
+
+        if baseline_result is not None and baseline_result.get(field) is not None:
+            baseline_value = baseline_result[field]
+
+            if bigger_is_better:
+                regressed = value < baseline_value * (1 - REGRESSION_TOLERANCE)
+            elif field == "duration_error_seconds":
+                # Frame exact outputs have no error to scale, so any increase past a frame is a regression
+                regressed = value > baseline_value + (1.0 / BENCHMARK_FPS)
+            else:
+                regressed = value > baseline_value * (1 + REGRESSION_TOLERANCE)
+
+            result_string += " (baseline %.2f%s)" % (
+                baseline_value / 1024 ** 2 if field.endswith("_bytes") else baseline_value,
+                ", REGRESSION" if regressed else "")
+
+        result_strings.append(result_string)
+
+    print("%s: %s" % (case_name, ", ".join(result_strings)))
+
+
+def compare_with_baseline(results):
+    if SAVE_BASELINE or not os.path.exists(BENCHMARK_BASELINE_PATH):
+        with open(BENCHMARK_BASELINE_PATH, "w") as baseline_file:
+            json.dump(results, baseline_file, indent=4, sort_keys=True)
+
+        print("Saved baseline to \"%s\"." % BENCHMARK_BASELINE_PATH)
+        return
+
+    with open(BENCHMARK_BASELINE_PATH) as baseline_file:
+        baseline_results = json.load(baseline_file)
+
+    print("Compared to baseline \"%s\" (bytes in MB):" % BENCHMARK_BASELINE_PATH)
+
+    for case_name in sorted(results):
+        print_result(case_name, results[case_name], baseline_results.get(case_name))
+
+
+if __name__ == "__main__":
+    benchmark_results = {}
+
+    benchmark_results.update(benchmark_led_detector())
+
+    generate_benchmark_videos()
+
+    benchmark_results.update(benchmark_workers())
+    benchmark_results.update(benchmark_encoders())
+    benchmark_results.update(benchmark_full_processor())
+
+    compare_with_baseline(benchmark_results)
@@ -7,15 +7,138 @@ import cv2
 import tkinter as tk
 from tkinter import filedialog
 import os
-from time import sleep, time
+from time import time
 from datetime import datetime
 import multiprocessing as mp
+import queue
+import traceback
+import ctypes
+import threading
+import sqlite3
+import hashlib
+import socket
+import json
+import cProfile
+import csv
+import struct
+import tempfile
+import subprocess
+from fractions import Fraction
 
 #####################################
 # Global Variables
 #####################################
 # Program specific
-NUMBER_PROCESSES = 4  # How many videos to process simultaneously
+NUMBER_PROCESSES = "auto"  # How many videos to process simultaneously. "auto" picks based on cpu cores and free memory
+OPENCV_THREADS_PER_PROCESS = "auto"  # Threads OpenCV can use in each process. "auto" splits the cores between processes
+
+# Skips decoding frames that are only being searched for a tap led, and are then thrown away. Only used on avi (MJPG)
+# inputs, where every frame is independent so seeking back to the frames right before the tap is exact.
+SKIP_DECODING_UNUSED_FRAMES = True
+MINIMUM_LED_FLASH_SECONDS = 0.2  # Shortest time an led stays lit. Led checks while skipping are spaced closer than this
+
+# Finds the start light by seeking ahead and only checking every few frames, instead of decoding the whole lead in.
+# Same avi only restriction and minimum led flash time as above.
+SEEK_FOR_START_LIGHT = True
+
+# Decodes and encodes on their own threads in each process, overlapping with each other and the tap alignment. Each
+# process then keeps about two cores busy, so "auto" NUMBER_PROCESSES starts half as many.
+PIPELINE_THREADS = True
+
+# Splits a video's output into segments that are encoded on separate processes at once and then joined, so one video
+# gets done sooner. The cut and pad plan is worked out first without encoding anything, and the joined output has the
+# exact same frames as encoding it in one go. Only used on avi (MJPG) inputs, where every frame is encoded on its own.
+# True, False, or "auto", which only splits videos when there are cpu cores left over, like when reprocessing one file.
+# True splits every video over its worker's share of the cores.
+SEGMENT_ENCODING = False
+
+# Copies the compressed frames of avi (MJPG) inputs straight into the output instead of decoding and re-encoding them,
+# after planning the output the same way as SEGMENT_ENCODING. Almost nothing gets encoded, and the output frames are the
+# camera's originals, without a second round of compression loss. Only black padding frames are encoded.
+STREAM_COPY_FRAMES = False
+
+# How outputs are encoded. "opencv" is OpenCV's own writer, mp4v for mp4 and MJPG for avi. "ffmpeg" streams the
+# frames to an ffmpeg process (FFMPEG_PATH) that encodes them with FFMPEG_OUTPUT_SETTINGS, to trade cpu per video
+# against output size. "raw" writes the frames uncompressed and back to back with no container, for testing, and can be
+# read back with numpy.fromfile. SEGMENT_ENCODING only splits "opencv" outputs, and STREAM_COPY_FRAMES doesn't use an
+# encoder at all.
+OUTPUT_ENCODER = "opencv"
+FFMPEG_PATH = "ffmpeg"
+
+# With the "opencv" encoder, avi frames are encoded to JPEG at AVI_JPEG_QUALITY and written to the avi directly instead
+# of going through OpenCV's writer, so a padding frame is only encoded once and its bytes written for the rest of the
+# gap. This changes how every avi output frame is compressed, not just padding. 95 is OpenCV's default JPEG quality,
+# which loses less than OpenCV's MJPG writer but makes larger files. Lower it for smaller files.
+AVI_JPEG_WRITER = False
+AVI_JPEG_QUALITY = 95
+
+# Per output extension. crf is used by codecs like libx264 and libx265, and quality by ones like mjpeg and mpeg4, with
+# lower being better for both. preset is only passed if it's set. FFMPEG_THREADS is per video, with 0 letting ffmpeg
+# pick and "auto" using the same share of cores OpenCV gets in each process (see OPENCV_THREADS_PER_PROCESS).
+FFMPEG_OUTPUT_SETTINGS = {
+    ".mp4": {"codec": "libx264", "crf": 23, "quality": None, "preset": "veryfast", "pixel_format": "yuv420p"},
+    ".avi": {"codec": "mjpeg", "crf": None, "quality": 3, "preset": None, "pixel_format": "yuvj420p"}
+}
+FFMPEG_THREADS = "auto"
+
+# What fills in the time when a tap comes early or the video ends short. "black" or "last_frame", which repeats the last
+# frame written before the gap.
+PADDING_CONTENT = "black"
+
+# How frames waiting on a tap are kept. "raw" keeps them decoded. "jpeg" keeps them JPEG compressed, using a fraction of
+# the memory at the cost of an encode and decode per buffered frame, and a little compression loss in those frames. When
+# the output is planned for SEGMENT_ENCODING or STREAM_COPY_FRAMES, only where each frame came from is kept either way.
+BUFFER_STORAGE = "raw"
+
+# Decoded frames past this many bytes per process are kept in a memory mapped temporary file instead of memory, so a
+# worker's memory stays bounded however long the wait on a tap is. None for no cap.
+BUFFER_MEMORY_CAP_BYTES = None
+
+# Re-runs only process videos that are new, changed, or errored last time. Videos found to be bad (wrong length or taps
+# not found) are only retried if RETRY_BAD_VIDEOS is True. Videos that keep erroring or crashing their worker are given
+# up on after MAXIMUM_PROCESSING_ATTEMPTS runs.
+RETRY_BAD_VIDEOS = False
+MAXIMUM_PROCESSING_ATTEMPTS = 3
+
+# Only finds the start light and tap times of each video, without cutting anything, and writes a timing report per
+# growout to its logs folder with the predicted padding and cuts, so bad videos can be found up front. Avi inputs only
+# have a few frames a second decoded, which makes it many times faster than processing them. Mp4 inputs still have
+# every frame decoded, since each frame depends on the ones before, so those only skip the buffering and encoding.
+ANALYZE_ONLY = False
+
+# Checks each video before it's queued, from its header and a few frames spread through it. Videos too short to hold
+# every tap, without a camera profile, with led regions off the edge of the frame, or with frames that can't be read are
+# logged and marked bad without taking up a worker.
+PREFLIGHT_CHECKS = True
+
+# Writes a timeline next to each output, mapping its frames back to the input and listing the start light, taps, padding
+# and cuts, and merges them into one timeline index per growout, so later analysis can find the taps without decoding.
+WRITE_TIMELINES = True
+
+# Writes a small copy of each output, with the same cuts and padding, into a "proxies" folder next to the outputs while
+# the output is made, so SimulatenousVideoPlayback.py can play it instead of decoding and shrinking the full size output
+WRITE_PROXIES = False
+PROXY_SIZE = (480, 270)
+PROXY_FOURCC = "MJPG"
+PROXY_EXTENSION = ".avi"
+
+# Finds each camera's start and tap led locations and trigger levels from a few of its videos in a growout before any
+# are processed, in place of CAMERA_PROFILES, so a bumped camera doesn't waste a whole run. Results are kept as profile
+# files next to the logs and reused until those videos change. Cameras whose leds can't be found, or that seem to move
+# between videos, are warned about and fall back to CAMERA_PROFILES.
+CALIBRATE_LED_PROFILES = False
+CALIBRATION_VIDEOS_PER_CAMERA = 3
+
+# Runs each video's worker under cProfile, dumping the stats next to the logs. Only the processing thread is profiled, not
+# the reader and writer threads.
+PROFILE_WORKERS = False
+
+# Lets several machines (or several instances on one machine) work through the same growouts on a shared folder. Each
+# claims videos with lease files in the logs folder, and a lease not renewed for LEASE_EXPIRY_SECONDS is taken over
+# by another node, so a dead node's videos still get done. Keep the machines' clocks synced. The manifest is kept as one
+# small file per video next to the leases instead of in SQLite, whose locking can't be relied on over a network share.
+SHARED_PROCESSING = False
+LEASE_EXPIRY_SECONDS = 10 * 60
 
 # Assay specific
 # Video looks like [start----start_light------------------------first_tap----tap---tap---tap---etc---end]
@@ -114,412 +237,3630 @@ CAMERA_NUMBER_POSITION_IN_SPLIT = 2
 
 # Tuple positions in frame storage
 VIDEO_TIME = 0
-RAW_FRAME = 1
+FRAME_SLOT_INDEX = 1
+
+# Positions in the runs of output frames a FrameWriter records. Padding runs have no source.
+RUN_OUTPUT_START = 0
+RUN_FRAME_COUNT = 1
+RUN_SOURCE_START = 2
+RUN_SOURCE_START_TIME = 3
+RUN_SOURCE_END_TIME = 4
+
+# Auto sizing of worker processes. Workers can use this fraction of free memory, and need the base amount on top of
+# their tap frame buffer
+AUTO_SIZING_MEMORY_FRACTION = 0.8
+WORKER_BASE_MEMORY_BYTES = 300 * 1024 * 1024
+
+# How often the scheduler checks for crashed worker processes while waiting on results
+WORKER_CHECK_INTERVAL_SECONDS = 1
+
+# Positions in scheduler jobs, and in the worker arguments they hold
+JOB_FILE_SIZE = 0
+JOB_WORKER_ARGUMENTS = 1
+
+WORKER_ARGUMENT_INPUT_PATH = 1
+
+# Kinds of message workers send back on the result queue
+WORKER_MESSAGE_RESULT = "result"
+WORKER_MESSAGE_LOG = "log"
+
+# Segment encoding. Segments are written next to the partial output with this before their extension, then joined into
+# an avi of OpenDML RIFF chunks. A plain avi can't go past 1 GB, and each chunk gets a slot in the header's index.
+SEGMENT_FILENAME_APPEND = "_segment%d"
+AVI_RIFF_MAXIMUM_BYTES = 1024 * 1024 * 1024
+AVI_SUPER_INDEX_ENTRIES = 256
+AVI_MAXIMUM_FPS_DENOMINATOR = 1001
+
+# Extra slots in the tap frame ring buffer beyond the prior half window plus a full between taps window
+FRAME_BUFFER_SLACK_FRAMES = 4
+
+# Quality of buffered frames kept with "jpeg" BUFFER_STORAGE
+BUFFER_JPEG_QUALITY = 95
+
+# Frames that can be waiting between each stage of a worker's decode, alignment and encode threads
+PIPELINE_QUEUE_FRAMES = 8
+
+# Outputs are written under this prefix and renamed once complete
+PARTIAL_OUTPUT_PREFIX = "partial_"
+
+# Processing manifest, one per growout in its logs folder
+MANIFEST_FILENAME_APPEND = "_manifest.sqlite3"
+CHECKSUM_CHUNK_BYTES = 16 * 1024 * 1024
+
+# How long to wait on another instance's write to the manifest
+MANIFEST_LOCK_TIMEOUT_SECONDS = 60
+
+# Shared processing leases, manifest records and per node progress reports, in the logs folder
+LEASE_FOLDER_NAME = "processing_leases"
+LEASE_FILENAME_APPEND = ".lease"
+MANIFEST_RECORD_FILENAME_APPEND = "_manifest.json"
+NODE_PROGRESS_FILENAME_APPEND = "_progress.txt"
+
+# How often held leases are renewed, and how often videos leased by other nodes are checked again
+LEASE_RENEW_INTERVAL_SECONDS = LEASE_EXPIRY_SECONDS / 4
+LEASE_RETRY_INTERVAL_SECONDS = 30
+
+# Per run metrics, one json record per video, and cProfile dumps, in the logs folder
+METRICS_FILENAME_APPEND = "_metrics.jsonl"
+PROFILE_FILENAME_APPEND = ".prof"
+
+# Timelines, one per output next to it, and the index of every timeline in a growout's output folder
+TIMELINE_FILENAME_APPEND = "_timeline.json"
+TIMELINE_INDEX_FILENAME_APPEND = "_timeline_index.json"
+
+# Proxies go in this folder in the output folder, named after their output
+PROXY_FOLDER_NAME = "proxies"
+
+# Analyze only timing reports, one csv per growout and run in the logs folder
+TIMING_REPORT_FILENAME_APPEND = "_timing_report.csv"
+TIMING_REPORT_COLUMNS = [
+    "video", "status", "failure_reason", "fps", "video_seconds", "start_light_seconds", "first_tap_delay_seconds",
+    "tap_seconds", "gap_seconds", "first_tap_cut_frames", "gap_adjustment_frames", "end_padding_frames",
+    "total_padding_frames", "total_cut_frames", "predicted_output_seconds"
+]
+
+# Preflight checks. The first tap isn't looked for until the full start to first tap time has passed, and each tap
+# after it needs the led to go off and back on, so anything shorter can't have every tap in it.
+PREFLIGHT_MINIMUM_VIDEO_SECONDS = \
+    CORRECT_START_TO_FIRST_TAP_LENGTH + ((NUMBER_OF_TAPS_TO_END - 1) * 2 * MINIMUM_LED_FLASH_SECONDS)
+PREFLIGHT_SAMPLE_FRAMES = 3
+PREFLIGHT_SUPPORTED_EXTENSIONS = (".avi", ".mp4")
+
+# Led calibration. Sampled frames are shrunk to this width, and a led has to brighten by the contrast in the samples,
+# standing out by the deviations from how much its pixels usually vary, and be off for all but the fraction of them.
+# Up to the flashes per led are decoded at full size to place its box and set its trigger level.
+LED_PROFILE_VERSION = 1
+LED_PROFILE_FILENAME_APPEND = "_led_profile.json"
+CALIBRATION_SAMPLE_WIDTH = 96
+CALIBRATION_MINIMUM_LED_CONTRAST = 15
+CALIBRATION_MINIMUM_PEAK_DEVIATIONS = 3
+CALIBRATION_MAXIMUM_ON_FRACTION = 0.1
+CALIBRATION_FLASHES_PER_LED = 10
+CALIBRATION_MINIMUM_BOX_SIZE = 4
+CALIBRATION_MAXIMUM_BOX_SIZE = 40
+
+# Processing manifest statuses
+STATUS_RUNNING = "running"
+STATUS_SUCCEEDED = "succeeded"
+STATUS_BAD_VIDEO = "bad_video"
+STATUS_ERROR = "error"
+
+# Outputs from before the manifest existed are kept if they're at least this close to the expected length
+EXISTING_OUTPUT_TOLERANCE_SECONDS = 1
 
 
 #####################################
-# SideviewWorker Class Definition
+# FramePool Class Definition
 #####################################
-class SideviewWorker(object):
-    def __init__(self, growout_name, video_input_path, video_output_path, log_folder_path, worker_lock, iso_datetime_string):
-        self.growout_name = growout_name
-        self.video_input_path = video_input_path
-        self.video_output_path = video_output_path
-        self.log_folder_path = log_folder_path
-        self.worker_lock = worker_lock  # type: mp.Lock
-        self.iso_datetime_string = iso_datetime_string
+class FramePool(object):
+    # Preallocated frame slots shared by the reader, the tap frame buffer and the writer. Frames get passed around as
+    # slot indexes, and a slot goes back on the free list once everything holding a reference to it has released it.
+    # Slots past the memory cap are backed by a temporary file, that the OS can write out instead of swapping.
+    def __init__(self, slot_count, frame_shape, frame_dtype, memory_cap_bytes=None):
+        slot_count = max(int(slot_count), 1)
+        memory_slot_count = slot_count
 
-        self.input_filename = os.path.split(self.video_input_path)[1]
+        if memory_cap_bytes is not None:
+            frame_bytes = int(np.prod(frame_shape)) * np.dtype(frame_dtype).itemsize
+            memory_slot_count = max(1, min(slot_count, int(memory_cap_bytes // frame_bytes)))
 
-        split_filename = self.input_filename.split(".")
-        split_filename[0] += OUTPUT_FILENAME_APPEND
+        self.frames = list(np.empty((memory_slot_count,) + tuple(frame_shape), dtype=frame_dtype))
+        self.memory_slot_count = memory_slot_count
+        self.spill_file = None
 
-        self.output_filename = ".".join(split_filename)
-        self.full_output_path = None
+        if memory_slot_count < slot_count:
+            self.spill_file = tempfile.TemporaryFile(prefix="sideview_frames_")
+            self.frames += list(np.memmap(self.spill_file, dtype=frame_dtype, mode="w+",
+                                          shape=(slot_count - memory_slot_count,) + tuple(frame_shape)))
 
-        if self.input_filename.endswith(".mp4"):
-            self.fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        elif self.input_filename.endswith(".avi"):
-            self.fourcc = cv2.VideoWriter_fourcc(*'MJPG')
+        self.reference_counts = [0] * len(self.frames)
+        self.frame_sources = [None] * len(self.frames)  # Input frame number and time of what's in each slot
 
-        self.camera_profile = None
-        self.video_reader = None  # type: cv2.VideoCapture
-        self.video_writer = None  # type: cv2.VideoWriter
+        # Taken off the end, so slots in memory get handed out before ones in the spill file
+        self.free_slot_indexes = list(range(len(self.frames) - 1, -1, -1))
 
-        self.video_fps = None
-        self.black_frame = None
+        self.lock = threading.Lock()
 
-        self.start_light_time = 0
-        self.tap_light_time = 0
+    def acquire(self):
+        with self.lock:
+            if not self.free_slot_indexes:
+                # Only happens if the video timestamps don't line up with its fps, so the normal sizing was too small
+                self.frames.append(np.empty_like(self.frames[0]))
+                self.reference_counts.append(0)
+                self.frame_sources.append(None)
+                self.free_slot_indexes.append(len(self.frames) - 1)
 
-        self.log_file_full_name = "%s/%s_%s_log.txt" % (log_folder_path, self.growout_name, self.iso_datetime_string)
-        self.log_file_writer = open(self.log_file_full_name, "a+")
+            slot_index = self.free_slot_indexes.pop()
+            self.reference_counts[slot_index] = 1
 
-        self.do_work()
+            return slot_index
 
-        self.log_file_writer.close()
+    def add_reference(self, slot_index):
+        with self.lock:
+            self.reference_counts[slot_index] += 1
 
-    def do_work(self):
-        self.setup_video_reader_writer()
-        self.process_video()
+    def release(self, slot_index):
+        with self.lock:
+            self.reference_counts[slot_index] -= 1
 
-    def setup_video_reader_writer(self):
-        self.camera_profile = CAMERA_PROFILES[int(self.input_filename.split(" ")[CAMERA_NUMBER_POSITION_IN_SPLIT])]
+            if self.reference_counts[slot_index] == 0:
+                self.free_slot_indexes.append(slot_index)
 
-        self.video_reader = cv2.VideoCapture(self.video_input_path)
-        self.video_fps = self.video_reader.get(cv2.CAP_PROP_FPS)
+    def close(self):
+        # Slots in the spill file can't be used after this
+        if self.spill_file is not None:
+            self.frames = self.frames[:self.memory_slot_count]
+            self.spill_file.close()
+            self.spill_file = None
 
-        output_shape = (
-            int(self.video_reader.get(cv2.CAP_PROP_FRAME_WIDTH)), int(self.video_reader.get(cv2.CAP_PROP_FRAME_HEIGHT)))
 
-        self.full_output_path = os.path.join(self.video_output_path, self.output_filename)
+#####################################
+# FrameRingBuffer Class Definition
+#####################################
+class FrameRingBuffer(object):
+    # Timestamps and pool slots of the buffered frames, oldest first. Committing a frame hands the buffer the caller's
+    # slot reference, and peek and pop both hand the caller a reference to each slot they return. With "jpeg" or
+    # "reference" storage, every frame but the newest (which the caller is still looking at) gives its slot back, and is
+    # kept as a JPEG or only as where it came from. It's put back into a new slot when peeked or popped.
+    def __init__(self, capacity, frame_pool, storage="raw"):
+        self.capacity = max(int(capacity), 1)
+        self.frame_pool = frame_pool  # type: FramePool
+        self.storage = storage
 
-        if not os.path.exists(self.full_output_path):
-            self.video_writer = cv2.VideoWriter(self.full_output_path, self.fourcc, self.video_fps, output_shape)
+        self.slot_indexes = np.zeros(self.capacity, dtype=np.int64)
+        self.times = np.zeros(self.capacity)
+        self.stored_frames = [None] * self.capacity  # Compressed frame and source, where the slot index is -1
 
-    def process_video(self):
-        if not self.video_writer:
-            self.locked_print(
-                "########## Skipped processing \"%s\". Output file already exists! ##########" % self.video_input_path)
-            return
+        self.first_index = 0
+        self.frame_count = 0
+        self.peak_frame_count = 0
 
-        self.locked_print("Started processing \"%s\"." % self.video_input_path)
+    def __len__(self):
+        return self.frame_count
 
-        tap_count = 0
+    def commit(self, video_time, slot_index):
+        if self.storage != "raw" and self.frame_count:
+            self.store_compactly((self.first_index + self.frame_count - 1) % self.capacity)
 
-        prior_tap_frames = []
-        after_tap_frames = []
+        if self.frame_count == self.capacity:
+            self.grow()
 
-        first_tap_seen = False
+        buffer_index = (self.first_index + self.frame_count) % self.capacity
 
-        tap_light_previous = False
-        tap_light_activated = False
+        self.times[buffer_index] = video_time
+        self.slot_indexes[buffer_index] = slot_index
+        self.frame_count += 1
 
-        reached_end_of_useful_data = False
+        self.peak_frame_count = max(self.peak_frame_count, self.frame_count)
 
-        start_time = time()
+    def time_at(self, position):
+        if position < 0:
+            position += self.frame_count
 
-        while True:
-            return_value, current_frame = self.video_reader.read()
+        return self.times[(self.first_index + position) % self.capacity]
 
-            if not return_value or reached_end_of_useful_data:
-                break
+    def peek(self, number_of_frames):
+        for position in range(min(number_of_frames, self.frame_count)):
+            buffer_index = (self.first_index + position) % self.capacity
+            slot_index = int(self.slot_indexes[buffer_index])
 
-            if self.black_frame is None:
-                self.black_frame = current_frame.copy()
-                self.black_frame.fill(0)
+            if slot_index < 0:
+                slot_index = self.restore(buffer_index)
+            else:
+                self.frame_pool.add_reference(slot_index)
 
-            current_time = self.video_reader.get(cv2.CAP_PROP_POS_MSEC) / 1000
+            yield self.times[buffer_index], slot_index
 
-            # We're at very beginning, look for start light
-            if self.start_light_time == 0:
-                if self.is_led_over_trigger_level(current_frame, self.camera_profile, "start"):
-                    self.start_light_time = current_time
-                    self.write_frames([(current_time, current_frame)], print_writes=False)
-            elif (current_time - self.start_light_time) < CORRECT_START_TO_FIRST_TAP_LENGTH:
-                self.write_frames([(current_time, current_frame)], print_writes=False)
-            else:
-                # Need way so that tap found only resets when value goes back UNDER the tap threshold
+    def pop(self, number_of_frames):
+        for _ in range(min(number_of_frames, self.frame_count)):
+            buffer_index = self.first_index
 
-                # If first tap not found
-                # Look for tap and If tap found, save time and begin a local counter, add to AFTER BUFFER
-                # Otherwise, add current frame to prior buffer and clean up
-                if not first_tap_seen:
-                    # Building up prior buffer if we haven't found first tap yet
-                    prior_tap_frames.append((current_time, current_frame))
+            self.first_index = (self.first_index + 1) % self.capacity
+            self.frame_count -= 1
 
-                    while len(prior_tap_frames) > (SECONDS_BETWEEN_TAPS_HALVED * self.video_fps):
-                        del prior_tap_frames[0]
+            slot_index = int(self.slot_indexes[buffer_index])
 
-                    if self.is_led_over_trigger_level(current_frame, self.camera_profile, "tap"):
-                        tap_count += 1
-                        first_tap_seen = True
-                        tap_light_previous = True
-                else:
-                    # Add current frame
-                    after_tap_frames.append((current_time, current_frame))
+            if slot_index < 0:
+                slot_index = self.restore(buffer_index)
+                self.stored_frames[buffer_index] = None
 
-                    # Check if at end
-                    if tap_count == NUMBER_OF_TAPS_TO_END:
-                        time_from_last_tap_to_end = after_tap_frames[-1][VIDEO_TIME] - prior_tap_frames[-1][VIDEO_TIME]
+            yield self.times[buffer_index], slot_index
 
-                        if time_from_last_tap_to_end >= SECONDS_BETWEEN_TAPS_HALVED:
-                            reached_end_of_useful_data = True
-                        continue
+    def drop(self, number_of_frames):
+        # Frames that aren't in a slot don't need putting back just to be thrown away
+        for _ in range(min(number_of_frames, self.frame_count)):
+            buffer_index = self.first_index
 
-                    # Check to see if we have a low to high light change
-                    tap_light_currently_present = self.is_led_over_trigger_level(current_frame, self.camera_profile,
-                                                                                 "tap", show_preview=False)
+            self.first_index = (self.first_index + 1) % self.capacity
+            self.frame_count -= 1
 
-                    if tap_light_currently_present != tap_light_previous:
-                        if tap_light_currently_present:
-                            tap_light_activated = True
+            if self.slot_indexes[buffer_index] < 0:
+                self.stored_frames[buffer_index] = None
+            else:
+                self.frame_pool.release(int(self.slot_indexes[buffer_index]))
 
-                        tap_light_previous = tap_light_currently_present
+    def store_compactly(self, buffer_index):
+        slot_index = int(self.slot_indexes[buffer_index])
 
-                    # We're here if the tap light has JUST changed from off to on state
-                    if tap_light_activated:
-                        time_between_taps = after_tap_frames[-1][VIDEO_TIME] - prior_tap_frames[-1][VIDEO_TIME]
+        if slot_index < 0:
+            return
 
-                        # Write out all priors, would need to happen either way below
-                        self.write_frames(prior_tap_frames)
+        compressed_frame = None
 
-                        # If no one messed up, or did in the right direction
-                        if time_between_taps >= SECONDS_BETWEEN_TAPS:
-                            num_frames_to_half = int(SECONDS_BETWEEN_TAPS_HALVED * self.video_fps)
-                            self.write_frames(after_tap_frames[:num_frames_to_half])
-                            prior_tap_frames = after_tap_frames[-num_frames_to_half:]
-                        else:
-                            half_of_frames = len(after_tap_frames) // 2
-                            self.write_frames(after_tap_frames[:half_of_frames])
+        if self.storage == "jpeg":
+            compressed_frame = cv2.imencode(".jpg", self.frame_pool.frames[slot_index],
+                                            [cv2.IMWRITE_JPEG_QUALITY, BUFFER_JPEG_QUALITY])[1]
 
-                            # Figure out missing frames and write them out
-                            num_missing_frames = int((SECONDS_BETWEEN_TAPS - time_between_taps) * self.video_fps)
-                            self.write_frames([(-1, self.black_frame) for _ in range(num_missing_frames)])
+        self.stored_frames[buffer_index] = (compressed_frame, self.frame_pool.frame_sources[slot_index])
+        self.slot_indexes[buffer_index] = -1
 
-                            # Move remainder of frames to prior
-                            prior_tap_frames = after_tap_frames[half_of_frames:]
+        self.frame_pool.release(slot_index)
 
-                        after_tap_frames = []
-                        tap_count += 1
-                        tap_light_activated = False
+    def restore(self, buffer_index):
+        # Returns a new slot the caller owns. Frames only kept by where they came from have nothing to put in it.
+        compressed_frame, frame_source = self.stored_frames[buffer_index]
 
-        # Handle files that were too short (aka, bad files)
-        if not after_tap_frames or (tap_count != NUMBER_OF_TAPS_TO_END):
-            self.locked_print(
-                "########## Failed processing \"%s\"! Incorrect video length or taps not found! Deleting output! ##########" % self.video_input_path)
-            self.video_writer.release()
-            os.unlink(self.full_output_path)
-            return
+        slot_index = self.frame_pool.acquire()
+        self.frame_pool.frame_sources[slot_index] = frame_source
 
-        # If we're here, the video is over and we need to write out all priors and enough frames to make the
-        self.write_frames(prior_tap_frames)
+        if compressed_frame is not None:
+            self.frame_pool.frames[slot_index][:] = cv2.imdecode(compressed_frame, cv2.IMREAD_UNCHANGED)
 
-        time_from_last_tap_to_end = after_tap_frames[-1][VIDEO_TIME] - prior_tap_frames[-1][VIDEO_TIME]
+        return slot_index
 
-        # If no one messed up, or did in the right direction
-        if time_from_last_tap_to_end >= SECONDS_BETWEEN_TAPS_HALVED:
-            num_frames_to_half = int(SECONDS_BETWEEN_TAPS_HALVED * self.video_fps)
-            self.write_frames(after_tap_frames[:num_frames_to_half])
+    def grow(self):
+        # Only happens if the video timestamps don't line up with its fps, so the normal sizing was too small
+        new_capacity = self.capacity * 2
+
+        new_slot_indexes = np.zeros(new_capacity, dtype=np.int64)
+        new_times = np.zeros(new_capacity)
+        new_stored_frames = [None] * new_capacity
+
+        first_part_length = min(self.frame_count, self.capacity - self.first_index)
+        second_part_length = self.frame_count - first_part_length
+
+        new_slot_indexes[:first_part_length] = self.slot_indexes[self.first_index:self.first_index + first_part_length]
+        new_slot_indexes[first_part_length:self.frame_count] = self.slot_indexes[:second_part_length]
+        new_times[:first_part_length] = self.times[self.first_index:self.first_index + first_part_length]
+        new_times[first_part_length:self.frame_count] = self.times[:second_part_length]
+        new_stored_frames[:first_part_length] = self.stored_frames[self.first_index:self.first_index + first_part_length]
+        new_stored_frames[first_part_length:self.frame_count] = self.stored_frames[:second_part_length]
+
+        self.slot_indexes = new_slot_indexes
+        self.times = new_times
+        self.stored_frames = new_stored_frames
+        self.capacity = new_capacity
+        self.first_index = 0
+
+
+#####################################
+# FrameReader Class Definition
+#####################################
+class FrameReader(object):
+    # Decodes frames into pool slots, either when asked or ahead of time on a background thread. The first frame is
+    # read right away so the pool can be sized off of it.
+    def __init__(self, video_capture, buffered_frames, use_thread, memory_cap_bytes=None):
+        self.video_capture = video_capture  # type: cv2.VideoCapture
+        self.use_thread = use_thread
+
+        self.frame_queue = queue.Queue(maxsize=PIPELINE_QUEUE_FRAMES)
+        self.reader_thread = None  # type: threading.Thread
+        self.stop_requested = False
+        self.reader_error = None
+
+        self.next_frame_number = 0
+
+        self.decode_seconds = 0
+        self.wait_seconds = 0
+        self.decoded_frame_count = 0
+
+        self.frame_pool = None  # type: FramePool
+        self.first_frame = None
+
+        decode_start_time = time()
+        return_value, first_frame = self.video_capture.read()
+        self.decode_seconds += time() - decode_start_time
+
+        if return_value:
+            # Enough slots for the tap frame buffer, both stage queues, the frame each stage is working on, and the
+            # last written frame the writer may be holding onto for padding
+            self.frame_pool = FramePool(buffered_frames + (2 * PIPELINE_QUEUE_FRAMES) + 4, first_frame.shape,
+                                        first_frame.dtype, memory_cap_bytes)
+
+            slot_index = self.frame_pool.acquire()
+            self.frame_pool.frames[slot_index][:] = first_frame
+            self.frame_pool.frame_sources[slot_index] = (0, self.video_capture.get(cv2.CAP_PROP_POS_MSEC) / 1000)
+
+            self.first_frame = (True, 0, self.frame_pool.frame_sources[slot_index][1], slot_index)
+            self.next_frame_number = 1
+            self.decoded_frame_count = 1
+
+    def read(self):
+        # Returns (return_value, frame_number, frame_time, slot_index). The caller owns a reference to the slot.
+        if self.first_frame is not None:
+            first_frame = self.first_frame
+            self.first_frame = None
+            return first_frame
+
+        if self.frame_pool is None:
+            return False, self.next_frame_number, 0, None
+
+        wait_start_time = time()
+
+        if not self.use_thread:
+            next_frame = self.decode_next_frame()
         else:
-            self.write_frames(after_tap_frames)
+            if self.reader_thread is None:
+                self.stop_requested = False
+                self.reader_thread = threading.Thread(target=self.read_frames_in_background)
+                self.reader_thread.daemon = True
+                self.reader_thread.start()
 
-            # Figure out missing frames and write them out
-            num_missing_frames = int((SECONDS_BETWEEN_TAPS_HALVED - time_from_last_tap_to_end) * self.video_fps)
-            self.write_frames([(-1, self.black_frame) for _ in range(num_missing_frames)])
+            next_frame = self.frame_queue.get()
 
-        self.locked_print("Finished processing \"%s\" in %d seconds." % (self.video_input_path, (time() - start_time)))
+            if self.reader_error is not None:
+                raise self.reader_error
 
-    def write_frames(self, frames, print_writes=False):
-        start_time = None
-        end_time = None
+        self.wait_seconds += time() - wait_start_time
 
-        for frame in frames:
-            if start_time is None:
-                start_time = frame[VIDEO_TIME]
+        return next_frame
 
-            self.video_writer.write(frame[RAW_FRAME])
+    def decode_next_frame(self):
+        decode_start_time = time()
 
-            end_time = frame[VIDEO_TIME]
+        slot_index = self.frame_pool.acquire()
+        return_value, _ = self.video_capture.read(self.frame_pool.frames[slot_index])
+        frame_time = self.video_capture.get(cv2.CAP_PROP_POS_MSEC) / 1000
 
-        if print_writes:
-            self.locked_print("Wrote out %f to %f." % (start_time, end_time))
+        self.decode_seconds += time() - decode_start_time
 
-    def locked_print(self, string):
-        iso_datetime_string = datetime.now().strftime("%Y/%m/%d %H:%M:%S")
+        if not return_value:
+            self.frame_pool.release(slot_index)
+            return False, self.next_frame_number, 0, None
 
-        self.worker_lock.acquire()
+        self.frame_pool.frame_sources[slot_index] = (self.next_frame_number, frame_time)
 
-        print("%s || %s" % (iso_datetime_string, string))
-        self.log_file_writer.write("%s || %s\n" % (iso_datetime_string, string))
-        self.log_file_writer.flush()
+        self.next_frame_number += 1
+        self.decoded_frame_count += 1
 
-        self.worker_lock.release()
+        return True, self.next_frame_number - 1, frame_time, slot_index
 
-    @staticmethod
-    def is_led_over_trigger_level(frame, camera_profile, start_or_tap, show_preview=False):
-        frame_shape_y, frame_shape_x = frame.shape[:2]
+    def read_frames_in_background(self):
+        try:
+            while not self.stop_requested:
+                next_frame = self.decode_next_frame()
+                self.frame_queue.put(next_frame)
 
-        # Variables from profile
-        box_size = camera_profile["%s_light_box_size" % start_or_tap]
-        box_size_half = box_size / 2
+                if not next_frame[0]:
+                    break
+        except Exception as error:
+            self.reader_error = error
+            self.frame_queue.put((False, self.next_frame_number, 0, None))
 
-        x = int(camera_profile["%s_light_x_location_percentage" % start_or_tap] * frame_shape_x)
-        y = int(camera_profile["%s_light_y_location_percentage" % start_or_tap] * frame_shape_y)
+    def stop(self):
+        # Frames decoded ahead get thrown away, so next_frame_number is the next one that will be returned again
+        if self.first_frame is not None:
+            self.frame_pool.release(self.first_frame[3])
+            self.first_frame = None
 
-        x1 = int(x - box_size_half)
-        x2 = int(x + box_size_half)
-        y1 = int(y - box_size_half)
-        y2 = int(y + box_size_half)
+        if self.reader_thread is None:
+            return
 
-        red_threshold = camera_profile["%s_light_trigger_levels" % start_or_tap]["red"]
-        green_threshold = camera_profile["%s_light_trigger_levels" % start_or_tap]["green"]
-        blue_threshold = camera_profile["%s_light_trigger_levels" % start_or_tap]["blue"]
+        self.stop_requested = True
+        first_unread_frame_number = None
 
-        led_area_frame = frame[y1: y2, x1: x2]
+        while self.reader_thread.is_alive() or not self.frame_queue.empty():
+            try:
+                _, frame_number, _, slot_index = self.frame_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
 
-        average_color_per_row = np.average(led_area_frame, axis=0)
+            if slot_index is not None:
+                self.frame_pool.release(slot_index)
 
-        # This in in (B, G, R) format
-        average_color_overall = np.average(average_color_per_row, axis=0)
+                if first_unread_frame_number is None:
+                    first_unread_frame_number = frame_number
 
-        if show_preview:
-            cv2.imshow('frame', frame)
-            cv2.imshow('%s_led_frame' % start_or_tap, led_area_frame)
-            print("%s: %s" % (start_or_tap, average_color_overall))
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                exit()
+        self.reader_thread.join()
+        self.reader_thread = None
 
-        if blue_threshold:
-            if average_color_overall[0] < blue_threshold:
-                return False
+        if first_unread_frame_number is not None:
+            self.next_frame_number = first_unread_frame_number
 
-        if green_threshold:
-            if average_color_overall[1] < green_threshold:
-                return False
+    def seek(self, frame_number):
+        self.stop()
+        self.video_capture.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+        self.next_frame_number = frame_number
 
-        if red_threshold:
-            if average_color_overall[2] < red_threshold:
-                return False
+    def reopen(self, video_capture, frame_number):
+        # For when seeking isn't exact, the new capture gets grabbed forward from the start instead
+        self.stop()
+        self.video_capture = video_capture
 
-        return True
+        for _ in range(frame_number):
+            self.video_capture.grab()
+
+        self.next_frame_number = frame_number
 
 
 #####################################
-# SideviewVideoProcessor Class Definition
+# FrameWriter Class Definition
 #####################################
-class SideviewVideoProcessor(object):
-    def __init__(self, log_folder_path=None):
-        self.tk_root = tk.Tk()
-        self.tk_root.withdraw()
+class FrameWriter(object):
+    # Encodes frames when asked or on a background thread, releasing pool slots once they've been written. Without a
+    # video writer, it only plans the output, recording the input frame each output frame comes from, or None for black.
+    black_frames = {}  # Shared by every video a worker process handles, keyed by frame shape and dtype
+
+    def __init__(self, video_writer, frame_pool, use_thread, padding_content, proxy_writer=None):
+        self.video_writer = video_writer  # type: cv2.VideoWriter
+        self.frame_pool = frame_pool  # type: FramePool
+        self.use_thread = use_thread
+        self.padding_content = padding_content
+        self.proxy_writer = proxy_writer  # type: ProxyWriter
+
+        self.frame_queue = queue.Queue(maxsize=PIPELINE_QUEUE_FRAMES)
+        self.writer_thread = None  # type: threading.Thread
+        self.writer_error = None
+
+        self.last_slot_index = None
+        self.output_plan = [] if video_writer is None else None
+
+        # Runs of output frames that come from consecutive input frames, or are padding, for the output's timeline
+        self.output_runs = []
+        self.output_frame_count = 0
+
+        self.encode_seconds = 0
+        self.wait_seconds = 0
+        self.written_frame_count = 0
+        self.padding_frame_count = 0
+
+        if self.use_thread:
+            self.writer_thread = threading.Thread(target=self.write_frames_in_background)
+            self.writer_thread.daemon = True
+            self.writer_thread.start()
+
+    def write(self, frame, slot_index=None, repeat_count=1):
+        # Takes over the caller's reference to slot_index, if the frame came from the pool
+        wait_start_time = time()
+
+        if self.use_thread:
+            if self.writer_error is not None:
+                raise self.writer_error
+
+            self.frame_queue.put((frame, slot_index, repeat_count))
+        else:
+            self.encode(frame, slot_index, repeat_count)
 
-        self.top_folder_path = None
-        self.raw_folder_path = None
-        self.processed_folder_path = None
-        self.log_folder_path = log_folder_path
-        self.growout_name = None
+        self.wait_seconds += time() - wait_start_time
 
-        self.paths_of_videos_to_process = []
+    def write_padding(self, number_of_frames):
+        # The whole run goes through the queue as one entry, and the padding frame is picked once it's reached since
+        # the last frame may still be waiting to be written
+        if number_of_frames > 0:
+            self.write(None, None, number_of_frames)
 
-        self.worker_processes = {}
-        self.worker_lock = mp.Lock()
+    def encode(self, frame, slot_index, repeat_count):
+        encode_start_time = time()
 
-        self.done_processing = False
+        padding_content = None
 
-    def get_input_folder_path(self, top_folder_path=None):
-        if top_folder_path is None:
-            self.top_folder_path = filedialog.askdirectory(title="Select Single Growout Directory")
+        if frame is None:
+            frame = self.get_padding_frame()
+            self.padding_frame_count += repeat_count
+            source_slot_index = self.last_slot_index if self.padding_content == "last_frame" else None
+            padding_content = "black" if source_slot_index is None else "last_frame"
+            self.record_output_run(None, repeat_count)
         else:
-            self.top_folder_path = top_folder_path
+            self.written_frame_count += repeat_count
+            source_slot_index = slot_index
+            self.record_output_run(self.frame_pool.frame_sources[slot_index], repeat_count)
 
-        if self.top_folder_path == "":
-            print("Please enter a valid path and try again...")
-            exit(2)
+        if self.output_plan is not None:
+            self.output_plan.extend([None if source_slot_index is None else
+                                     self.frame_pool.frame_sources[source_slot_index]] * repeat_count)
+        else:
+            write_video_frame(self.video_writer, frame, repeat_count, padding_content)
 
-        self.raw_folder_path = "%s/%s/%s" % (self.top_folder_path, RAW_FOLDER_NAME, SIDEVIEW_FOLDER_NAME)
-        self.processed_folder_path = "%s/%s/%s" % (self.top_folder_path, PROCESSED_FOLDER_NAME, SIDEVIEW_FOLDER_NAME)
+            if self.proxy_writer is not None:
+                self.proxy_writer.write(frame, repeat_count)
 
-        if self.log_folder_path is None:
-            self.log_folder_path = "%s/%s/%s/%s" % (
-                self.top_folder_path, PROCESSED_FOLDER_NAME, SIDEVIEW_FOLDER_NAME, LOGS_FOLDER_NAME)
+        self.encode_seconds += time() - encode_start_time
 
-        if not os.path.exists(self.raw_folder_path):
-            print("Raw input path \"%s\" could not be found. Please ensure directory exists. Path is case sensitive." %
-                  self.raw_folder_path)
-            exit(2)
+        if slot_index is not None:
+            if self.padding_content == "last_frame":
+                # Held onto until the next frame is written, in case padding has to repeat it
+                if self.last_slot_index is not None:
+                    self.frame_pool.release(self.last_slot_index)
 
-        self.growout_name = os.path.split(self.top_folder_path)[-1]
+                self.last_slot_index = slot_index
+            else:
+                self.frame_pool.release(slot_index)
 
-        # Make output directory if doesn't exist
-        if not os.path.exists(self.processed_folder_path):
-            os.mkdir(self.processed_folder_path)
+    def plan_frames(self, frame_sources):
+        # Input frames that go straight to the output, planned without ever being decoded
+        self.output_plan.extend(frame_sources)
+        self.written_frame_count += len(frame_sources)
 
-        # Make logs directory if doesn't exist
-        if not os.path.exists(self.log_folder_path):
-            os.mkdir(self.log_folder_path)
+        for frame_source in frame_sources:
+            self.record_output_run(frame_source, 1)
 
-        print("Looking for video files in \"%s\"" % self.raw_folder_path)
+    def record_output_run(self, frame_source, frame_count):
+        # Frame source is the input frame number and time, or None for padding, even when it repeats the last frame
+        last_run = self.output_runs[-1] if self.output_runs else None
 
-    def find_video_paths(self):
-        for root, directories, files in os.walk(self.raw_folder_path):
-            for filename in files:
-                file_path = os.path.join(root, filename)
-                self.paths_of_videos_to_process.append(file_path)
+        if frame_source is None:
+            if last_run is not None and last_run[RUN_SOURCE_START] is None:
+                last_run[RUN_FRAME_COUNT] += frame_count
+            else:
+                self.output_runs.append([self.output_frame_count, frame_count, None, None, None])
+        elif last_run is not None and last_run[RUN_SOURCE_START] is not None and frame_count == 1 and \
+                frame_source[0] == last_run[RUN_SOURCE_START] + last_run[RUN_FRAME_COUNT]:
+            last_run[RUN_FRAME_COUNT] += 1
+            last_run[RUN_SOURCE_END_TIME] = frame_source[1]
+        else:
+            self.output_runs.append([self.output_frame_count, frame_count, frame_source[0], frame_source[1],
+                                     frame_source[1]])
 
-        print("Found %d files to process." % len(self.paths_of_videos_to_process))
+        self.output_frame_count += frame_count
 
-    def process_video_files(self):
-        # So we know when processing started
-        iso_datetime_string = datetime.now().strftime("%Y%m%dT%H%M%S")
-
-        while not self.done_processing:
-            # Find any processes that are finished, join back, then delete
-            to_delete = []
-            for process_path in self.worker_processes:
-                if not self.worker_processes[process_path].is_alive():
-                    self.worker_processes[process_path].join()
-                    to_delete.append(process_path)
-
-            for path in to_delete:
-                del self.worker_processes[path]
-
-            # Exit if we're done
-            if len(self.paths_of_videos_to_process) == 0 and len(self.worker_processes) == 0:
-                print("Finished processing all files. Exiting...")
-                self.done_processing = True
+    def get_padding_frame(self):
+        if self.padding_content == "last_frame" and self.last_slot_index is not None:
+            return self.frame_pool.frames[self.last_slot_index]
+
+        frame_shape = self.frame_pool.frames[0].shape
+        frame_dtype = self.frame_pool.frames[0].dtype
+
+        if (frame_shape, frame_dtype.str) not in FrameWriter.black_frames:
+            FrameWriter.black_frames[(frame_shape, frame_dtype.str)] = np.zeros(frame_shape, dtype=frame_dtype)
+
+        return FrameWriter.black_frames[(frame_shape, frame_dtype.str)]
+
+    def write_frames_in_background(self):
+        while True:
+            next_frame = self.frame_queue.get()
+
+            if next_frame is None:
                 break
 
-            # Add new processes to get back up to limit
-            number_of_new_processes_to_add = NUMBER_PROCESSES - len(self.worker_processes)
-            number_of_files_left_to_process = len(self.paths_of_videos_to_process)
-            number_to_add = min(number_of_new_processes_to_add, number_of_files_left_to_process)
+            # Keep draining after an error so the processing thread never blocks on a full queue
+            if self.writer_error is None:
+                try:
+                    self.encode(*next_frame)
+                except Exception as error:
+                    self.writer_error = error
 
-            # Only add as many as needed, or as many left
-            for _ in range(number_to_add):
-                input_path = self.paths_of_videos_to_process.pop()
-                new_process = mp.Process(target=SideviewWorker,
-                                         args=(self.growout_name, input_path, self.processed_folder_path,
-                                               self.log_folder_path, self.worker_lock, iso_datetime_string))
-                self.worker_processes[input_path] = new_process
-                new_process.start()
+    def close(self):
+        if self.writer_thread is not None:
+            self.frame_queue.put(None)
+            self.writer_thread.join()
+            self.writer_thread = None
 
-            sleep(0.25)
+        if self.last_slot_index is not None:
+            self.frame_pool.release(self.last_slot_index)
+            self.last_slot_index = None
 
+        if self.video_writer is not None:
+            self.video_writer.release()
 
-if __name__ == "__main__":
-    if TOP_LEVEL_TYPE == "one_growout":
-        print("Running in single growout mode!")
+        if self.proxy_writer is not None:
+            self.proxy_writer.release()
 
-        sideview_video_processor = SideviewVideoProcessor()
-        sideview_video_processor.get_input_folder_path()
-        sideview_video_processor.find_video_paths()
-        sideview_video_processor.process_video_files()
-    elif TOP_LEVEL_TYPE == "all_growouts":
-        print("Running in all growouts mode!")
+        if self.writer_error is not None:
+            raise self.writer_error
 
-        tk_root = tk.Tk()
-        tk_root.withdraw()
 
-        top_folder_path = filedialog.askdirectory(title="Select Directory of All Growouts")
+#####################################
+# Video Encoder Definitions
+#####################################
+def open_video_encoder(output_path, fourcc, video_fps, output_shape):
+    # Everything returned writes frames and is released like a cv2.VideoWriter
+    if OUTPUT_ENCODER == "ffmpeg":
+        return FfmpegPipeWriter(output_path, video_fps, output_shape,
+                                FFMPEG_OUTPUT_SETTINGS[os.path.splitext(output_path)[1].lower()])
+    elif OUTPUT_ENCODER == "raw":
+        return RawFrameWriter(output_path)
+    elif AVI_JPEG_WRITER and fourcc == cv2.VideoWriter_fourcc(*"MJPG"):
+        return MjpegAviEncoder(output_path, video_fps, output_shape)
+
+    return cv2.VideoWriter(output_path, fourcc, video_fps, output_shape)
+
+
+def get_black_frame_bytes(frame_shape):
+    # Encoded once per frame shape for every video a worker process handles
+    if frame_shape not in MjpegAviEncoder.black_frame_bytes:
+        MjpegAviEncoder.black_frame_bytes[frame_shape] = cv2.imencode(
+            ".jpg", np.zeros(frame_shape, dtype=np.uint8), [cv2.IMWRITE_JPEG_QUALITY, AVI_JPEG_QUALITY])[1].tobytes()
+
+    return MjpegAviEncoder.black_frame_bytes[frame_shape]
+
+
+class MjpegAviEncoder(object):
+    # Encodes frames to JPEG and writes them with MjpegAviWriter. Unlike cv2.VideoWriter, an encoded frame can be
+    # written again, so black padding is encoded once per frame shape and repeats of the last frame aren't encoded at all.
+    black_frame_bytes = {}
+
+    def __init__(self, output_path, video_fps, output_shape):
+        self.avi_writer = MjpegAviWriter(output_path, video_fps, output_shape)
+        self.last_frame_bytes = None
+
+    def isOpened(self):
+        return not self.avi_writer.output_file.closed
+
+    def write(self, frame, repeat_count=1, padding_content=None):
+        # Padding content says the frame is black, or the last frame written, so it doesn't need encoding
+        if padding_content == "black":
+            frame_bytes = get_black_frame_bytes(frame.shape)
+        elif padding_content == "last_frame" and self.last_frame_bytes is not None:
+            frame_bytes = self.last_frame_bytes
+        else:
+            frame_bytes = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, AVI_JPEG_QUALITY])[1].tobytes()
+            self.last_frame_bytes = frame_bytes
 
-        if top_folder_path == "":
-            print("Please enter a valid path and try again...")
-            exit(2)
+        for _ in range(repeat_count):
+            self.avi_writer.write(frame_bytes)
 
-        log_folder_path = "%s/%s" % (top_folder_path, LOGS_FOLDER_NAME)
+    def release(self):
+        if not self.avi_writer.output_file.closed:
+            self.avi_writer.close()
 
-        if not os.path.exists(log_folder_path):
-            os.mkdir(log_folder_path)
 
-        for directory in os.listdir(top_folder_path):
-            file_path = os.path.join(top_folder_path, directory)
+def write_video_frame(video_writer, frame, repeat_count=1, padding_content=None):
+    # Only MjpegAviEncoder can write an encoded frame again, every other writer encodes each copy
+    if isinstance(video_writer, MjpegAviEncoder):
+        video_writer.write(frame, repeat_count, padding_content)
+    else:
+        for _ in range(repeat_count):
+            video_writer.write(frame)
 
-            if (directory == LOGS_FOLDER_NAME) or os.path.isfile(file_path):
-                continue
 
-            sideview_video_processor = SideviewVideoProcessor(log_folder_path)
-            sideview_video_processor.get_input_folder_path(top_folder_path=file_path)
-            sideview_video_processor.find_video_paths()
-            sideview_video_processor.process_video_files()
+class FfmpegPipeWriter(object):
+    # Streams raw BGR frames into an ffmpeg process over its stdin. Its error output goes to a temporary file rather
+    # than a pipe, so it can't fill up and stall ffmpeg, and is only read if ffmpeg fails.
+    def __init__(self, output_path, video_fps, output_shape, output_settings):
+        self.output_path = output_path
+        self.output_shape = output_shape
+
+        video_fps = Fraction(video_fps).limit_denominator(AVI_MAXIMUM_FPS_DENOMINATOR)
+        threads = cv2.getNumThreads() if FFMPEG_THREADS == "auto" else FFMPEG_THREADS
+
+        command = [FFMPEG_PATH, "-hide_banner", "-loglevel", "error", "-y",
+                   "-f", "rawvideo", "-pix_fmt", "bgr24", "-s", "%dx%d" % output_shape,
+                   "-r", "%d/%d" % (video_fps.numerator, video_fps.denominator), "-i", "-",
+                   "-an", "-c:v", output_settings["codec"], "-threads", str(threads)]
+
+        if output_settings.get("crf") is not None:
+            command += ["-crf", str(output_settings["crf"])]
+
+        if output_settings.get("quality") is not None:
+            command += ["-q:v", str(output_settings["quality"])]
+
+        if output_settings.get("preset") is not None:
+            command += ["-preset", output_settings["preset"]]
+
+        if output_settings.get("pixel_format") is not None:
+            command += ["-pix_fmt", output_settings["pixel_format"]]
+
+        self.error_file = tempfile.TemporaryFile()
+
+        try:
+            self.ffmpeg_process = subprocess.Popen(command + [output_path], stdin=subprocess.PIPE,
+                                                   stdout=subprocess.DEVNULL, stderr=self.error_file)
+        except OSError as error:
+            self.error_file.close()
+            raise IOError("Couldn't start ffmpeg from \"%s\", check FFMPEG_PATH: %s" % (FFMPEG_PATH, error))
+
+    def isOpened(self):
+        return self.ffmpeg_process.poll() is None
+
+    def write(self, frame):
+        # OpenCV's writer drops frames of the wrong size, but here they'd throw off every frame after them
+        if (frame.shape[1], frame.shape[0]) != tuple(self.output_shape):
+            raise ValueError("Frame of shape %s doesn't match the %dx%d output." % (
+                str(frame.shape), self.output_shape[0], self.output_shape[1]))
+
+        try:
+            self.ffmpeg_process.stdin.write(np.ascontiguousarray(frame).data)
+        except (BrokenPipeError, OSError):
+            self.ffmpeg_process.wait()
+            raise IOError("ffmpeg stopped while encoding \"%s\": %s" % (self.output_path, self.get_error_output()))
+
+    def release(self):
+        if self.ffmpeg_process.stdin.closed:
+            return
+
+        try:
+            self.ffmpeg_process.stdin.close()
+        except (BrokenPipeError, OSError):
+            pass
+
+        return_code = self.ffmpeg_process.wait()
+        error_output = self.get_error_output()
+        self.error_file.close()
+
+        if return_code != 0:
+            raise IOError("ffmpeg failed encoding \"%s\" with code %d: %s" % (self.output_path, return_code,
+                                                                                error_output))
+
+    def get_error_output(self):
+        self.error_file.seek(0)
+
+        return self.error_file.read().decode("utf-8", "replace").strip()
+
+
+class RawFrameWriter(object):
+    # Writes each frame's bytes straight to the output, so tests can compare outputs frame for frame with no encoding
+    def __init__(self, output_path):
+        self.output_file = open(output_path, "wb")
+
+    def isOpened(self):
+        return not self.output_file.closed
+
+    def write(self, frame):
+        self.output_file.write(np.ascontiguousarray(frame).data)
+
+    def release(self):
+        self.output_file.close()
+
+
+class ProxyWriter(object):
+    # Writes each output frame shrunk to PROXY_SIZE. Compressed frames copied from the input are decoded straight to the
+    # smallest fraction of their size that still covers the proxy, and only once when they're written again for padding.
+    def __init__(self, proxy_path, video_fps, output_shape):
+        self.video_writer = cv2.VideoWriter(proxy_path, cv2.VideoWriter_fourcc(*PROXY_FOURCC), video_fps, PROXY_SIZE)
+        self.reduced_decode_flag = cv2.IMREAD_COLOR
+
+        for reduction, reduced_flag in ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4),
+                                        (2, cv2.IMREAD_REDUCED_COLOR_2)):
+            if output_shape[0] // reduction >= PROXY_SIZE[0] and output_shape[1] // reduction >= PROXY_SIZE[1]:
+                self.reduced_decode_flag = reduced_flag
+                break
+
+        self.last_frame_bytes = None
+        self.last_proxy_frame = None
+        self.released = False
+
+        self.frame_count = 0
+        self.write_seconds = 0
+
+    def write(self, frame, repeat_count=1):
+        write_start_time = time()
+
+        # Shrunk the same way the playback tool shrinks full size outputs, which is several times quicker than INTER_AREA
+        proxy_frame = cv2.resize(frame, PROXY_SIZE)
+
+        for _ in range(repeat_count):
+            self.video_writer.write(proxy_frame)
+
+        self.frame_count += repeat_count
+        self.write_seconds += time() - write_start_time
+
+    def write_packet(self, frame_bytes):
+        # Repeated frames come through as the same bytes object
+        write_start_time = time()
+
+        if frame_bytes is not self.last_frame_bytes:
+            frame = cv2.imdecode(np.frombuffer(frame_bytes, dtype=np.uint8), self.reduced_decode_flag)
+            self.last_proxy_frame = cv2.resize(frame, PROXY_SIZE)
+            self.last_frame_bytes = frame_bytes
+
+        self.video_writer.write(self.last_proxy_frame)
+
+        self.frame_count += 1
+        self.write_seconds += time() - write_start_time
+
+    def release(self):
+        # Called again when a failed video's pipeline is shut down
+        if not self.released:
+            self.video_writer.release()
+            self.released = True
+
+
+#####################################
+# LedDetector Class Definition
+#####################################
+class LedDetector(object):
+    # Channel order of the frames coming out of OpenCV
+    CHANNEL_INDEXES = {"blue": 0, "green": 1, "red": 2}
+
+    def __init__(self, camera_profile, frame_shape):
+        frame_shape_y, frame_shape_x = frame_shape[:2]
+
+        self.led_regions = {}
+        self.led_minimum_sums = {}
+
+        for start_or_tap in ("start", "tap"):
+            box_size = camera_profile["%s_light_box_size" % start_or_tap]
+            box_size_half = box_size / 2
+
+            x = int(camera_profile["%s_light_x_location_percentage" % start_or_tap] * frame_shape_x)
+            y = int(camera_profile["%s_light_y_location_percentage" % start_or_tap] * frame_shape_y)
+
+            y_slice = slice(int(y - box_size_half), int(y + box_size_half))
+            x_slice = slice(int(x - box_size_half), int(x + box_size_half))
+
+            pixel_count = len(range(*y_slice.indices(frame_shape_y))) * len(range(*x_slice.indices(frame_shape_x)))
+
+            # Compare channel sums against threshold * pixel count so no averaging is needed per frame
+            minimum_sums = []
+            for color, threshold in camera_profile["%s_light_trigger_levels" % start_or_tap].items():
+                if threshold:
+                    minimum_sums.append((self.CHANNEL_INDEXES[color], threshold * pixel_count))
+
+            self.led_regions[start_or_tap] = (y_slice, x_slice)
+            self.led_minimum_sums[start_or_tap] = minimum_sums
+
+        self.detection_seconds = 0
+
+    def is_led_on(self, frame, start_or_tap):
+        detection_start_time = time()
+
+        channel_sums = cv2.sumElems(frame[self.led_regions[start_or_tap]])
+        led_on = True
+
+        for channel_index, minimum_sum in self.led_minimum_sums[start_or_tap]:
+            if channel_sums[channel_index] < minimum_sum:
+                led_on = False
+                break
+
+        self.detection_seconds += time() - detection_start_time
+
+        return led_on
+
+    def get_led_states(self, frame):
+        return self.is_led_on(frame, "start"), self.is_led_on(frame, "tap")
+
+    def get_led_regions_outside_frame(self, frame_shape):
+        # Regions are clipped to the frame when summed, so one hanging off the edge would only see part of its led
+        frame_shape_y, frame_shape_x = frame_shape[:2]
+
+        return [start_or_tap for start_or_tap in ("start", "tap")
+                if self.led_regions[start_or_tap][0].start < 0 or self.led_regions[start_or_tap][1].start < 0 or
+                self.led_regions[start_or_tap][0].stop > frame_shape_y or
+                self.led_regions[start_or_tap][1].stop > frame_shape_x]
+
+
+#####################################
+# Log File Definitions
+#####################################
+def get_log_file_path(log_folder_path, growout_name, iso_datetime_string):
+    return "%s/%s_%s_log.txt" % (log_folder_path, growout_name, iso_datetime_string)
+
+
+def write_log_line(log_file_path, log_line):
+    print(log_line)
+
+    with open(log_file_path, "a+") as log_file_writer:
+        log_file_writer.write(log_line + "\n")
+
+
+class WorkerLog(object):
+    # Log lines for a growout's log file. Worker processes send them to the scheduler over the result queue, and only it
+    # prints them and writes the file, so workers never wait on each other to log. Without a queue, like when a worker
+    # is run on its own, they're printed and written straight away.
+    def __init__(self, log_file_path, result_queue=None):
+        self.log_file_path = log_file_path
+        self.result_queue = result_queue  # type: mp.Queue
+
+    def write(self, string):
+        log_line = "%s || %s" % (datetime.now().strftime("%Y/%m/%d %H:%M:%S"), string)
+
+        if self.result_queue is not None:
+            self.result_queue.put((WORKER_MESSAGE_LOG, self.log_file_path, log_line))
+        else:
+            write_log_line(self.log_file_path, log_line)
+
+
+#####################################
+# SideviewWorker Class Definition
+#####################################
+class SideviewWorker(object):
+    def __init__(self, growout_name, video_input_path, video_output_path, log_folder_path, result_queue,
+                 iso_datetime_string, segment_processes=1):
+        self.growout_name = growout_name
+        self.video_input_path = video_input_path
+        self.video_output_path = video_output_path
+        self.log_folder_path = log_folder_path
+        self.iso_datetime_string = iso_datetime_string
+        self.worker_log = WorkerLog(get_log_file_path(log_folder_path, growout_name, iso_datetime_string), result_queue)
+
+        self.input_filename = os.path.split(self.video_input_path)[1]
+
+        self.output_filename = get_output_filename(self.input_filename)
+        self.full_output_path = None
+        self.partial_output_path = None
+        self.full_proxy_path = None
+        self.partial_proxy_path = None
+
+        if self.input_filename.endswith(".mp4"):
+            self.fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+        elif self.input_filename.endswith(".avi"):
+            self.fourcc = cv2.VideoWriter_fourcc(*'MJPG')
+
+        self.camera_profile = None
+        self.video_reader = None  # type: cv2.VideoCapture
+        self.video_writer = None  # type: cv2.VideoWriter
+        self.proxy_writer = None  # type: ProxyWriter
+
+        self.video_fps = None
+        self.frame_shape = None
+        self.frame_pool = None  # type: FramePool
+        self.frame_reader = None  # type: FrameReader
+        self.frame_writer = None  # type: FrameWriter
+        self.frame_buffer = None  # type: FrameRingBuffer
+        self.led_detector = None  # type: LedDetector
+
+        self.current_frame_number = -1
+        self.current_frame_time = 0
+
+        self.start_light_time = 0
+        self.tap_light_time = 0
+
+        # Input frame number and time of the start light and each tap, for the output's timeline
+        self.start_light_frame_number = None
+        self.tap_sources = []
+
+        self.packet_reader = None  # type: cv2.VideoCapture
+        self.skip_decoding_enabled = False
+        self.led_check_stride = 1
+        self.replay_until_frame_number = -1
+        self.video_ended_while_skipping = False
+
+        # Output split into this many segments that get encoded at once, or copied from the input without encoding,
+        # after planning it. Avi only, like skipping. There's nothing to split up when copying.
+        self.stream_copy = STREAM_COPY_FRAMES and self.input_filename.endswith(".avi")
+        self.segment_processes = segment_processes \
+            if self.input_filename.endswith(".avi") and not self.stream_copy and OUTPUT_ENCODER == "opencv" else 1
+        self.planned_output_seconds = 0
+
+        # Reported back to the scheduler for the processing manifest and metrics
+        self.result_status = STATUS_ERROR
+        self.failure_reason = None
+        self.output_checksum = None
+        self.metrics = None
+
+        self.skip_seconds = 0
+        self.cut_frame_count = 0
+
+        self.do_work()
+
+    def do_work(self):
+        self.setup_video_reader_writer()
+
+        try:
+            self.process_video()
+        finally:
+            # Pipeline threads have to be shut down even if processing failed part way through
+            if self.frame_reader is not None:
+                self.frame_reader.stop()
+
+            if self.frame_writer is not None:
+                self.frame_writer.close()
+
+            if self.frame_pool is not None:
+                self.frame_pool.close()
+
+            if self.result_status != STATUS_SUCCEEDED and os.path.exists(self.partial_output_path):
+                os.unlink(self.partial_output_path)
+
+            if self.proxy_writer is not None:
+                self.proxy_writer.release()
+
+            if self.partial_proxy_path is not None and os.path.exists(self.partial_proxy_path):
+                os.unlink(self.partial_proxy_path)
+
+    def setup_video_reader_writer(self):
+        self.camera_profile = get_camera_profile(self.input_filename, self.log_folder_path, self.growout_name)
+
+        self.video_reader = self.open_video_capture(self.video_input_path)
+        self.video_fps = self.video_reader.get(cv2.CAP_PROP_FPS)
+
+        output_shape = (
+            int(self.video_reader.get(cv2.CAP_PROP_FRAME_WIDTH)), int(self.video_reader.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+
+        self.full_output_path = os.path.join(self.video_output_path, self.output_filename)
+        self.partial_output_path = os.path.join(self.video_output_path, PARTIAL_OUTPUT_PREFIX + self.output_filename)
+
+        # Only renamed to the real output name once it's complete, so a killed run never leaves a truncated output. When
+        # encoding in segments or copying, there's no writer until the output is planned.
+        if self.segment_processes <= 1 and not self.stream_copy:
+            self.video_writer = open_video_encoder(self.partial_output_path, self.fourcc, self.video_fps, output_shape)
+
+        # Written alongside the output from the same frames. When encoding in segments or copying, it's written from
+        # the planned frames instead.
+        if WRITE_PROXIES:
+            self.full_proxy_path = get_proxy_path(self.full_output_path)
+            self.partial_proxy_path = get_proxy_path(self.partial_output_path)
+
+            os.makedirs(os.path.dirname(self.full_proxy_path), exist_ok=True)
+
+            self.proxy_writer = ProxyWriter(self.partial_proxy_path, self.video_fps, output_shape)
+
+        self.skip_decoding_enabled = \
+            (SKIP_DECODING_UNUSED_FRAMES or SEEK_FOR_START_LIGHT) and self.input_filename.endswith(".avi")
+        self.led_check_stride = max(1, int(MINIMUM_LED_FLASH_SECONDS * self.video_fps))
+
+    def setup_frame_pipeline(self):
+        # The reader decodes the first frame right away, so the frame pool, buffer and led detector can be sized off it
+        buffered_frames = \
+            (SECONDS_BETWEEN_TAPS + SECONDS_BETWEEN_TAPS_HALVED) * self.video_fps + FRAME_BUFFER_SLACK_FRAMES
+
+        # A planned output only needs to know where each buffered frame came from
+        buffer_storage = "reference" if self.video_writer is None else BUFFER_STORAGE
+
+        # Buffered frames don't hold onto pool slots unless they're stored raw
+        self.frame_reader = FrameReader(self.video_reader, buffered_frames if buffer_storage == "raw" else 0,
+                                        PIPELINE_THREADS, BUFFER_MEMORY_CAP_BYTES)
+        self.frame_pool = self.frame_reader.frame_pool
+        self.frame_writer = FrameWriter(self.video_writer, self.frame_pool, PIPELINE_THREADS and self.video_writer is not None,
+                                        PADDING_CONTENT, self.proxy_writer if self.video_writer is not None else None)
+
+        if self.frame_pool is not None:
+            first_frame = self.frame_pool.frames[0]
+
+            self.frame_buffer = FrameRingBuffer(buffered_frames, self.frame_pool, buffer_storage)
+            self.led_detector = LedDetector(self.camera_profile, first_frame.shape)
+            self.frame_shape = first_frame.shape
+
+    def process_video(self):
+        self.worker_log.write("Started processing \"%s\"." % self.video_input_path)
+
+        self.setup_frame_pipeline()
+
+        tap_count = 0
+
+        # The ring buffer holds the prior tap frames followed by the after tap frames, oldest first
+        after_tap_frame_count = 0
+        after_tap_head_written = False
+        last_tap_time = 0
+
+        # Oldest after tap frames that were already written by a peek, so dropping them isn't a cut
+        written_after_tap_frame_count = 0
+
+        num_frames_to_half = int(SECONDS_BETWEEN_TAPS_HALVED * self.video_fps)
+
+        first_tap_seen = False
+        tap_wait_start_frame_number = None
+
+        tap_light_previous = False
+        tap_light_activated = False
+
+        reached_end_of_useful_data = False
+
+        start_time = time()
+
+        while True:
+            # Each frame read comes with a reference to its pool slot, that has to be written, buffered or released
+            return_value, frame_number, current_time, slot_index = self.read_frame()
+
+            if not return_value or reached_end_of_useful_data:
+                if return_value:
+                    self.frame_pool.release(slot_index)
+                break
+
+            # Frames skipped over while waiting on a late tap are cut just like ones dropped from the buffer
+            if first_tap_seen:
+                self.cut_frame_count += frame_number - self.current_frame_number - 1
+
+            current_frame = self.frame_pool.frames[slot_index]
+
+            self.current_frame_number = frame_number
+            self.current_frame_time = current_time
+
+            # We're at very beginning, look for start light
+            if self.start_light_time == 0:
+                if self.led_detector.is_led_on(current_frame, "start"):
+                    self.start_light_time = current_time
+                    self.start_light_frame_number = frame_number
+                    self.write_frames([(current_time, slot_index)], print_writes=False)
+                else:
+                    self.frame_pool.release(slot_index)
+
+                    if SEEK_FOR_START_LIGHT and self.can_skip_decoding():
+                        skip_start_time = time()
+                        self.locate_start_light()
+                        self.skip_seconds += time() - skip_start_time
+            elif (current_time - self.start_light_time) < CORRECT_START_TO_FIRST_TAP_LENGTH:
+                self.write_frames([(current_time, slot_index)], print_writes=False)
+
+                if self.frame_writer.output_plan is not None and self.can_skip_decoding():
+                    skip_start_time = time()
+                    self.plan_frames_before_tap_search()
+                    self.skip_seconds += time() - skip_start_time
+            else:
+                # Need way so that tap found only resets when value goes back UNDER the tap threshold
+                self.frame_buffer.commit(current_time, slot_index)
+
+                # If first tap not found
+                # Look for tap and If tap found, save time and begin a local counter, add to AFTER BUFFER
+                # Otherwise, add current frame to prior buffer and clean up
+                if not first_tap_seen:
+                    if tap_wait_start_frame_number is None:
+                        tap_wait_start_frame_number = frame_number
+
+                    # Building up prior buffer if we haven't found first tap yet
+                    while len(self.frame_buffer) > (SECONDS_BETWEEN_TAPS_HALVED * self.video_fps):
+                        self.frame_buffer.drop(1)
+
+                    if self.led_detector.is_led_on(current_frame, "tap"):
+                        # Everything waited through that's no longer in the prior buffer, whether dropped or skipped
+                        self.cut_frame_count += frame_number - tap_wait_start_frame_number + 1 - len(self.frame_buffer)
+
+                        tap_count += 1
+                        self.tap_sources.append((frame_number, current_time))
+                        first_tap_seen = True
+                        tap_light_previous = True
+                        last_tap_time = current_time
+                    elif SKIP_DECODING_UNUSED_FRAMES and self.can_skip_decoding():
+                        skip_start_time = time()
+                        self.skip_to_led_turning_on("tap", False)
+                        self.skip_seconds += time() - skip_start_time
+                else:
+                    # Current frame was added as an after frame
+                    after_tap_frame_count += 1
+
+                    # Check if at end
+                    if tap_count == NUMBER_OF_TAPS_TO_END:
+                        time_from_last_tap_to_end = current_time - last_tap_time
+
+                        if time_from_last_tap_to_end >= SECONDS_BETWEEN_TAPS_HALVED:
+                            reached_end_of_useful_data = True
+                        continue
+
+                    # Once a full tap spacing has passed the next tap can't need padding, so the priors and the first
+                    # half of the after frames can go out now and only the newest half needs to stay buffered
+                    if not after_tap_head_written and after_tap_frame_count >= num_frames_to_half and \
+                            (current_time - last_tap_time) >= SECONDS_BETWEEN_TAPS:
+                        self.write_frames(self.frame_buffer.pop(len(self.frame_buffer) - after_tap_frame_count))
+                        self.write_frames(self.frame_buffer.peek(num_frames_to_half))
+                        after_tap_head_written = True
+                        written_after_tap_frame_count = num_frames_to_half
+
+                    if after_tap_head_written:
+                        while after_tap_frame_count > num_frames_to_half:
+                            self.frame_buffer.drop(1)
+                            after_tap_frame_count -= 1
+
+                            if written_after_tap_frame_count:
+                                written_after_tap_frame_count -= 1
+                            else:
+                                self.cut_frame_count += 1
+
+                    # Check to see if we have a low to high light change
+                    tap_light_currently_present = self.led_detector.is_led_on(current_frame, "tap")
+
+                    if tap_light_currently_present != tap_light_previous:
+                        if tap_light_currently_present:
+                            tap_light_activated = True
+
+                        tap_light_previous = tap_light_currently_present
+
+                    # We're here if the tap light has JUST changed from off to on state
+                    if tap_light_activated:
+                        time_between_taps = current_time - last_tap_time
+
+                        if not after_tap_head_written:
+                            # Write out all priors, would need to happen either way below
+                            self.write_frames(self.frame_buffer.pop(len(self.frame_buffer) - after_tap_frame_count))
+
+                            # If no one messed up, or did in the right direction
+                            if time_between_taps >= SECONDS_BETWEEN_TAPS:
+                                self.write_frames(self.frame_buffer.peek(num_frames_to_half))
+                                self.frame_buffer.drop(max(0, after_tap_frame_count - num_frames_to_half))
+                                self.cut_frame_count += max(0, after_tap_frame_count - (2 * num_frames_to_half))
+                            else:
+                                half_of_frames = after_tap_frame_count // 2
+                                self.write_frames(self.frame_buffer.pop(half_of_frames))
+
+                                # Figure out missing frames and write them out
+                                num_missing_frames = int((SECONDS_BETWEEN_TAPS - time_between_taps) * self.video_fps)
+                                self.write_padding_frames(num_missing_frames)
+
+                        # Remainder of frames in the buffer are now the priors
+                        after_tap_frame_count = 0
+                        after_tap_head_written = False
+                        written_after_tap_frame_count = 0
+                        last_tap_time = current_time
+                        tap_count += 1
+                        self.tap_sources.append((frame_number, current_time))
+                        tap_light_activated = False
+                    elif after_tap_head_written and SKIP_DECODING_UNUSED_FRAMES and self.can_skip_decoding():
+                        # Operator is late, so everything up until shortly before the next tap gets thrown away
+                        skip_start_time = time()
+                        tap_light_previous = self.skip_to_led_turning_on("tap", tap_light_previous)
+                        self.skip_seconds += time() - skip_start_time
+
+        # Handle files that were too short (aka, bad files)
+        if not after_tap_frame_count or (tap_count != NUMBER_OF_TAPS_TO_END):
+            self.worker_log.write(
+                "########## Failed processing \"%s\"! Incorrect video length or taps not found! Deleting output! ##########" % self.video_input_path)
+            self.result_status = STATUS_BAD_VIDEO
+            self.failure_reason = "Incorrect video length or taps not found"
+
+            self.frame_writer.close()
+
+            if os.path.exists(self.partial_output_path):
+                os.unlink(self.partial_output_path)
+
+            self.collect_metrics(time() - start_time)
+            return
+
+        # If we're here, the video is over and we need to write out all priors and enough frames to make the
+        self.write_frames(self.frame_buffer.pop(len(self.frame_buffer) - after_tap_frame_count))
+
+        time_from_last_tap_to_end = self.frame_buffer.time_at(-1) - last_tap_time
+
+        # If no one messed up, or did in the right direction
+        if time_from_last_tap_to_end >= SECONDS_BETWEEN_TAPS_HALVED:
+            self.write_frames(self.frame_buffer.peek(num_frames_to_half))
+        else:
+            self.write_frames(self.frame_buffer.pop(after_tap_frame_count))
+
+            # Figure out missing frames and write them out
+            num_missing_frames = int((SECONDS_BETWEEN_TAPS_HALVED - time_from_last_tap_to_end) * self.video_fps)
+            self.write_padding_frames(num_missing_frames)
+
+        self.frame_writer.close()
+
+        if self.stream_copy:
+            self.copy_planned_frames()
+        elif self.frame_writer.output_plan is not None:
+            self.encode_planned_segments()
+
+        self.output_checksum = get_file_checksum(self.partial_output_path)
+        os.replace(self.partial_output_path, self.full_output_path)
+
+        if self.proxy_writer is not None:
+            self.proxy_writer.release()
+
+            # A proxy that's missing frames would play back out of step with its output, so it's left out instead
+            output_frame_count = self.frame_writer.written_frame_count + self.frame_writer.padding_frame_count
+
+            if self.proxy_writer.frame_count == output_frame_count:
+                os.replace(self.partial_proxy_path, self.full_proxy_path)
+            else:
+                self.worker_log.write("Proxy for \"%s\" has %d of %d frames. Not keeping it!" % (
+                    self.video_input_path, self.proxy_writer.frame_count, output_frame_count))
+                os.unlink(self.partial_proxy_path)
+
+        if WRITE_TIMELINES:
+            self.write_timeline()
+
+        self.result_status = STATUS_SUCCEEDED
+
+        self.collect_metrics(time() - start_time)
+
+        self.worker_log.write("Finished processing \"%s\" in %d seconds." % (self.video_input_path,
+                                                                         self.metrics["wall_seconds"]))
+        self.worker_log.write("Stage times for \"%s\": decode %.1f s, led detection %.1f s, skipping %.1f s, buffering %.1f s, "
+                          "encode %.1f s." % (self.video_input_path, self.metrics["decode_seconds"],
+                                              self.metrics["led_detection_seconds"], self.metrics["skip_seconds"],
+                                              self.metrics["buffering_seconds"], self.metrics["encode_seconds"]))
+
+    def build_timeline(self):
+        # Output frame ranges are end exclusive. Cuts include frames dropped while waiting on a late first tap, which
+        # aren't counted in the metrics' cut_frames.
+        segments = []
+        edits = []
+        source_end = None
+
+        for output_run in self.frame_writer.output_runs:
+            output_start = output_run[RUN_OUTPUT_START]
+            output_end = output_start + output_run[RUN_FRAME_COUNT]
+
+            if output_run[RUN_SOURCE_START] is None:
+                segments.append({"output_start_frame": output_start, "output_end_frame": output_end,
+                                 "source_start_frame": None, "source_end_frame": None,
+                                 "source_start_seconds": None, "source_end_seconds": None})
+                edits.append({"type": "padding", "output_frame": output_start, "frames": output_run[RUN_FRAME_COUNT]})
+                continue
+
+            if source_end is not None and output_run[RUN_SOURCE_START] > source_end:
+                edits.append({"type": "cut", "output_frame": output_start,
+                              "frames": output_run[RUN_SOURCE_START] - source_end})
+
+            source_end = output_run[RUN_SOURCE_START] + output_run[RUN_FRAME_COUNT]
+
+            segments.append({"output_start_frame": output_start, "output_end_frame": output_end,
+                             "source_start_frame": output_run[RUN_SOURCE_START], "source_end_frame": source_end,
+                             "source_start_seconds": output_run[RUN_SOURCE_START_TIME],
+                             "source_end_seconds": output_run[RUN_SOURCE_END_TIME]})
+
+        taps = []
+
+        for tap_index, (tap_frame_number, tap_time) in enumerate(self.tap_sources):
+            output_frame = None
+
+            for segment in segments:
+                if segment["source_start_frame"] is not None and \
+                        segment["source_start_frame"] <= tap_frame_number < segment["source_end_frame"]:
+                    output_frame = segment["output_start_frame"] + tap_frame_number - segment["source_start_frame"]
+                    break
+
+            taps.append({"tap": tap_index + 1, "source_frame": tap_frame_number, "source_seconds": tap_time,
+                         "output_frame": output_frame,
+                         "output_seconds": None if output_frame is None else output_frame / self.video_fps,
+                         "gap_seconds": tap_time - self.tap_sources[tap_index - 1][1] if tap_index else None})
+
+        return {
+            "video": self.input_filename,
+            "output": self.output_filename,
+            "fps": self.video_fps,
+            "output_frames": self.frame_writer.output_frame_count,
+            "padding_content": PADDING_CONTENT,
+            "start_light_frame": self.start_light_frame_number,
+            "start_light_seconds": self.start_light_time,
+            "taps": taps,
+            "segments": segments,
+            "edits": edits,
+            "padding_frames": sum(edit["frames"] for edit in edits if edit["type"] == "padding"),
+            "cut_frames": sum(edit["frames"] for edit in edits if edit["type"] == "cut")
+        }
+
+    def write_timeline(self):
+        timeline_path = os.path.join(self.video_output_path,
+                                     os.path.splitext(self.output_filename)[0] + TIMELINE_FILENAME_APPEND)
+
+        with open(timeline_path + ".tmp", "w") as timeline_file:
+            json.dump(self.build_timeline(), timeline_file, separators=(",", ":"))
+
+        os.replace(timeline_path + ".tmp", timeline_path)
+
+    def collect_metrics(self, wall_seconds):
+        # Decode and encode run alongside the processing thread, so buffering is what's left of its time after waiting
+        # on them, led detection, and skipping. Skipping includes its own led checks, so it's clamped at zero.
+        input_frame_count = self.current_frame_number + 1
+        processing_seconds = wall_seconds - self.frame_reader.wait_seconds - self.frame_writer.wait_seconds
+
+        self.metrics = {
+            "wall_seconds": wall_seconds,
+            "decode_seconds": self.frame_reader.decode_seconds,
+            "led_detection_seconds": self.led_detector.detection_seconds if self.led_detector else 0,
+            "skip_seconds": self.skip_seconds,
+            "buffering_seconds": max(0, processing_seconds - self.skip_seconds -
+                                     (self.led_detector.detection_seconds if self.led_detector else 0)),
+            "encode_seconds": self.frame_writer.encode_seconds + self.planned_output_seconds,
+            "reader_wait_seconds": self.frame_reader.wait_seconds,
+            "writer_wait_seconds": self.frame_writer.wait_seconds,
+            "input_frames": input_frame_count,
+            "decoded_frames": self.frame_reader.decoded_frame_count,
+            "written_frames": self.frame_writer.written_frame_count,
+            "padding_frames": self.frame_writer.padding_frame_count,
+            "cut_frames": self.cut_frame_count,
+            "peak_buffered_frames": self.frame_buffer.peak_frame_count if self.frame_buffer is not None else 0,
+            "segment_processes": self.segment_processes,
+            "stream_copy": self.stream_copy,
+            "output_encoder": "stream_copy" if self.stream_copy else OUTPUT_ENCODER,
+            "proxy_seconds": self.proxy_writer.write_seconds if self.proxy_writer else 0,
+            "input_frames_per_second": input_frame_count / wall_seconds if wall_seconds else 0
+        }
+
+    def plan_frames_before_tap_search(self):
+        # Frames before the first tap search are written without being looked at, so when only planning, the packet
+        # reader walks over them for their timestamps and they're planned without being decoded. The main reader then
+        # picks up with the first frame the tap search needs.
+        if not self.move_packet_reader_to_frame(self.current_frame_number + 1, self.current_frame_time):
+            return
+
+        planned_frame_sources = []
+
+        while True:
+            if not self.packet_reader.grab():
+                # Too short either way, so the video has failed
+                self.video_ended_while_skipping = True
+                break
+
+            frame_time = self.packet_reader.get(cv2.CAP_PROP_POS_MSEC) / 1000
+
+            if (frame_time - self.start_light_time) >= CORRECT_START_TO_FIRST_TAP_LENGTH:
+                break
+
+            planned_frame_sources.append((self.current_frame_number + len(planned_frame_sources) + 1, frame_time))
+
+        if not planned_frame_sources:
+            return
+
+        self.frame_writer.plan_frames(planned_frame_sources)
+        self.current_frame_number, self.current_frame_time = planned_frame_sources[-1]
+
+        if not self.video_ended_while_skipping:
+            self.seek_to_frame(self.current_frame_number + 1, self.current_frame_time, "tap")
+
+    def encode_planned_segments(self):
+        # Each segment process decodes the input frames its part of the plan needs and encodes them on its own. MJPG
+        # frames don't depend on each other, so joining the segments' frames gives the same output as one writer.
+        segment_start_time = time()
+
+        output_plan = self.frame_writer.output_plan
+        segment_length = -(-len(output_plan) // self.segment_processes)
+
+        partial_output_base_path, extension = os.path.splitext(self.partial_output_path)
+        output_shape = (self.frame_shape[1], self.frame_shape[0])
+
+        segment_arguments = []
+
+        for segment_index, segment_start in enumerate(range(0, len(output_plan), segment_length)):
+            segment_path = partial_output_base_path + (SEGMENT_FILENAME_APPEND % segment_index) + extension
+            segment_arguments.append((self.video_input_path, segment_path, self.fourcc, self.video_fps, output_shape,
+                                      self.frame_shape, output_plan[segment_start:segment_start + segment_length]))
+
+        segment_pool = mp.Pool(len(segment_arguments))
+
+        try:
+            segment_results = segment_pool.map_async(encode_output_segment, segment_arguments)
+
+            # The proxy gets written here while the segments encode
+            if self.proxy_writer is not None:
+                for frame_bytes in read_planned_packets(self.video_input_path, self.video_fps, self.frame_shape,
+                                                        output_plan):
+                    self.proxy_writer.write_packet(frame_bytes)
+
+            segment_results.get()
+            join_mjpeg_segments([arguments[1] for arguments in segment_arguments], self.partial_output_path,
+                                self.video_fps, output_shape)
+        finally:
+            segment_pool.close()
+            segment_pool.join()
+
+            for arguments in segment_arguments:
+                if os.path.exists(arguments[1]):
+                    os.unlink(arguments[1])
+
+        self.planned_output_seconds = time() - segment_start_time
+
+        self.worker_log.write("Encoded \"%s\" in %d segments in %d seconds." % (self.video_input_path, len(segment_arguments),
+                                                                          self.planned_output_seconds))
+
+    def copy_planned_frames(self):
+        copy_start_time = time()
+
+        avi_writer = MjpegAviWriter(self.partial_output_path, self.video_fps, (self.frame_shape[1], self.frame_shape[0]))
+
+        try:
+            for frame_bytes in read_planned_packets(self.video_input_path, self.video_fps, self.frame_shape,
+                                                    self.frame_writer.output_plan):
+                avi_writer.write(frame_bytes)
+
+                if self.proxy_writer is not None:
+                    self.proxy_writer.write_packet(frame_bytes)
+        finally:
+            avi_writer.close()
+
+        self.planned_output_seconds = time() - copy_start_time
+
+    def can_skip_decoding(self):
+        # Frames being replayed after a skip have to go through the normal loop until past the frame that ended the skip
+        return self.skip_decoding_enabled and self.current_frame_number > self.replay_until_frame_number
+
+    def locate_start_light(self):
+        # Probes every stride frames by seeking the raw packet reader, decoding only the probed frames. The main reader
+        # then seeks to right after the last unlit probe, and the normal loop finds the exact start light frame.
+        first_frame_number = self.current_frame_number + 1
+
+        if not self.open_packet_reader():
+            return
+
+        # Probing starts from the frame the main loop is on
+        previous_probe_frame_number = self.current_frame_number
+        previous_probe_time = self.current_frame_time
+        last_read_frame_time = previous_probe_time
+
+        probe_frame_number = first_frame_number + self.led_check_stride - 1
+
+        while True:
+            self.packet_reader.set(cv2.CAP_PROP_POS_FRAMES, probe_frame_number)
+
+            if not self.packet_reader.grab():
+                break
+
+            probe_time = self.packet_reader.get(cv2.CAP_PROP_POS_MSEC) / 1000
+            expected_probe_time = last_read_frame_time + (probe_frame_number - first_frame_number + 1) / self.video_fps
+
+            if abs(probe_time - expected_probe_time) >= (0.5 / self.video_fps):
+                self.disable_skip_decoding("Seeking raw packets was not frame accurate")
+                return
+
+            _, packet = self.packet_reader.retrieve()
+            probe_frame = cv2.imdecode(packet, cv2.IMREAD_COLOR)
+
+            if probe_frame is None or probe_frame.shape != self.frame_shape:
+                self.disable_skip_decoding("Compressed frames could not be decoded on their own")
+                return
+
+            if self.led_detector.is_led_on(probe_frame, "start"):
+                self.replay_until_frame_number = probe_frame_number
+
+                if previous_probe_frame_number >= first_frame_number:
+                    self.seek_to_frame(previous_probe_frame_number + 1, previous_probe_time, "start")
+                return
+
+            previous_probe_frame_number = probe_frame_number
+            previous_probe_time = probe_time
+
+            probe_frame_number += self.led_check_stride
+
+        # A start light in the last few unprobed frames would leave no room for taps, so the video has failed
+        self.video_ended_while_skipping = True
+
+    def skip_to_led_turning_on(self, start_or_tap, led_previously_on):
+        # Walks ahead over the compressed frames with a raw packet reader, so nothing gets decoded except every stride
+        # frames to check the led. Once it turns on, the main reader seeks to far enough before it that the normal loop
+        # sees the exact frame it turned on at and all the priors it needs. The main reader doesn't move otherwise.
+        # Returns whether the led was on in the frame right before the one the main reader will return next.
+        first_frame_number = self.current_frame_number + 1
+        frame_times = [self.current_frame_time]  # Starts at the frame before the first
+
+        if not self.move_packet_reader_to_frame(first_frame_number, frame_times[0]):
+            return led_previously_on
+
+        frame_number = first_frame_number - 1
+        last_off_frame_number = frame_number
+        led_on_before_first_frame = led_previously_on
+
+        while self.packet_reader.grab():
+            frame_number += 1
+            frame_times.append(self.packet_reader.get(cv2.CAP_PROP_POS_MSEC) / 1000)
+
+            if (frame_number - first_frame_number + 1) % self.led_check_stride:
+                continue
+
+            _, packet = self.packet_reader.retrieve()
+            current_frame = cv2.imdecode(packet, cv2.IMREAD_COLOR)
+
+            if current_frame is None or current_frame.shape != self.frame_shape:
+                self.disable_skip_decoding("Compressed frames could not be decoded on their own")
+                return led_on_before_first_frame
+
+            led_currently_on = self.led_detector.is_led_on(current_frame, start_or_tap)
+
+            if led_currently_on and not led_previously_on:
+                num_frames_to_half = int(SECONDS_BETWEEN_TAPS_HALVED * self.video_fps)
+                rewind_frame_number = max(first_frame_number, last_off_frame_number - num_frames_to_half)
+
+                self.replay_until_frame_number = frame_number
+
+                if rewind_frame_number == first_frame_number:
+                    return led_on_before_first_frame
+
+                return self.seek_to_frame(rewind_frame_number, frame_times[rewind_frame_number - first_frame_number],
+                                          start_or_tap)
+
+            if not led_currently_on:
+                last_off_frame_number = frame_number
+
+            led_previously_on = led_currently_on
+
+        # A tap in the last few unchecked frames would still leave too few taps or after frames, so the video has failed
+        self.video_ended_while_skipping = True
+        return led_previously_on
+
+    def open_packet_reader(self):
+        # Second reader on the same file that hands back compressed frames, so moving through it doesn't decode
+        if self.packet_reader is None:
+            self.packet_reader = self.open_video_capture(self.video_input_path)
+
+            if not self.packet_reader.set(cv2.CAP_PROP_FORMAT, -1):
+                self.disable_skip_decoding("Raw packet reading is not supported")
+                return False
+
+        return True
+
+    def move_packet_reader_to_frame(self, frame_number, expected_previous_frame_time):
+        # Leaves the packet reader so the next grab returns frame_number, checking the seek against the main reader
+        if not self.open_packet_reader():
+            return False
+
+        self.packet_reader.set(cv2.CAP_PROP_POS_FRAMES, frame_number - 1)
+
+        previous_frame_time = self.packet_reader.get(cv2.CAP_PROP_POS_MSEC) / 1000 if self.packet_reader.grab() else -1
+
+        if abs(previous_frame_time - expected_previous_frame_time) >= (0.5 / self.video_fps):
+            self.disable_skip_decoding("Seeking raw packets was not frame accurate")
+            return False
+
+        return True
+
+    def disable_skip_decoding(self, reason):
+        self.worker_log.write("%s in \"%s\". Decoding all frames from here on." % (reason, self.video_input_path))
+        self.skip_decoding_enabled = False
+
+    def seek_to_frame(self, frame_number, expected_previous_frame_time, start_or_tap):
+        # Leaves the reader so the next read returns frame_number, and returns whether the led was on in the frame before
+        # it. That frame gets decoded to check the seek was exact, falling back to re-opening the video and grabbing
+        # forward if it wasn't.
+        self.frame_reader.seek(frame_number - 1)
+        return_value, _, previous_frame_time, slot_index = self.frame_reader.read()
+
+        if return_value and abs(previous_frame_time - expected_previous_frame_time) >= (0.5 / self.video_fps):
+            self.frame_pool.release(slot_index)
+            return_value = False
+
+            self.disable_skip_decoding("Seeking was not frame accurate")
+
+            # The reader thread has already started decoding ahead on the old capture
+            self.frame_reader.stop()
+            self.video_reader.release()
+            self.video_reader = self.open_video_capture(self.video_input_path)
+
+            self.frame_reader.reopen(self.video_reader, frame_number - 1)
+            return_value, _, _, slot_index = self.frame_reader.read()
+
+        if not return_value:
+            return False
+
+        led_on = self.led_detector.is_led_on(self.frame_pool.frames[slot_index], start_or_tap)
+        self.frame_pool.release(slot_index)
+
+        return led_on
+
+    def read_frame(self):
+        if self.video_ended_while_skipping:
+            return False, self.current_frame_number + 1, 0, None
+
+        return self.frame_reader.read()
+
+    def write_frames(self, frames, print_writes=False):
+        start_time = None
+        end_time = None
+
+        for frame in frames:
+            if start_time is None:
+                start_time = frame[VIDEO_TIME]
+
+            self.frame_writer.write(self.frame_pool.frames[frame[FRAME_SLOT_INDEX]], frame[FRAME_SLOT_INDEX])
+
+            end_time = frame[VIDEO_TIME]
+
+        if print_writes:
+            self.worker_log.write("Wrote out %f to %f." % (start_time, end_time))
+
+    def write_padding_frames(self, number_of_frames):
+        self.frame_writer.write_padding(number_of_frames)
+
+    @staticmethod
+    def open_video_capture(video_path):
+        # Keeps FFmpeg's decoder threads in line with the OpenCV thread count set for this process, where supported
+        if hasattr(cv2, "CAP_PROP_N_THREADS"):
+            return cv2.VideoCapture(video_path, cv2.CAP_ANY, [cv2.CAP_PROP_N_THREADS, cv2.getNumThreads()])
+
+        return cv2.VideoCapture(video_path)
+
+    @staticmethod
+    def is_led_over_trigger_level(frame, camera_profile, start_or_tap, show_preview=False):
+        frame_shape_y, frame_shape_x = frame.shape[:2]
+
+        # Variables from profile
+        box_size = camera_profile["%s_light_box_size" % start_or_tap]
+        box_size_half = box_size / 2
+
+        x = int(camera_profile["%s_light_x_location_percentage" % start_or_tap] * frame_shape_x)
+        y = int(camera_profile["%s_light_y_location_percentage" % start_or_tap] * frame_shape_y)
+
+        x1 = int(x - box_size_half)
+        x2 = int(x + box_size_half)
+        y1 = int(y - box_size_half)
+        y2 = int(y + box_size_half)
+
+        red_threshold = camera_profile["%s_light_trigger_levels" % start_or_tap]["red"]
+        green_threshold = camera_profile["%s_light_trigger_levels" % start_or_tap]["green"]
+        blue_threshold = camera_profile["%s_light_trigger_levels" % start_or_tap]["blue"]
+
+        led_area_frame = frame[y1: y2, x1: x2]
+
+        average_color_per_row = np.average(led_area_frame, axis=0)
+
+        # This in in (B, G, R) format
+        average_color_overall = np.average(average_color_per_row, axis=0)
+
+        if show_preview:
+            cv2.imshow('frame', frame)
+            cv2.imshow('%s_led_frame' % start_or_tap, led_area_frame)
+            print("%s: %s" % (start_or_tap, average_color_overall))
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                exit()
+
+        if blue_threshold:
+            if average_color_overall[0] < blue_threshold:
+                return False
+
+        if green_threshold:
+            if average_color_overall[1] < green_threshold:
+                return False
+
+        if red_threshold:
+            if average_color_overall[2] < red_threshold:
+                return False
+
+        return True
+
+
+#####################################
+# MjpegAviWriter Class Definition
+#####################################
+class MjpegAviWriter(object):
+    # Writes already compressed MJPG frames to an avi, so frames encoded somewhere else can be joined without encoding
+    # them again. Frames go in RIFF chunks of up to AVI_RIFF_MAXIMUM_BYTES, each with its own OpenDML index that the
+    # header's super index points to. The first chunk also gets an old style index for players that only read that far.
+    HEADER_BYTES = 12 + 12 + (8 + 56) + 12 + (8 + 56) + (8 + 40) + (8 + 24 + (16 * AVI_SUPER_INDEX_ENTRIES)) + 12 + \
+        (8 + 248)
+
+    def __init__(self, output_path, video_fps, output_shape):
+        self.output_file = open(output_path, "wb")
+        self.video_fps = Fraction(video_fps).limit_denominator(AVI_MAXIMUM_FPS_DENOMINATOR)
+        self.output_shape = output_shape
+
+        self.frame_count = 0
+        self.first_riff_frame_count = 0
+        self.largest_frame_bytes = 0
+
+        # Where the RIFF chunk being written and its movi list start, and each of its frames' data offset and size
+        self.riff_start = 0
+        self.movi_start = 0
+        self.riff_frames = []
+        self.first_riff_index_entries = []
+
+        # Offset, size and frame count of each finished RIFF chunk's index
+        self.super_index_entries = []
+
+        # The header is filled in at the end, once the frame counts are known
+        self.output_file.write(b"\0" * self.HEADER_BYTES)
+        self.start_riff()
+
+    def write(self, frame_bytes):
+        chunk_bytes = 8 + len(frame_bytes) + (len(frame_bytes) % 2)
+
+        # Leaves room for the chunk's index entries, and the old style index in the first chunk
+        if self.riff_frames and (self.output_file.tell() - self.riff_start + chunk_bytes +
+                                 (len(self.riff_frames) + 1) * 24 + 64) > AVI_RIFF_MAXIMUM_BYTES:
+            self.end_riff()
+            self.start_riff()
+
+        chunk_start = self.output_file.tell()
+
+        self.output_file.write(b"00dc" + struct.pack("<I", len(frame_bytes)) + frame_bytes)
+
+        if len(frame_bytes) % 2:
+            self.output_file.write(b"\0")
+
+        self.riff_frames.append((chunk_start + 8, len(frame_bytes)))
+
+        if not self.super_index_entries:
+            self.first_riff_index_entries.append((chunk_start - (self.movi_start + 8), len(frame_bytes)))
+
+        self.frame_count += 1
+        self.largest_frame_bytes = max(self.largest_frame_bytes, len(frame_bytes))
+
+    def start_riff(self):
+        if self.super_index_entries:
+            self.riff_start = self.output_file.tell()
+            self.output_file.write(b"RIFF\0\0\0\0AVIX")
+
+        self.movi_start = self.output_file.tell()
+        self.output_file.write(b"LIST\0\0\0\0movi")
+
+        self.riff_frames = []
+
+    def end_riff(self):
+        # The chunk's index goes at the end of its movi list, with offsets to the frame data from the start of the RIFF
+        index_start = self.output_file.tell()
+
+        self.output_file.write(b"ix00" + struct.pack("<IHBBI4sQI", 24 + (8 * len(self.riff_frames)), 2, 0, 1,
+                                                     len(self.riff_frames), b"00dc", self.riff_start, 0))
+
+        for data_start, frame_bytes in self.riff_frames:
+            self.output_file.write(struct.pack("<II", data_start - self.riff_start, frame_bytes))
+
+        self.super_index_entries.append((index_start, self.output_file.tell() - index_start, len(self.riff_frames)))
+
+        self.patch_size(self.movi_start)
+
+        if len(self.super_index_entries) == 1:
+            self.first_riff_frame_count = len(self.riff_frames)
+
+            self.output_file.write(b"idx1" + struct.pack("<I", 16 * len(self.first_riff_index_entries)))
+
+            for chunk_offset, frame_bytes in self.first_riff_index_entries:
+                self.output_file.write(b"00dc" + struct.pack("<III", 0x10, chunk_offset, frame_bytes))
+
+        self.patch_size(self.riff_start)
+
+    def patch_size(self, chunk_start):
+        chunk_end = self.output_file.tell()
+
+        self.output_file.seek(chunk_start + 4)
+        self.output_file.write(struct.pack("<I", chunk_end - chunk_start - 8))
+        self.output_file.seek(chunk_end)
+
+    def close(self):
+        self.end_riff()
+
+        width, height = self.output_shape
+        super_index = b"".join(struct.pack("<QII", *entry) for entry in self.super_index_entries)
+
+        # avih, then strh, strf and the super index in the stream list, then the OpenDML total frame count
+        header_lists = [
+            b"avih" + struct.pack("<I14I", 56, int(round(1000000 / self.video_fps)),
+                                  int(self.largest_frame_bytes * self.video_fps), 0, 0x10 | 0x100,
+                                  self.first_riff_frame_count, 0, 1, self.largest_frame_bytes, width, height, 0, 0, 0,
+                                  0),
+            b"LIST" + struct.pack("<I", 4 + (8 + 56) + (8 + 40) + (8 + 24 + (16 * AVI_SUPER_INDEX_ENTRIES))) + b"strl" +
+            b"strh" + struct.pack("<I4s4sIHHIIIIIIIIhhhh", 56, b"vids", b"MJPG", 0, 0, 0, 0,
+                                  self.video_fps.denominator, self.video_fps.numerator, 0, self.frame_count,
+                                  self.largest_frame_bytes, 0xFFFFFFFF, 0, 0, 0, width, height) +
+            b"strf" + struct.pack("<IIiiHH4sIiiII", 40, 40, width, height, 1, 24, b"MJPG", width * height * 3, 0, 0, 0,
+                                  0) +
+            b"indx" + struct.pack("<IHBBI4sIII", 24 + (16 * AVI_SUPER_INDEX_ENTRIES), 4, 0, 0,
+                                  len(self.super_index_entries), b"00dc", 0, 0, 0) +
+            super_index + b"\0" * (16 * (AVI_SUPER_INDEX_ENTRIES - len(self.super_index_entries))),
+            b"LIST" + struct.pack("<I", 4 + 8 + 248) + b"odml" + b"dmlh" + struct.pack("<II", 248, self.frame_count) +
+            b"\0" * 244
+        ]
+
+        header_list = b"hdrl" + b"".join(header_lists)
+
+        self.output_file.seek(12)
+        self.output_file.write(b"LIST" + struct.pack("<I", len(header_list)) + header_list)
+
+        self.output_file.seek(0)
+        self.output_file.write(b"RIFF")
+        self.output_file.seek(8)
+        self.output_file.write(b"AVI ")
+
+        self.output_file.close()
+
+
+#####################################
+# SideviewAnalyzer Class Definition
+#####################################
+class SideviewAnalyzer(object):
+    # Finds the start light and tap times the same way SideviewWorker.process_video does, without buffering or writing
+    # any frames, and predicts the padding and cuts processing would make. Avi inputs are walked as compressed frames,
+    # only decoding every led check stride frames, plus the frames just before an led turns on to find the exact frame.
+    # Other inputs have every frame decoded by grab() whether it's looked at or not, so they're only checked for the leds
+    # without anything being buffered or encoded.
+    def __init__(self, growout_name, video_input_path, log_folder_path, result_queue, iso_datetime_string):
+        self.growout_name = growout_name
+        self.video_input_path = video_input_path
+        self.iso_datetime_string = iso_datetime_string
+        self.worker_log = WorkerLog(get_log_file_path(log_folder_path, growout_name, iso_datetime_string), result_queue)
+
+        self.input_filename = os.path.split(self.video_input_path)[1]
+        self.camera_profile = get_camera_profile(self.input_filename, log_folder_path, self.growout_name)
+
+        self.video_reader = None  # type: cv2.VideoCapture
+        self.video_fps = None
+        self.led_detector = None  # type: LedDetector
+
+        self.raw_packets = False
+        self.led_check_stride = 1
+
+        self.timing_report = None
+
+        self.analyze_video()
+
+    def analyze_video(self):
+        self.video_reader = SideviewWorker.open_video_capture(self.video_input_path)
+        self.video_fps = self.video_reader.get(cv2.CAP_PROP_FPS)
+
+        if self.input_filename.endswith(".avi") and self.video_reader.set(cv2.CAP_PROP_FORMAT, -1):
+            self.raw_packets = True
+            self.led_check_stride = max(1, int(MINIMUM_LED_FLASH_SECONDS * self.video_fps))
+
+        start_light_time = None
+        tap_times = []
+        tap_light_previous = False
+
+        last_frame_time = 0
+        recent_frames = []  # Frames since the last led check, so the exact frame an led turned on at can be found
+
+        frame_number = -1
+
+        while self.video_reader.grab():
+            frame_number += 1
+            frame_time = self.video_reader.get(cv2.CAP_PROP_POS_MSEC) / 1000
+            last_frame_time = frame_time
+
+            # Compressed frames are copied, since the reader reuses their buffer
+            _, frame = self.video_reader.retrieve()
+            recent_frames.append((frame_time, frame.copy() if self.raw_packets else frame))
+
+            if (frame_number + 1) % self.led_check_stride:
+                continue
+
+            frame = self.decode_frame(frame)
+
+            if frame is None:
+                break
+
+            if start_light_time is None:
+                if self.led_detector.is_led_on(frame, "start"):
+                    start_light_time = self.find_led_turning_on(recent_frames, "start", 0)
+            elif (frame_time - start_light_time) >= CORRECT_START_TO_FIRST_TAP_LENGTH:
+                if len(tap_times) == NUMBER_OF_TAPS_TO_END:
+                    # Same point processing stops reading at
+                    if (frame_time - tap_times[-1]) >= SECONDS_BETWEEN_TAPS_HALVED:
+                        break
+                    continue
+
+                tap_light_currently_present = self.led_detector.is_led_on(frame, "tap")
+
+                # The first tap only needs the led to be on, later ones need it to go from off to on
+                if tap_light_currently_present and (not tap_times or not tap_light_previous):
+                    tap_times.append(self.find_led_turning_on(
+                        recent_frames, "tap", start_light_time + CORRECT_START_TO_FIRST_TAP_LENGTH))
+
+                tap_light_previous = tap_light_currently_present
+
+            recent_frames = []
+
+        video_frame_count = self.video_reader.get(cv2.CAP_PROP_FRAME_COUNT)
+        self.video_reader.release()
+
+        self.timing_report = self.build_timing_report(start_light_time, tap_times, last_frame_time, video_frame_count)
+
+        self.worker_log.write("Analyzed \"%s\": %s." % (
+            self.video_input_path, self.timing_report["failure_reason"] or "%d padding frames, %d cut frames" % (
+                self.timing_report["total_padding_frames"], self.timing_report["total_cut_frames"])))
+
+    def decode_frame(self, frame):
+        if not self.raw_packets:
+            decoded_frame = frame
+        else:
+            decoded_frame = cv2.imdecode(frame, cv2.IMREAD_COLOR)
+
+        if decoded_frame is not None and self.led_detector is None:
+            self.led_detector = LedDetector(self.camera_profile, decoded_frame.shape)
+
+        return decoded_frame
+
+    def find_led_turning_on(self, recent_frames, start_or_tap, earliest_time):
+        # The led was off at the last check and on at this one, so it turned on at one of the frames in between. The
+        # last recent frame is the one that was just checked, so there's always a lit frame to fall back on.
+        for frame_time, frame in recent_frames[:-1]:
+            if frame_time < earliest_time:
+                continue
+
+            frame = self.decode_frame(frame)
+
+            if frame is not None and self.led_detector.is_led_on(frame, start_or_tap):
+                return frame_time
+
+        return recent_frames[-1][0]
+
+    def build_timing_report(self, start_light_time, tap_times, last_frame_time, video_frame_count):
+        failure_reason = None
+
+        if start_light_time is None:
+            failure_reason = "Start light not found"
+        elif len(tap_times) != NUMBER_OF_TAPS_TO_END:
+            failure_reason = "Found %d of %d taps" % (len(tap_times), NUMBER_OF_TAPS_TO_END)
+
+        gap_seconds = [tap_times[tap_index] - tap_times[tap_index - 1] for tap_index in range(1, len(tap_times))]
+
+        # Same padding math as processing. Cuts are the after tap frames that don't fit in the tap spacing.
+        gap_adjustment_frames = []
+
+        for gap in gap_seconds:
+            if gap >= SECONDS_BETWEEN_TAPS:
+                gap_adjustment_frames.append(-int(round((gap - SECONDS_BETWEEN_TAPS) * self.video_fps)))
+            else:
+                gap_adjustment_frames.append(int((SECONDS_BETWEEN_TAPS - gap) * self.video_fps))
+
+        end_padding_frames = 0
+        first_tap_delay = None
+        first_tap_cut_frames = 0
+        predicted_output_seconds = None
+
+        if tap_times:
+            time_from_last_tap_to_end = last_frame_time - tap_times[-1]
+
+            if time_from_last_tap_to_end < SECONDS_BETWEEN_TAPS_HALVED:
+                end_padding_frames = int((SECONDS_BETWEEN_TAPS_HALVED - time_from_last_tap_to_end) * self.video_fps)
+
+            first_tap_delay = tap_times[0] - start_light_time - CORRECT_START_TO_FIRST_TAP_LENGTH
+
+            # A late first tap only keeps the prior buffer's worth of frames leading up to it, tap frame included
+            first_tap_cut_frames = max(0, int(round(first_tap_delay * self.video_fps)) + 1 -
+                                       int(SECONDS_BETWEEN_TAPS_HALVED * self.video_fps))
+
+        if failure_reason is None:
+            predicted_output_seconds = CORRECT_START_TO_FIRST_TAP_LENGTH + \
+                min(first_tap_delay, SECONDS_BETWEEN_TAPS_HALVED) + \
+                ((NUMBER_OF_TAPS_TO_END - 1) * SECONDS_BETWEEN_TAPS) + SECONDS_BETWEEN_TAPS_HALVED
+
+        return {
+            "video": self.input_filename,
+            "status": STATUS_BAD_VIDEO if failure_reason else STATUS_SUCCEEDED,
+            "failure_reason": failure_reason,
+            "fps": self.video_fps,
+            "video_seconds": video_frame_count / self.video_fps if self.video_fps else 0,
+            "start_light_seconds": start_light_time,
+            "first_tap_delay_seconds": first_tap_delay,
+            "tap_seconds": tap_times,
+            "gap_seconds": gap_seconds,
+            "first_tap_cut_frames": first_tap_cut_frames,
+            "gap_adjustment_frames": gap_adjustment_frames,
+            "end_padding_frames": end_padding_frames,
+            "total_padding_frames": sum(frames for frames in gap_adjustment_frames if frames > 0) + end_padding_frames,
+            "total_cut_frames": first_tap_cut_frames - sum(frames for frames in gap_adjustment_frames if frames < 0),
+            "predicted_output_seconds": predicted_output_seconds
+        }
+
+
+#####################################
+# SideviewVideoProcessor Class Definition
+#####################################
+class SideviewVideoProcessor(object):
+    def __init__(self, log_folder_path=None):
+        self.tk_root = None
+
+        self.top_folder_path = None
+        self.raw_folder_path = None
+        self.processed_folder_path = None
+        self.log_folder_path = log_folder_path
+        self.growout_name = None
+
+        self.paths_of_videos_to_process = []
+
+    def get_input_folder_path(self, top_folder_path=None):
+        if top_folder_path is None:
+            # Tk is only needed for the folder dialog, so a given path works without a display
+            self.tk_root = tk.Tk()
+            self.tk_root.withdraw()
+
+            self.top_folder_path = filedialog.askdirectory(title="Select Single Growout Directory")
+        else:
+            self.top_folder_path = top_folder_path
+
+        if self.top_folder_path == "":
+            print("Please enter a valid path and try again...")
+            exit(2)
+
+        self.raw_folder_path = "%s/%s/%s" % (self.top_folder_path, RAW_FOLDER_NAME, SIDEVIEW_FOLDER_NAME)
+        self.processed_folder_path = "%s/%s/%s" % (self.top_folder_path, PROCESSED_FOLDER_NAME, SIDEVIEW_FOLDER_NAME)
+
+        if self.log_folder_path is None:
+            self.log_folder_path = "%s/%s/%s/%s" % (
+                self.top_folder_path, PROCESSED_FOLDER_NAME, SIDEVIEW_FOLDER_NAME, LOGS_FOLDER_NAME)
+
+        if not os.path.exists(self.raw_folder_path):
+            print("Raw input path \"%s\" could not be found. Please ensure directory exists. Path is case sensitive." %
+                  self.raw_folder_path)
+            exit(2)
+
+        self.growout_name = os.path.split(self.top_folder_path)[-1]
+
+        # Make output directory if doesn't exist
+        if not os.path.exists(self.processed_folder_path):
+            os.mkdir(self.processed_folder_path)
+
+        # Make logs directory if doesn't exist
+        if not os.path.exists(self.log_folder_path):
+            os.mkdir(self.log_folder_path)
+
+        print("Looking for video files in \"%s\"" % self.raw_folder_path)
+
+    def find_video_paths(self):
+        for root, directories, files in os.walk(self.raw_folder_path):
+            for filename in files:
+                file_path = os.path.join(root, filename)
+                self.paths_of_videos_to_process.append(file_path)
+
+        print("Found %d files to process." % len(self.paths_of_videos_to_process))
+
+    def process_video_files(self):
+        # Processes only this growout's videos
+        sideview_scheduler = SideviewScheduler()
+        sideview_scheduler.add_growout(self)
+        sideview_scheduler.process_video_files()
+
+
+#####################################
+# Output File Definitions
+#####################################
+def get_output_filename(input_filename):
+    split_filename = input_filename.split(".")
+    split_filename[0] += OUTPUT_FILENAME_APPEND
+
+    return ".".join(split_filename)
+
+
+def get_proxy_path(output_path):
+    output_folder_path, output_filename = os.path.split(output_path)
+
+    return os.path.join(output_folder_path, PROXY_FOLDER_NAME, os.path.splitext(output_filename)[0] + PROXY_EXTENSION)
+
+
+def remove_output_files(output_path):
+    # The output and everything written alongside it, which no longer match an input that changed or failed, along with
+    # partial outputs and segments left behind by a worker that was killed
+    output_folder_path, output_filename = os.path.split(output_path)
+    output_base_filename, extension = os.path.splitext(output_filename)
+
+    partial_output_path = os.path.join(output_folder_path, PARTIAL_OUTPUT_PREFIX + output_filename)
+    timeline_path = os.path.join(output_folder_path, output_base_filename + TIMELINE_FILENAME_APPEND)
+
+    stale_paths = [output_path, partial_output_path, timeline_path, timeline_path + ".tmp",
+                   get_proxy_path(output_path), get_proxy_path(partial_output_path)]
+
+    if os.path.isdir(output_folder_path):
+        segment_prefix = PARTIAL_OUTPUT_PREFIX + output_base_filename + SEGMENT_FILENAME_APPEND.split("%")[0]
+
+        stale_paths += [os.path.join(output_folder_path, filename) for filename in os.listdir(output_folder_path)
+                        if filename.startswith(segment_prefix) and filename.endswith(extension)]
+
+    for stale_path in stale_paths:
+        if os.path.exists(stale_path):
+            os.unlink(stale_path)
+
+
+def get_file_checksum(file_path):
+    file_hash = hashlib.sha1()
+
+    with open(file_path, "rb") as checksum_file:
+        for chunk in iter(lambda: checksum_file.read(CHECKSUM_CHUNK_BYTES), b""):
+            file_hash.update(chunk)
+
+    return file_hash.hexdigest()
+
+
+def is_existing_output_complete(output_path):
+    # Only reads the header, so outputs left by a killed run show up short or unreadable without decoding anything
+    video_reader = cv2.VideoCapture(output_path)
+
+    video_fps = video_reader.get(cv2.CAP_PROP_FPS)
+    frame_count = video_reader.get(cv2.CAP_PROP_FRAME_COUNT)
+
+    video_reader.release()
+
+    if not video_fps or frame_count <= 0:
+        return False
+
+    # The priors before the first tap aren't counted, since they overlap the start if the first tap was on time
+    minimum_seconds = CORRECT_START_TO_FIRST_TAP_LENGTH + ((NUMBER_OF_TAPS_TO_END - 1) * SECONDS_BETWEEN_TAPS) + \
+        SECONDS_BETWEEN_TAPS_HALVED
+
+    return (frame_count / video_fps) >= (minimum_seconds - EXISTING_OUTPUT_TOLERANCE_SECONDS)
+
+
+#####################################
+# Preflight Definitions
+#####################################
+def preflight_check_video(video_path, log_folder_path=None, growout_name=None):
+    # Returns why the video can't be processed, or None if it looks fine. Only the header and a few frames are read.
+    input_filename = os.path.split(video_path)[1]
+
+    if not input_filename.endswith(PREFLIGHT_SUPPORTED_EXTENSIONS):
+        return "Unsupported video format"
+
+    try:
+        camera_number = int(input_filename.split(" ")[CAMERA_NUMBER_POSITION_IN_SPLIT])
+    except (IndexError, ValueError):
+        return "Camera number not found in filename"
+
+    try:
+        camera_profile = get_camera_profile(input_filename, log_folder_path, growout_name)
+    except KeyError:
+        return "No camera profile for camera %d" % camera_number
+
+    video_reader = cv2.VideoCapture(video_path)
+
+    try:
+        if not video_reader.isOpened():
+            return "Video could not be opened"
+
+        video_fps = video_reader.get(cv2.CAP_PROP_FPS)
+        frame_count = int(video_reader.get(cv2.CAP_PROP_FRAME_COUNT))
+        frame_shape = (int(video_reader.get(cv2.CAP_PROP_FRAME_HEIGHT)), int(video_reader.get(cv2.CAP_PROP_FRAME_WIDTH)))
+
+        if video_fps <= 0:
+            return "Frame rate missing from video header"
+
+        if not all(frame_shape):
+            return "Resolution missing from video header"
+
+        # Recordings that were cut off before their header was finished may have no frame count, so those are left for
+        # the worker to find out about
+        if frame_count > 0 and (frame_count / video_fps) < PREFLIGHT_MINIMUM_VIDEO_SECONDS:
+            return "Video too short, %.1f seconds of at least %.1f" % (frame_count / video_fps,
+                                                                       PREFLIGHT_MINIMUM_VIDEO_SECONDS)
+
+        regions_outside_frame = \
+            LedDetector(camera_profile, frame_shape).get_led_regions_outside_frame(frame_shape)
+
+        if regions_outside_frame:
+            return "Camera %d %s led region outside of the %dx%d frame" % (
+                camera_number, " and ".join(regions_outside_frame), frame_shape[1], frame_shape[0])
+
+        # Samples run up to a second before the end, since a header can claim frames an interrupted recording never wrote
+        last_sample_frame_number = max(0, frame_count - 1 - int(video_fps))
+        sample_frame_numbers = sorted(set(
+            (sample_index * last_sample_frame_number) // (PREFLIGHT_SAMPLE_FRAMES - 1)
+            for sample_index in range(PREFLIGHT_SAMPLE_FRAMES)))
+
+        for frame_number in sample_frame_numbers:
+            if frame_number:
+                video_reader.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+
+            return_value, frame = video_reader.read()
+
+            if not return_value:
+                return "Frame %d of %d could not be read" % (frame_number + 1, frame_count)
+
+            if frame.shape[:2] != frame_shape:
+                return "Frame %d is %dx%d instead of %dx%d" % (frame_number + 1, frame.shape[1], frame.shape[0],
+                                                               frame_shape[1], frame_shape[0])
+    finally:
+        video_reader.release()
+
+    return None
+
+
+#####################################
+# LED Calibration Definitions
+#####################################
+def get_led_profile_path(log_folder_path, growout_name, camera_number):
+    return os.path.join(log_folder_path, "%s_camera%d%s" % (growout_name, camera_number, LED_PROFILE_FILENAME_APPEND))
+
+
+def load_led_profile(led_profile_path):
+    # Returns None if there isn't one, or it was made by a different version of the calibration
+    try:
+        with open(led_profile_path) as led_profile_file:
+            led_profile = json.load(led_profile_file)
+    except (OSError, ValueError):
+        return None
+
+    if led_profile.get("version") != LED_PROFILE_VERSION:
+        return None
+
+    return led_profile
+
+
+def get_camera_profile(input_filename, log_folder_path=None, growout_name=None):
+    # A calibrated profile for the growout is used over CAMERA_PROFILES. Raises IndexError or ValueError if there's no
+    # camera number in the filename, and KeyError if there's no profile for it.
+    camera_number = int(input_filename.split(" ")[CAMERA_NUMBER_POSITION_IN_SPLIT])
+
+    if CALIBRATE_LED_PROFILES and log_folder_path is not None:
+        led_profile = load_led_profile(get_led_profile_path(log_folder_path, growout_name, camera_number))
+
+        if led_profile is not None:
+            return led_profile["camera_profile"]
+
+    return CAMERA_PROFILES[camera_number]
+
+
+def get_video_signature(video_path):
+    return [os.path.split(video_path)[1], os.path.getsize(video_path), os.path.getmtime(video_path)]
+
+
+def sample_led_channel(video_path):
+    # Returns the red channel of frames spaced closer than the shortest led flash, shrunk to CALIBRATION_SAMPLE_WIDTH,
+    # along with their frame numbers. Avi frames are decoded straight to a fraction of their size.
+    video_reader = cv2.VideoCapture(video_path)
+    video_fps = video_reader.get(cv2.CAP_PROP_FPS)
+    frame_width = int(video_reader.get(cv2.CAP_PROP_FRAME_WIDTH))
+    frame_height = int(video_reader.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+    sample_stride = max(1, int(MINIMUM_LED_FLASH_SECONDS * video_fps))
+    sample_size = (CALIBRATION_SAMPLE_WIDTH, max(1, int(round(frame_height * CALIBRATION_SAMPLE_WIDTH / frame_width))))
+    red_channel_index = LedDetector.CHANNEL_INDEXES["red"]
+
+    raw_packets = video_path.endswith(".avi") and video_reader.set(cv2.CAP_PROP_FORMAT, -1)
+    reduced_decode_flag = cv2.IMREAD_COLOR
+
+    for reduction, reduced_flag in ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4),
+                                    (2, cv2.IMREAD_REDUCED_COLOR_2)):
+        if frame_width // reduction >= CALIBRATION_SAMPLE_WIDTH:
+            reduced_decode_flag = reduced_flag
+            break
+
+    samples = []
+    sample_frame_numbers = []
+    frame_number = -1
+
+    while video_reader.grab():
+        frame_number += 1
+
+        if frame_number % sample_stride:
+            continue
+
+        return_value, frame = video_reader.retrieve()
+
+        if return_value and raw_packets:
+            frame = cv2.imdecode(frame, reduced_decode_flag)
+
+        if not return_value or frame is None:
+            break
+
+        samples.append(cv2.resize(frame[:, :, red_channel_index], sample_size, interpolation=cv2.INTER_AREA))
+        sample_frame_numbers.append(frame_number)
+
+    video_reader.release()
+
+    return np.array(samples), sample_frame_numbers, video_fps, (frame_height, frame_width)
+
+
+def find_blinking_regions(samples):
+    # Leds are off for nearly every sample, so their brightest samples stand far out from their usual spread, unlike
+    # the fish or noise. Returns each region's bounding box in the samples and its flashes as start and end sample.
+    sample_count = len(samples)
+    mean_levels = samples.mean(axis=0, dtype=np.float32)
+
+    # Summed in chunks, so the whole stack of samples is never converted to floats at once
+    square_sums = np.zeros(samples.shape[1:], dtype=np.float32)
+
+    for chunk_start in range(0, sample_count, 256):
+        sample_chunk = samples[chunk_start:chunk_start + 256].astype(np.float32)
+        square_sums += (sample_chunk * sample_chunk).sum(axis=0)
+
+    deviations = np.sqrt(np.maximum(square_sums / sample_count - mean_levels * mean_levels, 0))
+    peak_brightening = samples.max(axis=0) - mean_levels
+
+    candidates = (peak_brightening >= CALIBRATION_MINIMUM_LED_CONTRAST) & \
+        (peak_brightening >= CALIBRATION_MINIMUM_PEAK_DEVIATIONS * (deviations + 1))
+
+    region_count, region_labels, region_stats, _ = cv2.connectedComponentsWithStats(candidates.astype(np.uint8),
+                                                                                    connectivity=8)
+    blinking_regions = []
+
+    for region_label in range(1, region_count):
+        # Only its brightest pixels, so fish swimming past next to a led don't add flashes or water down the led's
+        region_pixels = region_labels == region_label
+        region_peak_brightening = peak_brightening[region_pixels].max()
+        region_pixels &= peak_brightening >= region_peak_brightening * 3 / 4
+        region_levels = samples[:, region_pixels].mean(axis=1, dtype=np.float32)
+
+        # Split halfway between its usual level and its brightest
+        led_on = region_levels > (np.median(region_levels) + region_levels.max()) / 2
+
+        if led_on.mean() > CALIBRATION_MAXIMUM_ON_FRACTION:
+            continue
+
+        flash_edges = np.flatnonzero(np.diff(np.concatenate(([0], led_on.astype(np.int8), [0]))))
+
+        blinking_regions.append({
+            "bounding_box": tuple(int(value) for value in region_stats[region_label, :4]),
+            "flashes": list(zip(flash_edges[::2].tolist(), flash_edges[1::2].tolist())),
+            "peak_brightening": float(region_peak_brightening)
+        })
+
+    return blinking_regions
+
+
+def count_tap_gaps(blinking_region, flash_times):
+    # Flashes roughly SECONDS_BETWEEN_TAPS apart, which fish swimming past don't manage
+    flash_starts = [flash_times[flash_start] for flash_start, _ in blinking_region["flashes"]]
+
+    return sum(abs(next_start - flash_start - SECONDS_BETWEEN_TAPS) <= SECONDS_BETWEEN_TAPS_HALVED
+               for flash_start, next_start in zip(flash_starts, flash_starts[1:]))
+
+
+def pick_led_regions(blinking_regions, flash_times):
+    # The tap led is the region with the most flashes spaced like taps, and the start led is the other region with a
+    # flash that comes closest to the start to first tap time before the tap led's first flash
+    tap_regions = [blinking_region for blinking_region in blinking_regions
+                   if count_tap_gaps(blinking_region, flash_times) > 0]
+
+    if not tap_regions:
+        return None, None
+
+    tap_region = max(tap_regions, key=lambda blinking_region: (
+        count_tap_gaps(blinking_region, flash_times), -abs(len(blinking_region["flashes"]) - NUMBER_OF_TAPS_TO_END),
+        blinking_region["peak_brightening"]))
+
+    first_tap_time = flash_times[tap_region["flashes"][0][0]]
+    start_region = None
+    start_error = None
+
+    for blinking_region in blinking_regions:
+        if blinking_region is tap_region:
+            continue
+
+        for flash_start, _ in blinking_region["flashes"]:
+            if flash_times[flash_start] >= first_tap_time:
+                break
+
+            flash_error = abs(first_tap_time - flash_times[flash_start] - CORRECT_START_TO_FIRST_TAP_LENGTH)
+
+            if start_error is None or flash_error < start_error:
+                start_region = blinking_region
+                start_error = flash_error
+
+    return start_region, tap_region
+
+
+def measure_led(video_reader, blinking_region, sample_frame_numbers, sample_scale, frame_shape):
+    # Decodes the middle of each flash and a frame from before it at full size, and boxes the pixels that brighten by
+    # at least half as much as the brightest one. Returns the box and the red level inside it in each of those frames.
+    red_channel_index = LedDetector.CHANNEL_INDEXES["red"]
+    region_x, region_y, region_width, region_height = blinking_region["bounding_box"]
+
+    # The region is grown by a sample on each side, since a led can straddle samples, and by half the largest box, so
+    # the box fits around wherever in it the led turns out to be
+    crop_margin = sample_scale + CALIBRATION_MAXIMUM_BOX_SIZE // 2
+    y_slice = slice(max(0, int(region_y * sample_scale - crop_margin)),
+                    min(frame_shape[0], int((region_y + region_height) * sample_scale + crop_margin) + 1))
+    x_slice = slice(max(0, int(region_x * sample_scale - crop_margin)),
+                    min(frame_shape[1], int((region_x + region_width) * sample_scale + crop_margin) + 1))
+
+    frame_pairs = []
+
+    for flash_start, flash_end in blinking_region["flashes"][:CALIBRATION_FLASHES_PER_LED]:
+        off_sample = flash_start - 2 if flash_start >= 2 else flash_end + 1
+
+        if off_sample >= len(sample_frame_numbers):
+            continue
+
+        frame_pairs.append((sample_frame_numbers[(flash_start + flash_end - 1) // 2], sample_frame_numbers[off_sample]))
+
+    on_crops = []
+    off_crops = []
+
+    for on_frame_number, off_frame_number in frame_pairs:
+        crops = []
+
+        for frame_number in (on_frame_number, off_frame_number):
+            video_reader.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+            return_value, frame = video_reader.read()
+
+            if return_value:
+                crops.append(frame[y_slice, x_slice, red_channel_index].astype(np.float32))
+
+        if len(crops) == 2:
+            on_crops.append(crops[0])
+            off_crops.append(crops[1])
+
+    if not on_crops:
+        return None
+
+    brightening = np.mean(on_crops, axis=0) - np.mean(off_crops, axis=0)
+    lit_pixels = (brightening >= brightening.max() / 2).astype(np.uint8)
+
+    lit_count, lit_labels, lit_stats, lit_centroids = cv2.connectedComponentsWithStats(lit_pixels, connectivity=8)
+    lit_label = 1 + int(np.argmax(lit_stats[1:, cv2.CC_STAT_AREA]))
+
+    box_size = int(np.sqrt(lit_stats[lit_label, cv2.CC_STAT_AREA])) // 2 * 2
+    box_size = min(CALIBRATION_MAXIMUM_BOX_SIZE, max(CALIBRATION_MINIMUM_BOX_SIZE, box_size))
+    center_x = x_slice.start + lit_centroids[lit_label][0]
+    center_y = y_slice.start + lit_centroids[lit_label][1]
+
+    # Same box LedDetector uses, within the crops
+    box_y_slice = slice(max(0, int(int(center_y) - box_size / 2) - y_slice.start),
+                        int(int(center_y) + box_size / 2) - y_slice.start)
+    box_x_slice = slice(max(0, int(int(center_x) - box_size / 2) - x_slice.start),
+                        int(int(center_x) + box_size / 2) - x_slice.start)
+
+    return {
+        "x_percentage": (int(center_x) + 0.5) / frame_shape[1],
+        "y_percentage": (int(center_y) + 0.5) / frame_shape[0],
+        "box_size": box_size,
+        "flashes": len(blinking_region["flashes"]),
+        "on_levels": [float(crop[box_y_slice, box_x_slice].mean()) for crop in on_crops],
+        "off_levels": [float(crop[box_y_slice, box_x_slice].mean()) for crop in off_crops]
+    }
+
+
+def calibrate_led_video(video_path):
+    # Run in a pool. Returns the start and tap led measurements from one video, or why they couldn't be made.
+    led_measurements = {"video": get_video_signature(video_path), "failure_reason": None}
+
+    samples, sample_frame_numbers, video_fps, frame_shape = sample_led_channel(video_path)
+
+    if len(samples) < 2 or video_fps <= 0:
+        led_measurements["failure_reason"] = "Video could not be read"
+        return led_measurements
+
+    blinking_regions = find_blinking_regions(samples)
+    start_region, tap_region = pick_led_regions(
+        blinking_regions, [frame_number / video_fps for frame_number in sample_frame_numbers])
+
+    if start_region is None or tap_region is None:
+        led_measurements["failure_reason"] = "No %s led found" % ("tap" if tap_region is None else "start")
+        return led_measurements
+
+    video_reader = cv2.VideoCapture(video_path)
+    led_measurements["frame_shape"] = frame_shape
+
+    for start_or_tap, blinking_region in (("start", start_region), ("tap", tap_region)):
+        led_measurements[start_or_tap] = measure_led(video_reader, blinking_region, sample_frame_numbers,
+                                                     frame_shape[1] / samples.shape[2], frame_shape)
+
+        if led_measurements[start_or_tap] is None:
+            led_measurements["failure_reason"] = "%s led frames could not be read" % start_or_tap.capitalize()
+
+    video_reader.release()
+
+    return led_measurements
+
+
+def combine_led_measurements(video_measurements):
+    # Returns a camera profile from the videos that calibrated, or why there isn't one. Each led goes where most of the
+    # videos put it, and its trigger level halfway between the brightest it was off and the dimmest it was on.
+    camera_profile = {}
+
+    for start_or_tap in ("start", "tap"):
+        led_measurements = [measurements[start_or_tap] for measurements in video_measurements]
+        frame_height, frame_width = video_measurements[0]["frame_shape"]
+
+        x_percentage = float(np.median([measurements["x_percentage"] for measurements in led_measurements]))
+        y_percentage = float(np.median([measurements["y_percentage"] for measurements in led_measurements]))
+        box_size = int(np.median([measurements["box_size"] for measurements in led_measurements])) // 2 * 2
+
+        # Videos disagreeing by more than half a box means the camera moved part way through the growout
+        for measurements in led_measurements:
+            if abs(measurements["x_percentage"] - x_percentage) * frame_width > box_size / 2 or \
+                    abs(measurements["y_percentage"] - y_percentage) * frame_height > box_size / 2:
+                return None, "%s led is in different places in different videos" % start_or_tap.capitalize()
+
+        dimmest_on_level = min(level for measurements in led_measurements for level in measurements["on_levels"])
+        brightest_off_level = max(level for measurements in led_measurements for level in measurements["off_levels"])
+
+        if dimmest_on_level - brightest_off_level < CALIBRATION_MINIMUM_LED_CONTRAST:
+            return None, "%s led is too close to its surroundings when lit, %.1f on and %.1f off" % (
+                start_or_tap.capitalize(), dimmest_on_level, brightest_off_level)
+
+        camera_profile.update({
+            "%s_light_x_location_percentage" % start_or_tap: x_percentage,
+            "%s_light_y_location_percentage" % start_or_tap: y_percentage,
+            "%s_light_box_size" % start_or_tap: box_size,
+            "%s_light_trigger_levels" % start_or_tap: {
+                "red": round((dimmest_on_level + brightest_off_level) / 2, 1),
+                "green": None,
+                "blue": None
+            }
+        })
+
+    return camera_profile, None
+
+
+def calibrate_led_profiles(growout_name, log_folder_path, video_paths):
+    # Calibrates each camera in the growout from up to CALIBRATION_VIDEOS_PER_CAMERA of its videos, spread through its
+    # recordings, reusing profiles made from those same videos before
+    camera_video_paths = {}
+
+    for video_path in sorted(video_paths):
+        try:
+            camera_number = int(os.path.split(video_path)[1].split(" ")[CAMERA_NUMBER_POSITION_IN_SPLIT])
+        except (IndexError, ValueError):
+            continue
+
+        camera_video_paths.setdefault(camera_number, []).append(video_path)
+
+    calibration_video_paths = {}
+
+    for camera_number, video_paths in camera_video_paths.items():
+        video_count = min(CALIBRATION_VIDEOS_PER_CAMERA, len(video_paths))
+        picked_video_paths = [video_paths[(video_index * len(video_paths)) // video_count]
+                              for video_index in range(video_count)]
+
+        led_profile = load_led_profile(get_led_profile_path(log_folder_path, growout_name, camera_number))
+
+        if led_profile is None or \
+                led_profile["videos"] != [get_video_signature(video_path) for video_path in picked_video_paths]:
+            calibration_video_paths[camera_number] = picked_video_paths
+
+    if not calibration_video_paths:
+        return
+
+    all_video_paths = [video_path for video_paths in calibration_video_paths.values() for video_path in video_paths]
+
+    print("Calibrating leds of %d camera(s) in \"%s\" from %d videos..." % (len(calibration_video_paths), growout_name,
+                                                                            len(all_video_paths)))
+
+    calibration_pool = mp.Pool(min(mp.cpu_count(), len(all_video_paths)))
+
+    try:
+        all_measurements = dict(zip(all_video_paths, calibration_pool.map(calibrate_led_video, all_video_paths)))
+    finally:
+        calibration_pool.close()
+        calibration_pool.join()
+
+    for camera_number, video_paths in sorted(calibration_video_paths.items()):
+        led_profile_path = get_led_profile_path(log_folder_path, growout_name, camera_number)
+        video_measurements = [all_measurements[video_path] for video_path in video_paths]
+
+        for measurements in video_measurements:
+            if measurements["failure_reason"] is not None:
+                print("Couldn't calibrate camera %d from \"%s\": %s." % (camera_number, measurements["video"][0],
+                                                                         measurements["failure_reason"]))
+
+        calibrated_measurements = [measurements for measurements in video_measurements
+                                   if measurements["failure_reason"] is None]
+
+        camera_profile, failure_reason = combine_led_measurements(calibrated_measurements) \
+            if calibrated_measurements else (None, "No video could be calibrated")
+
+        if camera_profile is None:
+            # An old profile would be for different videos, so it can't be trusted either
+            if os.path.exists(led_profile_path):
+                os.unlink(led_profile_path)
+
+            print("WARNING! Camera %d in \"%s\" could not be calibrated, using CAMERA_PROFILES instead: %s." % (
+                camera_number, growout_name, failure_reason))
+            continue
+
+        with open(led_profile_path + ".tmp", "w") as led_profile_file:
+            json.dump({"version": LED_PROFILE_VERSION, "camera": camera_number,
+                       "videos": [get_video_signature(video_path) for video_path in video_paths],
+                       "camera_profile": camera_profile, "measurements": calibrated_measurements},
+                      led_profile_file, indent=4)
+
+        os.replace(led_profile_path + ".tmp", led_profile_path)
+
+        print("Calibrated camera %d in \"%s\" from %d videos." % (camera_number, growout_name,
+                                                                  len(calibrated_measurements)))
+
+        # How far the leds are from where CAMERA_PROFILES has them, which is a sign the camera was bumped
+        if camera_number in CAMERA_PROFILES:
+            frame_height, frame_width = calibrated_measurements[0]["frame_shape"]
+
+            for start_or_tap in ("start", "tap"):
+                moved_pixels = np.hypot(
+                    (camera_profile["%s_light_x_location_percentage" % start_or_tap] -
+                     CAMERA_PROFILES[camera_number]["%s_light_x_location_percentage" % start_or_tap]) * frame_width,
+                    (camera_profile["%s_light_y_location_percentage" % start_or_tap] -
+                     CAMERA_PROFILES[camera_number]["%s_light_y_location_percentage" % start_or_tap]) * frame_height)
+
+                print("    %s led is %.1f pixels from CAMERA_PROFILES, trigger level %.1f red." % (
+                    start_or_tap.capitalize(), moved_pixels,
+                    camera_profile["%s_light_trigger_levels" % start_or_tap]["red"]))
+
+
+#####################################
+# Planned Output Definitions
+#####################################
+def encode_output_segment(segment_arguments):
+    # Runs in its own process. The plan lists the input frame number and time of each output frame, or None for black.
+    video_input_path, segment_path, fourcc, video_fps, output_shape, frame_shape, output_plan = segment_arguments
+
+    cv2.setNumThreads(1)
+
+    video_reader = SideviewWorker.open_video_capture(video_input_path)
+    video_writer = open_video_encoder(segment_path, fourcc, video_fps, output_shape)
+    black_frame = np.zeros(frame_shape, dtype=np.uint8)
+
+    frame = None
+    frame_number = -1
+    next_frame_number = 0
+
+    for frame_source in output_plan:
+        if frame_source is None:
+            write_video_frame(video_writer, black_frame, 1, "black")
+            continue
+
+        # Repeats of the last frame for padding are already decoded, and cut frames get seeked over
+        if frame_source[0] == frame_number:
+            write_video_frame(video_writer, frame, 1, "last_frame")
+            continue
+
+        if frame_source[0] != next_frame_number:
+            video_reader.set(cv2.CAP_PROP_POS_FRAMES, frame_source[0])
+
+        return_value, frame = video_reader.read()
+
+        if return_value and abs(video_reader.get(cv2.CAP_PROP_POS_MSEC) / 1000 - frame_source[1]) >= (0.5 / video_fps):
+            # Seeking wasn't exact, so the video gets grabbed forward from the start instead
+            video_reader.release()
+            video_reader = SideviewWorker.open_video_capture(video_input_path)
+
+            for _ in range(frame_source[0]):
+                video_reader.grab()
+
+            return_value, frame = video_reader.read()
+
+        if not return_value:
+            raise IOError("Frame %d of \"%s\" could not be read" % (frame_source[0], video_input_path))
+
+        frame_number = frame_source[0]
+        next_frame_number = frame_number + 1
+
+        video_writer.write(frame)
+
+    video_reader.release()
+    video_writer.release()
+
+
+def read_planned_packets(video_input_path, video_fps, frame_shape, output_plan):
+    # Yields the compressed bytes of each output frame in the plan, copied from the input, with black frames encoded once
+    packet_reader = SideviewWorker.open_video_capture(video_input_path)
+
+    if not packet_reader.set(cv2.CAP_PROP_FORMAT, -1):
+        raise IOError("Raw packet reading is not supported for \"%s\"" % video_input_path)
+
+    frame_bytes = None
+    frame_number = -1
+    next_frame_number = 0
+
+    for frame_source in output_plan:
+        if frame_source is None:
+            yield get_black_frame_bytes(frame_shape)
+            continue
+
+        if frame_source[0] != frame_number:
+            if frame_source[0] != next_frame_number:
+                packet_reader.set(cv2.CAP_PROP_POS_FRAMES, frame_source[0])
+
+            return_value = packet_reader.grab()
+
+            if return_value and abs(packet_reader.get(cv2.CAP_PROP_POS_MSEC) / 1000 - frame_source[1]) >= (0.5 / video_fps):
+                # Seeking wasn't exact, so the video gets grabbed forward from the start instead
+                packet_reader.release()
+                packet_reader = SideviewWorker.open_video_capture(video_input_path)
+                packet_reader.set(cv2.CAP_PROP_FORMAT, -1)
+
+                for _ in range(frame_source[0] + 1):
+                    return_value = packet_reader.grab()
+
+            if not return_value:
+                raise IOError("Frame %d of \"%s\" could not be read" % (frame_source[0], video_input_path))
+
+            frame_bytes = packet_reader.retrieve()[1].tobytes()
+            frame_number = frame_source[0]
+            next_frame_number = frame_number + 1
+
+        yield frame_bytes
+
+    packet_reader.release()
+
+
+def join_mjpeg_segments(segment_paths, output_path, video_fps, output_shape):
+    # Copies the compressed frames of each segment in order, without decoding them
+    avi_writer = MjpegAviWriter(output_path, video_fps, output_shape)
+
+    try:
+        for segment_path in segment_paths:
+            segment_reader = cv2.VideoCapture(segment_path)
+
+            if not segment_reader.set(cv2.CAP_PROP_FORMAT, -1):
+                raise IOError("Raw packet reading is not supported for \"%s\"" % segment_path)
+
+            while True:
+                return_value, packet = segment_reader.read()
+
+                if not return_value:
+                    break
+
+                avi_writer.write(packet.tobytes())
+
+            segment_reader.release()
+    finally:
+        avi_writer.close()
+
+
+#####################################
+# Worker Sizing Definitions
+#####################################
+def get_available_memory_bytes():
+    # Returns None if it can't be found, in which case sizing only goes off of cpu cores
+    if os.name == "nt":
+        class MemoryStatusEx(ctypes.Structure):
+            _fields_ = [
+                ("dwLength", ctypes.c_ulong),
+                ("dwMemoryLoad", ctypes.c_ulong),
+                ("ullTotalPhys", ctypes.c_ulonglong),
+                ("ullAvailPhys", ctypes.c_ulonglong),
+                ("ullTotalPageFile", ctypes.c_ulonglong),
+                ("ullAvailPageFile", ctypes.c_ulonglong),
+                ("ullTotalVirtual", ctypes.c_ulonglong),
+                ("ullAvailVirtual", ctypes.c_ulonglong),
+                ("ullAvailExtendedVirtual", ctypes.c_ulonglong)
+            ]
+
+        memory_status = MemoryStatusEx()
+        memory_status.dwLength = ctypes.sizeof(MemoryStatusEx)
+
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(memory_status)):
+            return memory_status.ullAvailPhys
+
+        return None
+
+    if os.path.exists("/proc/meminfo"):
+        with open("/proc/meminfo") as meminfo_file:
+            for line in meminfo_file:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def estimate_worker_memory_bytes(video_path):
+    # Mostly the frame pool, which is sized from the video's resolution and fps
+    video_reader = cv2.VideoCapture(video_path)
+
+    frame_bytes = int(video_reader.get(cv2.CAP_PROP_FRAME_WIDTH)) * int(video_reader.get(cv2.CAP_PROP_FRAME_HEIGHT)) * 3
+    buffered_frames = (SECONDS_BETWEEN_TAPS + SECONDS_BETWEEN_TAPS_HALVED) * video_reader.get(cv2.CAP_PROP_FPS)
+
+    video_reader.release()
+
+    pool_frames = (2 * PIPELINE_QUEUE_FRAMES) + 4
+    compressed_bytes = 0
+
+    # Buffered frames only take up pool slots when stored raw. JPEGs are counted at a tenth of a raw frame.
+    if BUFFER_STORAGE == "raw":
+        pool_frames += buffered_frames + FRAME_BUFFER_SLACK_FRAMES
+    elif BUFFER_STORAGE == "jpeg":
+        compressed_bytes = frame_bytes * (buffered_frames + FRAME_BUFFER_SLACK_FRAMES) / 10
+
+    pool_bytes = frame_bytes * pool_frames
+
+    if BUFFER_MEMORY_CAP_BYTES is not None:
+        pool_bytes = min(pool_bytes, max(frame_bytes, BUFFER_MEMORY_CAP_BYTES))
+
+    return WORKER_BASE_MEMORY_BYTES + int(pool_bytes + compressed_bytes)
+
+
+#####################################
+# Worker Process Definition
+#####################################
+def sideview_worker_process(worker_index, job_queue, result_queue, opencv_threads):
+    # Stays alive across videos, so cv2 and numpy are only imported once per process instead of once per video
+    cv2.setNumThreads(opencv_threads)
+
+    while True:
+        worker_arguments = job_queue.get()
+
+        if worker_arguments is None:
+            break
+
+        growout_name, video_input_path, video_output_path, log_folder_path, iso_datetime_string, segment_processes = \
+            worker_arguments
+
+        profiler = cProfile.Profile() if PROFILE_WORKERS else None
+
+        try:
+            if profiler is not None:
+                profiler.enable()
+
+            if ANALYZE_ONLY:
+                sideview_analyzer = SideviewAnalyzer(growout_name, video_input_path, log_folder_path, result_queue,
+                                                     iso_datetime_string)
+                result = (sideview_analyzer.timing_report["status"], sideview_analyzer.timing_report["failure_reason"],
+                          None, None, sideview_analyzer.timing_report)
+            else:
+                sideview_worker = SideviewWorker(growout_name, video_input_path, video_output_path, log_folder_path,
+                                                 result_queue, iso_datetime_string, segment_processes)
+                result = (sideview_worker.result_status, sideview_worker.failure_reason,
+                          sideview_worker.output_checksum, sideview_worker.metrics, None)
+        except Exception as error:
+            WorkerLog(get_log_file_path(log_folder_path, growout_name, iso_datetime_string), result_queue).write(
+                "########## Failed processing \"%s\"! Worker error! ##########\n%s" %
+                (video_input_path, traceback.format_exc()))
+
+            result = (STATUS_ERROR, "Worker error: %r" % error, None, None, None)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                profiler.dump_stats(os.path.join(log_folder_path, "%s_%s_%s%s" % (
+                    growout_name, os.path.splitext(os.path.split(video_input_path)[1])[0], iso_datetime_string,
+                    PROFILE_FILENAME_APPEND)))
+
+        result_queue.put((WORKER_MESSAGE_RESULT, worker_index, video_input_path, result))
+
+
+#####################################
+# ProcessingManifest Class Definition
+#####################################
+class ProcessingManifest(object):
+    # Per growout record of every input video, keyed by path and checked against its size and modified time, so re-runs
+    # only pick up new, changed, or retry eligible videos. Only the scheduler in the main process touches it. Paths are
+    # kept relative to the growout's raw folder, so they're the same wherever the growout is mounted.
+    def __init__(self, manifest_path, raw_folder_path):
+        self.raw_folder_path = raw_folder_path
+        self.connection = sqlite3.connect(manifest_path, timeout=MANIFEST_LOCK_TIMEOUT_SECONDS)
+
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS videos (input_path TEXT PRIMARY KEY, file_size INTEGER, modified_time REAL, "
+                "status TEXT, failure_reason TEXT, output_path TEXT, output_checksum TEXT, attempts INTEGER, "
+                "updated TEXT)")
+
+    def get_video_key(self, input_path):
+        return os.path.relpath(input_path, self.raw_folder_path).replace(os.sep, "/")
+
+    def get_record(self, input_path):
+        return self.connection.execute(
+            "SELECT file_size, modified_time, status, attempts FROM videos WHERE input_path = ?",
+            (self.get_video_key(input_path),)).fetchone()
+
+    def needs_processing(self, input_path, file_size, modified_time, output_path):
+        record = self.get_record(input_path)
+
+        if record is None:
+            # Outputs from before there was a manifest are kept if they're full length
+            if os.path.exists(output_path) and is_existing_output_complete(output_path):
+                self.record_result(input_path, file_size, modified_time, STATUS_SUCCEEDED,
+                                   "Output existed before the manifest", output_path, None)
+                return False
+
+            return True
+
+        recorded_file_size, recorded_modified_time, status, attempts = record
+
+        if (recorded_file_size, recorded_modified_time) != (file_size, modified_time):
+            return True
+
+        if status == STATUS_SUCCEEDED:
+            return not os.path.exists(output_path)
+        elif status == STATUS_BAD_VIDEO:
+            return RETRY_BAD_VIDEOS
+
+        # Errored, or the run was killed while it was being processed
+        return attempts < MAXIMUM_PROCESSING_ATTEMPTS
+
+    def mark_running(self, input_path, file_size, modified_time, output_path):
+        record = self.get_record(input_path)
+
+        attempts = 0
+
+        # Attempts start over when the input changes
+        if record is not None and (record[0], record[1]) == (file_size, modified_time):
+            attempts = record[3]
+
+        self.write_record(input_path, file_size, modified_time, STATUS_RUNNING, None, output_path, None, attempts + 1)
+
+    def record_result(self, input_path, file_size, modified_time, status, failure_reason, output_path,
+                      output_checksum):
+        record = self.get_record(input_path)
+        attempts = record[3] if record is not None else 0
+
+        self.write_record(input_path, file_size, modified_time, status, failure_reason, output_path, output_checksum,
+                          attempts)
+
+    def write_record(self, input_path, file_size, modified_time, status, failure_reason, output_path, output_checksum,
+                     attempts):
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO videos VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (self.get_video_key(input_path), file_size, modified_time, status, failure_reason, output_path, output_checksum, attempts,
+                 datetime.now().isoformat()))
+
+    def close(self):
+        self.connection.close()
+
+
+class SharedProcessingManifest(ProcessingManifest):
+    # Used with SHARED_PROCESSING in place of the SQLite file, which can be corrupted by nodes writing it at once over a
+    # network share. Each video's record is its own file next to its lease, written whole under a temporary name and
+    # renamed over the old one, so other nodes only ever read complete records.
+    def __init__(self, record_folder_path, growout_name, raw_folder_path, node_name):
+        self.record_folder_path = record_folder_path
+        self.growout_name = growout_name
+        self.raw_folder_path = raw_folder_path
+        self.node_name = node_name
+
+        os.makedirs(self.record_folder_path, exist_ok=True)
+
+    def get_record_path(self, input_path):
+        return os.path.join(self.record_folder_path, "%s_%s%s" % (
+            self.growout_name, self.get_video_key(input_path).replace("/", "_"), MANIFEST_RECORD_FILENAME_APPEND))
+
+    def get_record(self, input_path):
+        try:
+            with open(self.get_record_path(input_path), "r") as record_file:
+                video_record = json.load(record_file)
+        except FileNotFoundError:
+            return None
+
+        return video_record["file_size"], video_record["modified_time"], video_record["status"], video_record["attempts"]
+
+    def write_record(self, input_path, file_size, modified_time, status, failure_reason, output_path, output_checksum,
+                     attempts):
+        record_path = self.get_record_path(input_path)
+        temporary_record_path = "%s.%s.tmp" % (record_path, self.node_name)
+
+        with open(temporary_record_path, "w") as record_file:
+            json.dump({"input_path": self.get_video_key(input_path), "file_size": file_size,
+                       "modified_time": modified_time, "status": status, "failure_reason": failure_reason,
+                       "output_path": output_path, "output_checksum": output_checksum, "attempts": attempts,
+                       "node": self.node_name, "updated": datetime.now().isoformat()}, record_file, indent=1)
+
+        os.replace(temporary_record_path, record_path)
+
+    def close(self):
+        pass
+
+
+#####################################
+# NodeLeases Class Definition
+#####################################
+class NodeLeases(object):
+    # Lease files that let several nodes share the same growouts. A lease is claimed by creating its file, kept alive by
+    # touching it, and can be taken over by another node once it hasn't been touched in LEASE_EXPIRY_SECONDS.
+    def __init__(self, node_name):
+        self.node_name = node_name
+        self.held_lease_paths = set()
+
+        self.last_renew_time = time()
+
+    @staticmethod
+    def get_lease_path(log_folder_path, growout_name, input_path):
+        lease_folder_path = os.path.join(log_folder_path, LEASE_FOLDER_NAME)
+
+        if not os.path.exists(lease_folder_path):
+            os.makedirs(lease_folder_path, exist_ok=True)
+
+        return os.path.join(lease_folder_path,
+                            "%s_%s%s" % (growout_name, os.path.split(input_path)[1], LEASE_FILENAME_APPEND))
+
+    def claim(self, lease_path):
+        # Creating the file only succeeds for one node, even over a network share
+        try:
+            lease_file_descriptor = os.open(lease_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            if not self.take_over_expired(lease_path):
+                return False
+
+            try:
+                lease_file_descriptor = os.open(lease_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                return False
+
+        with os.fdopen(lease_file_descriptor, "w") as lease_file:
+            lease_file.write("%s\n%s\n" % (self.node_name, datetime.now().isoformat()))
+
+        self.held_lease_paths.add(lease_path)
+
+        return True
+
+    def take_over_expired(self, lease_path):
+        expired_lease_path = "%s.expired_%s" % (lease_path, self.node_name)
+
+        # Only one node's rename of the expired lease succeeds
+        try:
+            if (time() - os.path.getmtime(lease_path)) < LEASE_EXPIRY_SECONDS:
+                return False
+
+            os.rename(lease_path, expired_lease_path)
+        except OSError:
+            return False
+
+        # Another node may have taken it over and claimed it again between the check and the rename, so it gets put back
+        if (time() - os.path.getmtime(expired_lease_path)) < LEASE_EXPIRY_SECONDS:
+            try:
+                os.rename(expired_lease_path, lease_path)
+            except OSError:
+                os.unlink(expired_lease_path)
+
+            return False
+
+        os.unlink(expired_lease_path)
+
+        return True
+
+    def renew(self):
+        if (time() - self.last_renew_time) < LEASE_RENEW_INTERVAL_SECONDS:
+            return
+
+        for lease_path in self.held_lease_paths:
+            try:
+                os.utime(lease_path)
+            except OSError:
+                pass
+
+        self.last_renew_time = time()
+
+    def release(self, lease_path):
+        self.held_lease_paths.discard(lease_path)
+
+        try:
+            os.unlink(lease_path)
+        except OSError:
+            pass
+
+
+#####################################
+# SideviewScheduler Class Definition
+#####################################
+class SideviewScheduler(object):
+    def __init__(self):
+        # So we know when processing started
+        self.iso_datetime_string = datetime.now().strftime("%Y%m%dT%H%M%S")
+
+        self.pending_jobs = []
+        self.growout_names = []
+
+        self.manifests = []
+        # Input path to its manifest, file size, modified time, output path, lease path and metrics path
+        self.job_records = {}
+
+        # Shared processing only. Deferred jobs are leased by other nodes, and idle workers are waiting on them.
+        self.node_name = "%s_%d" % (socket.gethostname(), os.getpid())
+        self.node_leases = None  # type: NodeLeases
+        self.deferred_jobs = []
+        self.idle_workers = []
+        self.last_lease_retry_time = time()
+
+        self.node_progress_path = None
+        self.result_counts = {STATUS_SUCCEEDED: 0, STATUS_BAD_VIDEO: 0, STATUS_ERROR: 0}
+
+        # Analyze only. Timing report path to its rows, and each input path's report path.
+        self.timing_reports = {}
+        self.timing_report_paths = {}
+
+        # Each growout's output folder and name, for its timeline index
+        self.timeline_folders = {}
+
+        # Analysis doesn't write anything another node could clash with
+        if SHARED_PROCESSING and not ANALYZE_ONLY:
+            self.node_leases = NodeLeases(self.node_name)
+
+            # Each node gets its own worker log files
+            self.iso_datetime_string += "_" + self.node_name
+
+        self.number_of_workers = 0
+        self.opencv_threads_per_worker = 0
+        self.worker_memory_estimate = WORKER_BASE_MEMORY_BYTES
+
+        self.worker_processes = {}
+        self.worker_job_queues = {}
+        self.running_jobs = {}
+
+        self.result_queue = None  # type: mp.Queue
+
+        self.done_processing = False
+
+    def add_growout(self, sideview_video_processor):
+        # Done first, so preflight checks and workers pick up the calibrated led locations
+        if CALIBRATE_LED_PROFILES:
+            calibrate_led_profiles(sideview_video_processor.growout_name, sideview_video_processor.log_folder_path,
+                                   sideview_video_processor.paths_of_videos_to_process)
+
+        if self.node_leases is not None:
+            manifest = SharedProcessingManifest(
+                os.path.join(sideview_video_processor.log_folder_path, LEASE_FOLDER_NAME),
+                sideview_video_processor.growout_name, sideview_video_processor.raw_folder_path,
+                self.node_leases.node_name)
+        else:
+            manifest = ProcessingManifest(os.path.join(sideview_video_processor.log_folder_path,
+                                                       sideview_video_processor.growout_name + MANIFEST_FILENAME_APPEND),
+                                          sideview_video_processor.raw_folder_path)
+        self.manifests.append(manifest)
+
+        paths_to_process = []
+        preflight_failure_count = 0
+
+        for input_path in sideview_video_processor.paths_of_videos_to_process:
+            file_size = os.path.getsize(input_path)
+            modified_time = os.path.getmtime(input_path)
+            output_path = os.path.join(sideview_video_processor.processed_folder_path,
+                                       get_output_filename(os.path.split(input_path)[1]))
+
+            # Analysis doesn't make outputs, so every video gets analyzed
+            if not ANALYZE_ONLY and not manifest.needs_processing(input_path, file_size, modified_time, output_path):
+                continue
+
+            worker_arguments = (sideview_video_processor.growout_name, input_path,
+                                sideview_video_processor.processed_folder_path,
+                                sideview_video_processor.log_folder_path, self.iso_datetime_string)
+
+            metrics_path = os.path.join(sideview_video_processor.log_folder_path, "%s_%s%s" % (
+                sideview_video_processor.growout_name, self.iso_datetime_string, METRICS_FILENAME_APPEND))
+
+            timing_report_path = os.path.join(sideview_video_processor.log_folder_path, "%s_%s%s" % (
+                sideview_video_processor.growout_name, self.iso_datetime_string, TIMING_REPORT_FILENAME_APPEND))
+
+            self.timing_report_paths[input_path] = timing_report_path
+            self.timing_reports.setdefault(timing_report_path, [])
+
+            # Recorded as bad right away, the same as if a worker had found it, without the worker's full decode. No
+            # lease is taken, since every node comes to the same answer.
+            failure_reason = preflight_check_video(input_path, sideview_video_processor.log_folder_path,
+                                                   sideview_video_processor.growout_name) if PREFLIGHT_CHECKS else None
+
+            if failure_reason is not None:
+                self.job_records[input_path] = (manifest, file_size, modified_time, output_path, None, metrics_path)
+
+                self.log_preflight_failure(sideview_video_processor, input_path, failure_reason)
+                self.record_result(None, input_path, STATUS_BAD_VIDEO, failure_reason, None, None, None)
+
+                preflight_failure_count += 1
+                continue
+
+            lease_path = None
+
+            if self.node_leases is not None:
+                lease_path = NodeLeases.get_lease_path(sideview_video_processor.log_folder_path,
+                                                       sideview_video_processor.growout_name, input_path)
+
+            self.job_records[input_path] = (manifest, file_size, modified_time, output_path, lease_path, metrics_path)
+
+            self.pending_jobs.append((file_size, worker_arguments))
+            paths_to_process.append(input_path)
+
+        self.growout_names.append(sideview_video_processor.growout_name)
+
+        if WRITE_TIMELINES and not ANALYZE_ONLY:
+            self.timeline_folders[sideview_video_processor.processed_folder_path] = sideview_video_processor.growout_name
+
+        if self.node_leases is not None and self.node_progress_path is None:
+            self.node_progress_path = os.path.join(sideview_video_processor.log_folder_path,
+                                                   self.node_name + NODE_PROGRESS_FILENAME_APPEND)
+
+        print("Skipping %d of %d files in \"%s\" that are already processed or known to be bad." % (
+            len(sideview_video_processor.paths_of_videos_to_process) - len(paths_to_process) - preflight_failure_count,
+            len(sideview_video_processor.paths_of_videos_to_process), sideview_video_processor.growout_name))
+
+        if preflight_failure_count:
+            print("Skipping %d files in \"%s\" that failed preflight checks." % (preflight_failure_count,
+                                                                               sideview_video_processor.growout_name))
+
+        # Videos in a growout share a resolution, so only the biggest one gets opened to estimate worker memory use
+        if NUMBER_PROCESSES == "auto" and paths_to_process and not ANALYZE_ONLY:
+            largest_video_path = max(paths_to_process, key=os.path.getsize)
+            self.worker_memory_estimate = max(self.worker_memory_estimate,
+                                              estimate_worker_memory_bytes(largest_video_path))
+
+    def process_video_files(self):
+        # Sorted smallest to largest and popped off the end, so the biggest videos go first and the tail is short
+        self.pending_jobs.sort(key=lambda job: job[JOB_FILE_SIZE])
+
+        print("Queued %d files from %d growout(s)." % (len(self.pending_jobs), len(self.growout_names)))
+
+        if not self.pending_jobs:
+            for manifest in self.manifests:
+                manifest.close()
+
+            self.write_timeline_indexes()
+
+            print("Nothing new to process. Exiting...")
+            self.done_processing = True
+            return
+
+        self.choose_worker_configuration()
+
+        self.result_queue = mp.Queue()
+
+        for worker_index in range(self.number_of_workers):
+            self.start_worker(worker_index)
+            self.assign_next_job(worker_index)
+
+        self.report_node_progress()
+
+        while self.running_jobs or self.deferred_jobs:
+            if self.node_leases is not None:
+                self.node_leases.renew()
+
+            try:
+                worker_message = self.result_queue.get(timeout=WORKER_CHECK_INTERVAL_SECONDS)
+            except queue.Empty:
+                self.replace_crashed_workers()
+                self.retry_deferred_jobs()
+                continue
+
+            if worker_message[0] == WORKER_MESSAGE_LOG:
+                write_log_line(*worker_message[1:])
+                continue
+
+            _, worker_index, video_input_path, result = worker_message
+
+            # Results from a worker that crashed after sending them are for a job that was already given up on
+            if self.running_jobs.get(worker_index) != video_input_path:
+                continue
+
+            del self.running_jobs[worker_index]
+            self.record_result(worker_index, video_input_path, *result)
+            self.assign_next_job(worker_index)
+            self.report_node_progress()
+
+        for worker_process in self.worker_processes.values():
+            worker_process.join()
+
+        for manifest in self.manifests:
+            manifest.close()
+
+        if ANALYZE_ONLY:
+            self.write_timing_reports()
+
+        self.write_timeline_indexes()
+
+        print("Finished processing all files. Exiting...")
+        self.done_processing = True
+
+    def choose_worker_configuration(self):
+        cpu_count = mp.cpu_count()
+        available_memory = get_available_memory_bytes()
+
+        if NUMBER_PROCESSES == "auto":
+            # Analysis doesn't use the pipeline threads
+            self.number_of_workers = max(1, cpu_count // 2) if PIPELINE_THREADS and not ANALYZE_ONLY else cpu_count
+
+            if available_memory is not None:
+                usable_memory = available_memory * AUTO_SIZING_MEMORY_FRACTION
+                self.number_of_workers = min(self.number_of_workers, int(usable_memory // self.worker_memory_estimate))
+        else:
+            self.number_of_workers = NUMBER_PROCESSES
+
+        self.number_of_workers = max(1, min(self.number_of_workers, len(self.pending_jobs)))
+
+        if OPENCV_THREADS_PER_PROCESS == "auto":
+            self.opencv_threads_per_worker = max(1, cpu_count // self.number_of_workers)
+        else:
+            self.opencv_threads_per_worker = OPENCV_THREADS_PER_PROCESS
+
+        print("Using %d worker process(es) with %d OpenCV thread(s) each. %d cpu cores, %s free memory, ~%.1f GB per "
+              "worker." % (self.number_of_workers, self.opencv_threads_per_worker, cpu_count,
+                           "unknown" if available_memory is None else "%.1f GB" % (available_memory / 1024 ** 3),
+                           self.worker_memory_estimate / 1024 ** 3))
+
+    def start_worker(self, worker_index):
+        job_queue = mp.Queue()
+        worker_process = mp.Process(target=sideview_worker_process,
+                                    args=(worker_index, job_queue, self.result_queue, self.opencv_threads_per_worker))
+
+        self.worker_job_queues[worker_index] = job_queue
+        self.worker_processes[worker_index] = worker_process
+
+        worker_process.start()
+
+    def assign_next_job(self, worker_index):
+        # Each worker gets its own queue so we always know exactly which video it's on
+        while self.pending_jobs:
+            job = self.pending_jobs.pop()
+
+            worker_arguments = job[JOB_WORKER_ARGUMENTS]
+            video_input_path = worker_arguments[WORKER_ARGUMENT_INPUT_PATH]
+
+            manifest, file_size, modified_time, output_path, lease_path, _ = self.job_records[video_input_path]
+
+            if self.node_leases is not None:
+                # Kept around if another node has it, in case that node dies and its lease expires
+                if not self.node_leases.claim(lease_path):
+                    self.deferred_jobs.append(job)
+                    continue
+
+                # Another node may have finished it since the growout was scanned
+                if not manifest.needs_processing(video_input_path, file_size, modified_time, output_path):
+                    self.node_leases.release(lease_path)
+                    continue
+
+            # Marked before it starts, so a killed run counts as an attempt and gets retried next time. Anything left
+            # from an earlier run of the video goes first, so an output never outlives a change to its input.
+            if not ANALYZE_ONLY:
+                remove_output_files(output_path)
+                manifest.mark_running(video_input_path, file_size, modified_time, output_path)
+
+            self.running_jobs[worker_index] = video_input_path
+            self.worker_job_queues[worker_index].put(worker_arguments + (self.get_segment_processes(video_input_path),))
+            return
+
+        if self.deferred_jobs:
+            self.idle_workers.append(worker_index)
+        else:
+            self.worker_job_queues[worker_index].put(None)
+
+    def get_segment_processes(self, video_input_path):
+        # Picked as each job is handed out, so "auto" can split the last few videos over the cores the others left free
+        if ANALYZE_ONLY or not SEGMENT_ENCODING or not video_input_path.endswith(".avi") or OUTPUT_ENCODER != "opencv":
+            return 1
+
+        if SEGMENT_ENCODING == "auto":
+            return max(1, mp.cpu_count() // (len(self.running_jobs) + len(self.pending_jobs)))
+
+        # Each worker's share of the cores, so every worker splitting at once still doesn't start more processes than
+        # there are cores. There are only as many workers as videos, so a single video gets every core.
+        return max(1, mp.cpu_count() // self.number_of_workers)
+
+    def retry_deferred_jobs(self):
+        if not self.deferred_jobs or not self.idle_workers or \
+                (time() - self.last_lease_retry_time) < LEASE_RETRY_INTERVAL_SECONDS:
+            return
+
+        self.last_lease_retry_time = time()
+
+        self.pending_jobs.extend(self.deferred_jobs)
+        self.pending_jobs.sort(key=lambda job: job[JOB_FILE_SIZE])
+        self.deferred_jobs = []
+
+        idle_workers = self.idle_workers
+        self.idle_workers = []
+
+        for worker_index in idle_workers:
+            self.assign_next_job(worker_index)
+
+        self.report_node_progress()
+
+    def replace_crashed_workers(self):
+        for worker_index in list(self.running_jobs):
+            worker_process = self.worker_processes[worker_index]
+
+            if worker_process.is_alive():
+                continue
+
+            video_input_path = self.running_jobs.pop(worker_index)
+
+            print("########## Failed processing \"%s\"! Worker process exited with code %s! ##########" %
+                  (video_input_path, worker_process.exitcode))
+
+            worker_process.join()
+
+            self.record_result(worker_index, video_input_path, STATUS_ERROR,
+                               "Worker process exited with code %s" % worker_process.exitcode, None, None, None)
+
+            self.start_worker(worker_index)
+            self.assign_next_job(worker_index)
+
+    def record_result(self, worker_index, video_input_path, status, failure_reason, output_checksum, metrics,
+                      timing_report):
+        self.result_counts[status] += 1
+
+        if ANALYZE_ONLY:
+            # Videos that couldn't be analyzed still get a row, so every input shows up in the report
+            if timing_report is None:
+                timing_report = {"video": os.path.split(video_input_path)[1], "status": status,
+                                 "failure_reason": failure_reason}
+
+            self.timing_reports[self.timing_report_paths[video_input_path]].append(timing_report)
+            return
+
+        manifest, file_size, modified_time, output_path, lease_path, metrics_path = self.job_records[video_input_path]
+        manifest.record_result(video_input_path, file_size, modified_time, status, failure_reason, output_path,
+                               output_checksum)
+
+        # Also covers videos that failed preflight checks, and workers that crashed part way through
+        if status != STATUS_SUCCEEDED:
+            remove_output_files(output_path)
+
+        # Metrics come back with the result instead of being written by the workers, so only this process touches the file
+        metrics_record = {
+            "time": datetime.now().isoformat(),
+            "node": self.node_name,
+            "worker_index": worker_index,
+            "input_path": video_input_path,
+            "input_bytes": file_size,
+            "status": status,
+            "failure_reason": failure_reason
+        }
+        metrics_record.update(metrics or {})
+
+        with open(metrics_path, "a") as metrics_file:
+            metrics_file.write(json.dumps(metrics_record) + "\n")
+
+        if lease_path is not None:
+            self.node_leases.release(lease_path)
+
+    def log_preflight_failure(self, sideview_video_processor, video_input_path, failure_reason):
+        # Goes in the same log file the workers' lines go to for this growout and run
+        WorkerLog(get_log_file_path(sideview_video_processor.log_folder_path, sideview_video_processor.growout_name,
+                                    self.iso_datetime_string)).write(
+            "########## Failed preflight checks for \"%s\"! %s! Not processing! ##########" % (
+                video_input_path, failure_reason))
+
+    def write_timing_reports(self):
+        for timing_report_path, timing_reports in self.timing_reports.items():
+            with open(timing_report_path, "w", newline="") as timing_report_file:
+                csv_writer = csv.DictWriter(timing_report_file, TIMING_REPORT_COLUMNS)
+                csv_writer.writeheader()
+
+                for timing_report in sorted(timing_reports, key=lambda report: report["video"]):
+                    # Lists go in one cell each, separated by semicolons
+                    csv_writer.writerow({column: ";".join(("%.3f" % value) if isinstance(value, float) else str(value)
+                                                          for value in timing_report[column])
+                                         if isinstance(timing_report.get(column), list) else timing_report.get(column)
+                                         for column in TIMING_REPORT_COLUMNS})
+
+            print("Wrote timing report \"%s\"." % timing_report_path)
+
+    def write_timeline_indexes(self):
+        # Built from every timeline in the output folder rather than just this run's, so videos done in earlier runs or
+        # by other nodes are included too
+        for output_folder_path, growout_name in self.timeline_folders.items():
+            if not os.path.isdir(output_folder_path):
+                continue
+
+            timelines = {}
+
+            for filename in sorted(os.listdir(output_folder_path)):
+                if not filename.endswith(TIMELINE_FILENAME_APPEND):
+                    continue
+
+                try:
+                    with open(os.path.join(output_folder_path, filename)) as timeline_file:
+                        timeline = json.load(timeline_file)
+                except (OSError, ValueError):
+                    print("Couldn't read timeline \"%s\", leaving it out of the index." % filename)
+                    continue
+
+                timelines[timeline["output"]] = timeline
+
+            timeline_index_path = os.path.join(output_folder_path, growout_name + TIMELINE_INDEX_FILENAME_APPEND)
+
+            with open(timeline_index_path + ".tmp", "w") as timeline_index_file:
+                json.dump({"growout": growout_name, "videos": timelines}, timeline_index_file, separators=(",", ":"))
+
+            os.replace(timeline_index_path + ".tmp", timeline_index_path)
+
+            print("Wrote timeline index \"%s\" with %d videos." % (timeline_index_path, len(timelines)))
+
+    def report_node_progress(self):
+        # Each node writes its own progress file, so a shared run can be followed from any machine
+        if self.node_progress_path is None:
+            return
+
+        progress_lines = [
+            "Node: %s" % self.node_name,
+            "Updated: %s" % datetime.now().isoformat(),
+            "Succeeded: %d" % self.result_counts[STATUS_SUCCEEDED],
+            "Bad videos: %d" % self.result_counts[STATUS_BAD_VIDEO],
+            "Errors: %d" % self.result_counts[STATUS_ERROR],
+            "Queued: %d" % len(self.pending_jobs),
+            "Leased by other nodes: %d" % len(self.deferred_jobs),
+            "Running:"
+        ] + ["    %s" % video_input_path for video_input_path in self.running_jobs.values()]
+
+        with open(self.node_progress_path + ".tmp", "w") as progress_file:
+            progress_file.write("\n".join(progress_lines) + "\n")
+
+        os.replace(self.node_progress_path + ".tmp", self.node_progress_path)
+
+        print("[%s] %d succeeded, %d bad, %d errors, %d running, %d queued, %d leased by other nodes." % (
+            self.node_name, self.result_counts[STATUS_SUCCEEDED], self.result_counts[STATUS_BAD_VIDEO],
+            self.result_counts[STATUS_ERROR], len(self.running_jobs), len(self.pending_jobs), len(self.deferred_jobs)))
+
+
+if __name__ == "__main__":
+    if TOP_LEVEL_TYPE == "one_growout":
+        print("Running in single growout mode!")
+
+        sideview_video_processor = SideviewVideoProcessor()
+        sideview_video_processor.get_input_folder_path()
+        sideview_video_processor.find_video_paths()
+        sideview_video_processor.process_video_files()
+    elif TOP_LEVEL_TYPE == "all_growouts":
+        print("Running in all growouts mode!")
+
+        tk_root = tk.Tk()
+        tk_root.withdraw()
+
+        top_folder_path = filedialog.askdirectory(title="Select Directory of All Growouts")
+
+        if top_folder_path == "":
+            print("Please enter a valid path and try again...")
+            exit(2)
+
+        log_folder_path = "%s/%s" % (top_folder_path, LOGS_FOLDER_NAME)
+
+        if not os.path.exists(log_folder_path):
+            os.mkdir(log_folder_path)
+
+        # Videos from every growout go into one queue, so workers never sit idle waiting on the end of a growout
+        sideview_scheduler = SideviewScheduler()
+
+        for directory in os.listdir(top_folder_path):
+            file_path = os.path.join(top_folder_path, directory)
+
+            if (directory == LOGS_FOLDER_NAME) or os.path.isfile(file_path):
+                continue
+
+            sideview_video_processor = SideviewVideoProcessor(log_folder_path)
+            sideview_video_processor.get_input_folder_path(top_folder_path=file_path)
+            sideview_video_processor.find_video_paths()
+
+            sideview_scheduler.add_growout(sideview_video_processor)
+
+        sideview_scheduler.process_video_files()
 
     input("Processing complete. Press enter to exit.")
@@ -1,79 +1,625 @@
 import cv2
 import tkinter as tk
-from tkinter import filedialog
+from tkinter import filedialog, simpledialog
 from time import time, sleep
 import numpy as np
+import queue
+import threading
+import os
+import hashlib
+import tempfile
+import sys
+import argparse
+import ctypes
+import multiprocessing as mp
+
+from SideviewVideoProcessor import CORRECT_START_TO_FIRST_TAP_LENGTH, SECONDS_BETWEEN_TAPS, NUMBER_OF_TAPS_TO_END, \
+    get_proxy_path
 
 RESIZE_SIZE = (480, 270)
 MAX_PER_ROW = 3
 
+# Plays the small copy the processor wrote of an output (see WRITE_PROXIES) in its place, when there's one with the same
+# number of frames that's at least as big as the tiles
+PREFER_PROXIES = True
+
+# Frames each video decodes and resizes ahead of what's being shown, on its own thread
+PREFETCH_FRAMES = 30
+
+# Skips frames in every video at once when playback falls behind, so it keeps up with real time and stays in sync,
+# instead of playing slower than real time
+DROP_FRAMES_TO_KEEP_UP = False
+
+# Jumping to a tap lands this long before it, so the tap led can be seen turning on
+TAP_JUMP_LEAD_SECONDS = 2
+SKIP_SECONDS = 10
+
+# Each video's frame timestamps and keyframes are indexed once and kept here, so seeking can be checked to be exact
+# and starts decoding from the closest keyframe
+INDEX_FOLDER_PATH = os.path.join(tempfile.gettempdir(), "sideview_playback_index")
+
+# Exporting the grid to a video file (see --export) spreads decoding and resizing over this many processes, which hand
+# frames back through this many grid frames of shared memory. "auto" uses a process per cpu core, up to one per video.
+EXPORT_PROCESSES = "auto"
+EXPORT_BUFFER_FRAMES = 8
+
+CONTROLS = """Controls:
+    space       pause / play
+    d / a       step forward / back one frame
+    l / j       skip forward / back %d seconds
+    n / p       jump to the next / previous tap
+    1-9, 0      jump to tap 1-9, or 10
+    g           go to a frame number or a time (minutes:seconds)
+    q           quit""" % SKIP_SECONDS
+
+
+def get_tap_time(tap_number):
+    # In a cut output, the first tap comes after the start to first tap time plus the half window of priors
+    return CORRECT_START_TO_FIRST_TAP_LENGTH + (SECONDS_BETWEEN_TAPS / 2) + ((tap_number - 1) * SECONDS_BETWEEN_TAPS)
+
+
+def get_playback_paths(file_paths, tile_size):
+    playback_paths = []
+
+    for file_path in file_paths:
+        proxy_path = get_proxy_path(file_path)
+
+        if PREFER_PROXIES and os.path.exists(proxy_path):
+            video_reader = cv2.VideoCapture(file_path)
+            proxy_reader = cv2.VideoCapture(proxy_path)
+
+            # A proxy left from an earlier run of a video that's been processed again won't line up with its output
+            if proxy_reader.get(cv2.CAP_PROP_FRAME_COUNT) == video_reader.get(cv2.CAP_PROP_FRAME_COUNT) and \
+                    proxy_reader.get(cv2.CAP_PROP_FRAME_WIDTH) >= tile_size[0] and \
+                    proxy_reader.get(cv2.CAP_PROP_FRAME_HEIGHT) >= tile_size[1]:
+                file_path = proxy_path
+
+            video_reader.release()
+            proxy_reader.release()
+
+        playback_paths.append(file_path)
+
+    proxy_count = sum(playback_path != file_path for playback_path, file_path in zip(playback_paths, file_paths))
+
+    if proxy_count:
+        print("Using proxies for %d of %d videos." % (proxy_count, len(file_paths)))
+
+    return playback_paths
+
+
+def load_frame_index(file_path):
+    # Returns each frame's time in seconds and whether it's a keyframe. Read from the compressed frames without decoding
+    # them, and cached by path, size and modified time.
+    os.makedirs(INDEX_FOLDER_PATH, exist_ok=True)
+
+    file_stat = os.stat(file_path)
+    index_key = "%s|%d|%d" % (os.path.abspath(file_path), file_stat.st_size, int(file_stat.st_mtime))
+    index_path = os.path.join(INDEX_FOLDER_PATH, hashlib.sha1(index_key.encode("utf-8")).hexdigest() + ".npz")
+
+    if os.path.exists(index_path):
+        with np.load(index_path) as frame_index:
+            return frame_index["times"], frame_index["keyframes"]
+
+    packet_reader = cv2.VideoCapture(file_path)
+    raw_packets = packet_reader.set(cv2.CAP_PROP_FORMAT, -1)
+
+    # Older OpenCV builds can't say which packets are keyframes
+    has_keyframe_flags = raw_packets and hasattr(cv2, "CAP_PROP_LRF_HAS_KEY_FRAME")
+
+    times = []
+    keyframes = []
+
+    while packet_reader.grab():
+        times.append(packet_reader.get(cv2.CAP_PROP_POS_MSEC) / 1000)
+
+        # Without keyframe flags, every frame is treated as a keyframe and seeks only get checked
+        keyframes.append(packet_reader.get(cv2.CAP_PROP_LRF_HAS_KEY_FRAME) != 0 if has_keyframe_flags else True)
+
+    packet_reader.release()
+
+    times = np.array(times)
+    keyframes = np.array(keyframes, dtype=bool)
+
+    # Written under a temporary name, so a player closed part way through never leaves a partial index
+    np.savez(index_path + ".tmp.npz", times=times, keyframes=keyframes)
+    os.replace(index_path + ".tmp.npz", index_path)
+
+    return times, keyframes
+
+
+class PrefetchingDecoder(object):
+    # Decodes one video on a background thread into a bounded queue of frames already resized to RESIZE_SIZE, each with
+    # its frame number. Seeking stops the thread, moves the reader, and starts it again from the new frame. Frames
+    # dropped to keep up are only grabbed by the thread, without being decoded or resized.
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.video_reader = cv2.VideoCapture(file_path)
+        self.frame_times, self.keyframes = load_frame_index(file_path)
+
+        self.frame_queue = queue.Queue(maxsize=PREFETCH_FRAMES)
+        self.decoder_thread = None  # type: threading.Thread
+        self.stop_requested = False
+        self.ended = False
+
+        self.next_frame_number = 0
+        self.check_next_frame_time = False
+
+        # Set by playback, the thread grabs past everything before it
+        self.skip_to_frame_number = 0
+        self.returned_frame_number = -1
+
+        self.start_decoding()
+
+    def start_decoding(self):
+        self.stop_requested = False
+        self.ended = False
+
+        self.decoder_thread = threading.Thread(target=self.decode_frames)
+        self.decoder_thread.daemon = True
+        self.decoder_thread.start()
+
+    def stop_decoding(self):
+        self.stop_requested = True
+
+        # Keeps the queue drained so the thread can't block on a full queue before seeing the stop
+        while self.decoder_thread.is_alive() or not self.frame_queue.empty():
+            try:
+                self.frame_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+        self.decoder_thread.join()
+
+    def decode_frames(self):
+        while not self.stop_requested:
+            if self.next_frame_number < self.skip_to_frame_number and not self.check_next_frame_time:
+                if not self.video_reader.grab():
+                    self.frame_queue.put(None)
+                    break
+
+                self.next_frame_number += 1
+                continue
+
+            return_value, frame = self.video_reader.read()
+
+            if return_value and self.check_next_frame_time:
+                self.check_next_frame_time = False
+
+                if not self.is_at_frame_time(self.next_frame_number):
+                    # Seeking wasn't exact, so the video gets grabbed forward from the start instead
+                    self.video_reader.release()
+                    self.video_reader = cv2.VideoCapture(self.file_path)
+
+                    for _ in range(self.next_frame_number):
+                        self.video_reader.grab()
+
+                    return_value, frame = self.video_reader.read()
+
+            if not return_value:
+                self.frame_queue.put(None)
+                break
+
+            frame_number = self.next_frame_number
+            self.next_frame_number += 1
+
+            # Proxies are usually already the right size
+            if (frame.shape[1], frame.shape[0]) != RESIZE_SIZE:
+                frame = cv2.resize(frame, RESIZE_SIZE)
+
+            self.frame_queue.put((frame_number, frame))
+
+    def is_at_frame_time(self, frame_number):
+        if frame_number >= len(self.frame_times):
+            return False
+
+        frame_time = self.video_reader.get(cv2.CAP_PROP_POS_MSEC) / 1000
+
+        return abs(frame_time - self.frame_times[frame_number]) < 0.0005
+
+    def get_frame(self, frames_to_drop=0):
+        # Returns None once the video has ended. Dropped frames already in the queue are thrown away, and the thread
+        # skips the rest without decoding them.
+        if self.ended:
+            return None
+
+        wanted_frame_number = self.returned_frame_number + 1 + frames_to_drop
+        self.skip_to_frame_number = wanted_frame_number
+
+        while True:
+            queued_frame = self.frame_queue.get()
+
+            if queued_frame is None:
+                self.ended = True
+                return None
+
+            frame_number, frame = queued_frame
+
+            if frame_number >= wanted_frame_number:
+                self.returned_frame_number = frame_number
+                return frame
+
+    def seek(self, frame_number):
+        self.stop_decoding()
+
+        frame_number = max(0, frame_number)
+        self.next_frame_number = frame_number
+        self.skip_to_frame_number = frame_number
+        self.returned_frame_number = frame_number - 1
+
+        if frame_number >= len(self.frame_times):
+            # Past the end, so the thread just reports the video as ended
+            self.video_reader.set(cv2.CAP_PROP_POS_FRAMES, len(self.frame_times))
+        else:
+            # Starts decoding at the closest keyframe before the frame, and the first frame decoded gets its time checked
+            keyframe_numbers = np.flatnonzero(self.keyframes[:frame_number + 1])
+            keyframe_number = int(keyframe_numbers[-1]) if len(keyframe_numbers) else 0
+
+            self.video_reader.set(cv2.CAP_PROP_POS_FRAMES, keyframe_number)
+
+            for _ in range(frame_number - keyframe_number):
+                self.video_reader.grab()
+
+            self.check_next_frame_time = True
+
+        self.start_decoding()
+
+    def get_frame_number_at_time(self, seconds):
+        return int(np.searchsorted(self.frame_times, seconds - 0.0005))
+
+
+def draw_frame_label(grid_frame, frame_number, fps, suffix=""):
+    frame_seconds = frame_number / fps
+
+    cv2.putText(grid_frame, "frame %d  %02d:%05.2f%s" % (frame_number, frame_seconds // 60, frame_seconds % 60, suffix),
+                (10, 25), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+
+
+def get_tile_positions(number_of_videos, columns, tile_size):
+    # Returns the (y, x) corner of each video's tile, filling the grid a row at a time
+    tile_width, tile_height = tile_size
+
+    return [((video_index // columns) * tile_height, (video_index % columns) * tile_width)
+            for video_index in range(number_of_videos)]
+
+
+def export_tile_worker(file_paths, tile_positions, tile_size, grid_array, grid_shape, free_slots, finished_frames,
+                       opencv_threads):
+    # Decodes and resizes its share of the videos into their tiles of the shared grid frames, one frame number at a
+    # time, and says whether any of them still had a frame. Tiles of videos that have ended are left black.
+    cv2.setNumThreads(opencv_threads)
+
+    grid_frames = np.frombuffer(grid_array, dtype=np.uint8).reshape((EXPORT_BUFFER_FRAMES,) + grid_shape)
+    tile_width, tile_height = tile_size
+
+    video_readers = [cv2.VideoCapture(file_path) for file_path in file_paths]
+    frame_number = 0
+
+    while True:
+        free_slots.acquire()
+        grid_frame = grid_frames[frame_number % EXPORT_BUFFER_FRAMES]
+
+        for video_index, video_reader in enumerate(video_readers):
+            y, x = tile_positions[video_index]
+            return_value, frame = (False, None) if video_reader is None else video_reader.read()
+
+            if return_value:
+                grid_frame[y:y + tile_height, x:x + tile_width] = cv2.resize(frame, tile_size)
+            else:
+                grid_frame[y:y + tile_height, x:x + tile_width] = 0
+
+                if video_reader is not None:
+                    video_reader.release()
+                    video_readers[video_index] = None
+
+        any_frames_left = any(video_reader is not None for video_reader in video_readers)
+        finished_frames.put(any_frames_left)
+
+        if not any_frames_left:
+            break
+
+        frame_number += 1
+
+
+def get_finished_frame(finished_frames, worker_process):
+    while True:
+        try:
+            return finished_frames.get(timeout=1)
+        except queue.Empty:
+            if not worker_process.is_alive():
+                # It may have finished just after the wait ran out
+                try:
+                    return finished_frames.get_nowait()
+                except queue.Empty:
+                    print("An export process died, stopping the export.")
+                    exit(1)
+
+
+def export_grid(file_paths, output_path, columns, tile_size, process_count):
+    # Writes the synchronized grid straight to a video file as fast as it can be decoded and encoded, with no window
+    # and no real time pacing. It runs until the longest video ends, with ended videos' tiles left black.
+    video_reader = cv2.VideoCapture(file_paths[0])
+    fps = video_reader.get(cv2.CAP_PROP_FPS)
+    video_reader.release()
+
+    if fps <= 0:
+        print("Couldn't read the frame rate of %s." % file_paths[0])
+        exit(2)
+
+    tile_width, tile_height = tile_size
+    number_of_rows = -(-len(file_paths) // columns)
+    grid_shape = (number_of_rows * tile_height, columns * tile_width, 3)
+    tile_positions = get_tile_positions(len(file_paths), columns, tile_size)
+
+    if process_count == "auto":
+        process_count = mp.cpu_count()
+
+    process_count = max(1, min(int(process_count), len(file_paths)))
+
+    grid_array = mp.RawArray(ctypes.c_uint8, EXPORT_BUFFER_FRAMES * int(np.prod(grid_shape)))
+    grid_frames = np.frombuffer(grid_array, dtype=np.uint8).reshape((EXPORT_BUFFER_FRAMES,) + grid_shape)
+
+    # Videos are dealt out to the processes in turn, and each one can fill every grid frame slot not yet written out
+    worker_video_indexes = [list(range(worker_index, len(file_paths), process_count))
+                            for worker_index in range(process_count)]
+    free_slots = [mp.Semaphore(EXPORT_BUFFER_FRAMES) for _ in range(process_count)]
+    finished_frames = [mp.Queue() for _ in range(process_count)]
+    worker_processes = []
+
+    for worker_index, video_indexes in enumerate(worker_video_indexes):
+        worker_process = mp.Process(target=export_tile_worker, args=(
+            [file_paths[video_index] for video_index in video_indexes],
+            [tile_positions[video_index] for video_index in video_indexes], tile_size, grid_array, grid_shape,
+            free_slots[worker_index], finished_frames[worker_index], max(1, mp.cpu_count() // process_count)))
+        worker_process.daemon = True
+        worker_process.start()
+        worker_processes.append(worker_process)
+
+    fourcc = cv2.VideoWriter_fourcc(*'mp4v') if output_path.lower().endswith(".mp4") else cv2.VideoWriter_fourcc(*'MJPG')
+    video_writer = cv2.VideoWriter(output_path, fourcc, fps, (grid_shape[1], grid_shape[0]))
+
+    if not video_writer.isOpened():
+        print("Couldn't open %s for writing." % output_path)
+        exit(2)
+
+    print("Exporting %d videos to %s with %d processes..." % (len(file_paths), output_path, process_count))
+
+    start_time = time()
+    finished_workers = set()
+    frame_number = 0
+
+    while True:
+        grid_frame = grid_frames[frame_number % EXPORT_BUFFER_FRAMES]
+
+        for worker_index, worker_process in enumerate(worker_processes):
+            if worker_index in finished_workers:
+                # Nothing writes these tiles anymore, so they're blanked in case the slot held an earlier frame
+                for video_index in worker_video_indexes[worker_index]:
+                    y, x = tile_positions[video_index]
+                    grid_frame[y:y + tile_height, x:x + tile_width] = 0
+            elif not get_finished_frame(finished_frames[worker_index], worker_process):
+                finished_workers.add(worker_index)
+
+        if len(finished_workers) == process_count:
+            break
+
+        draw_frame_label(grid_frame, frame_number, fps)
+        video_writer.write(grid_frame)
+
+        for worker_index in range(process_count):
+            if worker_index not in finished_workers:
+                free_slots[worker_index].release()
+
+        frame_number += 1
+
+        if frame_number % (int(fps) * 60) == 0:
+            print("Exported %d frames, %.1f fps." % (frame_number, frame_number / (time() - start_time)))
+
+    video_writer.release()
+
+    for worker_process in worker_processes:
+        worker_process.join()
+
+    print("Exported %d frames in %.1f seconds." % (frame_number, time() - start_time))
+
+
+def parse_go_to_target(target_text):
+    # Returns ("frame", number) or ("time", seconds), or None if it can't be read. Times are minutes:seconds or hours:
+    # minutes:seconds.
+    target_text = target_text.strip()
+
+    try:
+        if ":" not in target_text:
+            return "frame", int(target_text)
+
+        seconds = 0
+
+        for part in target_text.split(":"):
+            seconds = (seconds * 60) + float(part)
+
+        return "time", seconds
+    except ValueError:
+        return None
+
+
 if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        argument_parser = argparse.ArgumentParser(
+            description="Without arguments, plays back the videos picked in a file dialog in a synchronized grid.")
+        argument_parser.add_argument("files", nargs="+", help="videos to put in the grid, in order")
+        argument_parser.add_argument("--export", required=True, metavar="OUTPUT",
+                                     help="writes the grid to this .avi or .mp4 file instead of showing it")
+        argument_parser.add_argument("--columns", type=int, default=MAX_PER_ROW)
+        argument_parser.add_argument("--tile-size", default="%dx%d" % RESIZE_SIZE, help="width x height of each video")
+        argument_parser.add_argument("--processes", default=EXPORT_PROCESSES)
+        arguments = argument_parser.parse_args()
+
+        try:
+            export_tile_size = tuple(int(size) for size in arguments.tile_size.lower().split("x"))
+        except ValueError:
+            export_tile_size = ()
+
+        if len(export_tile_size) != 2:
+            argument_parser.error("--tile-size should look like %dx%d" % RESIZE_SIZE)
+
+        if arguments.processes != "auto" and not arguments.processes.isdigit():
+            argument_parser.error("--processes should be a number or auto")
+
+        export_grid(get_playback_paths(arguments.files, export_tile_size), arguments.export, max(1, arguments.columns),
+                    export_tile_size, arguments.processes)
+        exit()
+
     tk_root = tk.Tk()
     tk_root.withdraw()
 
     files = filedialog.askopenfilenames(title="Video Files")
     print(files)
 
-    video_readers = {}
+    if not files:
+        exit()
+
+    files = get_playback_paths(files, RESIZE_SIZE)
 
-    for file_path in files:
-        video_readers[file_path] = cv2.VideoCapture(file_path)
+    fps = cv2.VideoCapture(files[0]).get(cv2.CAP_PROP_FPS)
+    desired_loop_time = (1 / fps)
 
-    fps = video_readers[files[0]].get(cv2.CAP_PROP_FPS)
+    print("Indexing videos...")
+    decoders = [PrefetchingDecoder(file_path) for file_path in files]
+
+    print(CONTROLS)
+
+    # Every tile keeps its spot in one canvas that's reused for each displayed frame. Tiles of videos that have ended
+    # are left black.
+    tile_width, tile_height = RESIZE_SIZE
+    number_of_rows = -(-len(decoders) // MAX_PER_ROW)
+    full_output = np.zeros((number_of_rows * tile_height, MAX_PER_ROW * tile_width, 3), dtype=np.uint8)
+    tile_positions = get_tile_positions(len(decoders), MAX_PER_ROW, RESIZE_SIZE)
+
+    # All videos are kept on the same frame number
+    frames_shown = 0
+    frames_to_drop = 0
+    playback_start_time = time()
+
+    paused = False
+    step_frames = 0
+    seek_frame_number = None
 
     while True:
         start_time = time()
-        frames_to_show = []
-        failed_reads = 0
-        rows = []
-        row_current_count = 0
-        output_image = None
-        resized = None
 
-        for file_path in video_readers:
-            return_value, current_frame = video_readers[file_path].read()
+        if seek_frame_number is not None:
+            # Times are taken from the first video, and every video goes to the same frame number, up to the last frame
+            # of the longest one
+            seek_frame_number = min(seek_frame_number, max(len(decoder.frame_times) for decoder in decoders) - 1)
 
-            if not return_value:
-                failed_reads += 1
+            for decoder in decoders:
+                decoder.seek(seek_frame_number)
 
-                if failed_reads == len(video_readers):
-                    exit()
-            else:
-                resized = cv2.resize(current_frame, RESIZE_SIZE)
+            frames_shown = max(0, seek_frame_number)
+            frames_to_drop = 0
+            seek_frame_number = None
+            step_frames = 1 if paused else 0
+            key = 0xFF
+        elif paused and not step_frames:
+            key = cv2.waitKey(50) & 0xFF
+        else:
+            failed_reads = 0
 
-                if output_image is None:
-                    output_image = resized
-                else:
-                    output_image = np.concatenate((output_image, resized), axis=1)
+            for decoder_index, decoder in enumerate(decoders):
+                current_frame = decoder.get_frame(frames_to_drop)
 
-                row_current_count += 1
+                y, x = tile_positions[decoder_index]
 
-                if row_current_count == MAX_PER_ROW:
-                    rows.append(np.copy(output_image))
-                    output_image = None
-                    row_current_count = 0
+                if current_frame is None:
+                    failed_reads += 1
+                    full_output[y:y + tile_height, x:x + tile_width] = 0
+                else:
+                    full_output[y:y + tile_height, x:x + tile_width] = current_frame
 
-        black = resized.copy()
-        black.fill(0)
+            # Stays open at the end, so it can still be seeked back
+            if failed_reads == len(decoders) and not paused:
+                paused = True
+                print("All videos ended. Seek back or press q to quit.")
 
-        if output_image is not None:
-            num_pad = MAX_PER_ROW - row_current_count
-            for _ in range(num_pad):
-                output_image = np.concatenate((output_image, black), axis=1)
-            rows.append(output_image.copy())
+            frames_shown += frames_to_drop + 1
+            step_frames = max(0, step_frames - 1)
 
-        full_output = rows[0]
-        for i in range(1, len(rows)):
-            full_output = np.concatenate((full_output, rows[i]), axis=0)
+            draw_frame_label(full_output, frames_shown - 1, fps, "  paused" if paused else "")
 
-        cv2.imshow("Multi-Player", full_output)
+            cv2.imshow("Multi-Player", full_output)
 
-        if cv2.waitKey(1) & 0xFF == ord('q'):
+            key = cv2.waitKey(1) & 0xFF
+
+        if key == ord('q'):
             exit()
 
+        # Frame the next displayed frame would be, which every seek is relative to
+        current_frame_number = frames_shown - 1
+
+        if key == ord(' '):
+            paused = not paused
+        elif key == ord('d'):
+            paused = True
+            step_frames = 1
+        elif key == ord('a'):
+            paused = True
+            seek_frame_number = current_frame_number - 1
+        elif key == ord('l'):
+            seek_frame_number = current_frame_number + int(SKIP_SECONDS * fps)
+        elif key == ord('j'):
+            seek_frame_number = current_frame_number - int(SKIP_SECONDS * fps)
+        elif key in (ord('n'), ord('p')) or ord('0') <= key <= ord('9'):
+            current_time = decoders[0].frame_times[min(max(0, current_frame_number), len(decoders[0].frame_times) - 1)]
+
+            # Taps are numbered from 1, and taken as passed once past the lead in before them
+            taps_passed = 0
+            for tap_number in range(1, NUMBER_OF_TAPS_TO_END + 1):
+                if current_time >= get_tap_time(tap_number) - TAP_JUMP_LEAD_SECONDS + (0.5 / fps):
+                    taps_passed = tap_number
+
+            if key == ord('n'):
+                tap_number = min(NUMBER_OF_TAPS_TO_END, taps_passed + 1)
+            elif key == ord('p'):
+                tap_number = max(1, taps_passed - 1)
+            else:
+                tap_number = min(NUMBER_OF_TAPS_TO_END, 10 if key == ord('0') else key - ord('0'))
+
+            seek_frame_number = decoders[0].get_frame_number_at_time(get_tap_time(tap_number) - TAP_JUMP_LEAD_SECONDS)
+            print("Jumping to tap %d." % tap_number)
+        elif key == ord('g'):
+            go_to_target = simpledialog.askstring("Go To", "Frame number, or time as minutes:seconds", parent=tk_root)
+
+            if go_to_target:
+                go_to_target = parse_go_to_target(go_to_target)
+
+                if go_to_target is None:
+                    print("Couldn't read that as a frame number or a time.")
+                elif go_to_target[0] == "frame":
+                    seek_frame_number = go_to_target[1]
+                else:
+                    seek_frame_number = decoders[0].get_frame_number_at_time(go_to_target[1])
+
+        if seek_frame_number is not None or paused:
+            # Real time playback picks up again from wherever it's resumed
+            playback_start_time = None
+            continue
+
+        if playback_start_time is None:
+            playback_start_time = time() - (frames_shown * desired_loop_time)
+
         loop_time = time() - start_time
-        desired_loop_time = (1 / fps)
-        if loop_time > (1 / fps):
+
+        if DROP_FRAMES_TO_KEEP_UP:
+            # Catches up to where real time playback would be, in every video at once so they stay in sync
+            frames_behind = int((time() - playback_start_time) / desired_loop_time) - frames_shown
+            frames_to_drop = max(0, frames_behind)
+
+            if frames_to_drop:
+                print("WARNING! Playback fell behind real time, dropping %d frame(s) in every video." % frames_to_drop)
+            else:
+                sleep(max(0, (playback_start_time + frames_shown * desired_loop_time) - time()))
+            continue
+
+        if loop_time > desired_loop_time:
             print(
                 "WARNING! Loop time greater than desired FPS intra-time." +
                 "Playback speed will be lower than real time! desired:%f vs actual:%f" % (desired_loop_time, loop_time))